@@ -1,17 +1,204 @@
+import time
+import queue
+import atexit
+import threading
 import requests
-from settings_loader import (TELEGRAM_API_KEY, TELEGRAM_CHAT_ID)
+from requests.adapters import HTTPAdapter
+from settings_loader import TELEGRAM_API_KEY, TELEGRAM_CHAT_ID, TELEGRAM_API_URL, SETTINGS
 
 TELEGRAM_TOKEN = TELEGRAM_API_KEY
 CHAT_ID = TELEGRAM_CHAT_ID
+MAX_MESSAGE_CHARS = 4096  # Telegram sendMessage limit
 
-def send_telegram_alert(message):
-    url = f'https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage'
-    payload = {
-        'chat_id': CHAT_ID,
-        'text': message,
-    }
-    try:
-        response = requests.post(url, json=payload)
-        response.raise_for_status()
-    except Exception as e:
-        print(f"❌ Telegram alert failed: {e}")
\ No newline at end of file
+
+# === Alert Dispatcher ===
+# Alerts are queued and sent from a background thread over one keep-alive
+# session, so a slow or failing Telegram API never delays the trading loop.
+# Repeats of the same key inside the cooldown are dropped (and counted),
+# and alerts arriving within the coalesce window go out as one message.
+# Pacing left as None follows the alerts section of settings.yaml, so edits
+# apply to the next alert.
+class AlertDispatcher:
+    def __init__(self, token: str = TELEGRAM_TOKEN, chat_id: str = CHAT_ID, base_url: str = TELEGRAM_API_URL,
+                 cooldown_seconds: float = None, coalesce_seconds: float = None,
+                 max_retries: int = None, timeout: float = None, max_queue: int = 1000):
+        self.url = f"{base_url.rstrip('/')}/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self._pacing = {'cooldown_seconds': cooldown_seconds, 'coalesce_seconds': coalesce_seconds,
+                        'max_retries': max_retries, 'timeout_seconds': timeout}
+
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.last_sent = {}
+        self.suppressed = {}
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _setting(self, name: str):
+        value = self._pacing[name]
+        return value if value is not None else getattr(SETTINGS.alerts(), name)
+
+    @property
+    def cooldown_seconds(self) -> float:
+        return self._setting('cooldown_seconds')
+
+    @property
+    def coalesce_seconds(self) -> float:
+        return self._setting('coalesce_seconds')
+
+    @property
+    def max_retries(self) -> int:
+        return self._setting('max_retries')
+
+    @property
+    def timeout(self) -> float:
+        return self._setting('timeout_seconds')
+
+    def alert(self, message: str, key: str = None) -> bool:
+        # Never blocks; returns False when the alert is suppressed or dropped
+        key = key if key is not None else message
+        now = time.monotonic()
+        with self._lock:
+            last = self.last_sent.get(key)
+            if last is not None and now - last < self.cooldown_seconds:
+                self.suppressed[key] = self.suppressed.get(key, 0) + 1
+                return False
+            self.last_sent[key] = now
+            repeats = self.suppressed.pop(key, 0)
+        if repeats:
+            message = f"{message}\n(+{repeats} repeats suppressed)"
+
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+            print(f"❌ Alert queue full, dropped: {message[:80]}")
+            return False
+        return True
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            message = self.queue.get()
+            if message is None:
+                self.queue.task_done()
+                return
+            batch = [message]
+
+            # Coalesce a burst into one message
+            deadline = time.monotonic() + self.coalesce_seconds
+            stop = False
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    message = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if message is None:
+                    stop = True
+                    break
+                batch.append(message)
+
+            try:
+                self._send("\n\n".join(batch))
+            except Exception as e:
+                # The worker must survive anything _send did not anticipate
+                self.failed += 1
+                print(f"❌ Telegram alert failed: {e}")
+            finally:
+                # Always settle the batch, or flush() and close() would wait forever
+                for _ in range(len(batch) + stop):
+                    self.queue.task_done()
+            if stop:
+                return
+
+    def _send(self, text: str) -> bool:
+        payload = {'chat_id': self.chat_id, 'text': text[:MAX_MESSAGE_CHARS]}
+        error = None
+        max_retries, timeout = self.max_retries, self.timeout
+        for attempt in range(max_retries + 1):
+            delay = 0.5 * 2 ** attempt
+            try:
+                response = self.session.post(self.url, json=payload, timeout=timeout)
+            except requests.RequestException as e:
+                error = e
+            else:
+                if response.ok:
+                    self.sent += 1
+                    return True
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                if response.status_code == 429:
+                    # Telegram says how long to back off (a proxy's 429 may not be JSON)
+                    try:
+                        delay = float(response.json().get('parameters', {}).get('retry_after', delay))
+                    except (ValueError, AttributeError, TypeError):
+                        pass
+                elif response.status_code < 500:
+                    break  # Bad token or chat id: retrying will not help
+            if attempt < max_retries:
+                time.sleep(delay)
+
+        print(f"❌ Telegram alert failed: {error}")
+        self.failed += 1
+        return False
+
+    def flush(self, timeout: float = None) -> bool:
+        # Waits until every queued alert has been sent or given up on
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while self.queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 10):
+        if self._thread is not None and self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout)
+        self.session.close()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> AlertDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = AlertDispatcher()
+            atexit.register(_dispatcher.close)
+        return _dispatcher
+
+
+def use_dispatcher(dispatcher: AlertDispatcher) -> AlertDispatcher:
+    # Swaps the shared dispatcher (e.g. for one pointed at FakeTelegram); returns the previous one
+    global _dispatcher
+    with _dispatcher_lock:
+        previous, _dispatcher = _dispatcher, dispatcher
+        return previous
+
+
+def drawdown_key(symbol: str, drawdown: float, limit: float) -> str:
+    # The severity band is part of the key: each further multiple of the alert
+    # threshold alerts at once instead of waiting out the previous band's cooldown
+    return f"drawdown:{symbol}:{int(abs(drawdown) // abs(limit))}x"
+
+
+def send_telegram_alert(message, key=None):
+    # Queued for the background dispatcher; returns immediately
+    return get_dispatcher().alert(message, key)
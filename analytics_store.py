@@ -0,0 +1,505 @@
+# Columnar analytics store over the trade log
+# The trade log CSV (one row per cycle: holds, entries, exits) is ingested
+# incrementally into Parquet, partitioned by symbol and year with rows in
+# timestamp order, so time-range scans only open the partitions and row
+# groups they need. Ingest also maintains small per-day aggregate tables, so
+# the usual questions are answered from a few rows per day instead of a
+# pandas scan of the whole log:
+#
+#   pnl_by_source          closed-trade PnL, trades and hit rate per source (RSI / FOMC)
+#   slippage_distribution  percentiles and histogram of fill slippage
+#   latency_percentiles    cycle and per-stage latency, merged from log-bucket histograms
+#   daily_returns          per-day return of live_equity
+#
+# Needs pyarrow (already optional for the Parquet log sink).
+#
+#   python analytics_store.py ingest                  live log and its latency log
+#   python analytics_store.py ingest a.csv b.csv      other logs (symbol from the file name)
+#   python analytics_store.py report --since 2025-01-01 --symbol XAUUSD
+
+import io
+import os
+import sys
+import json
+import glob
+import argparse
+import numpy as np
+import pandas as pd
+# Importable from the repo root and as the live_trading package (dashboard)
+if __package__:
+    from .log_utils import LOG_COLUMNS
+    from .latency import LatencyHistogram, LATENCY_COLUMNS
+    from .settings_loader import LOG_FILE_PATH, SYMBOL, ANALYTICS_STORE_PATH, ANALYTICS_COMPACT_FILES
+else:
+    from log_utils import LOG_COLUMNS
+    from latency import LatencyHistogram, LATENCY_COLUMNS
+    from settings_loader import LOG_FILE_PATH, SYMBOL, ANALYTICS_STORE_PATH, ANALYTICS_COMPACT_FILES
+
+TEXT_COLUMNS = ('signal', 'source', 'position', 'entry_date', 'sentiment', 'fed_date', 'order_status', 'trade_type', 'direction', 'symbol')
+EXIT_TYPES = ('exit', 'partial')
+# Rows that placed an order (executed_size repeats the last order's on hold rows)
+ORDER_TYPES = ('entry',) + EXIT_TYPES
+
+
+def symbol_for(log_path: str) -> str:
+    # The main live log trades SYMBOL; portfolio logs are <name>_live_log.csv
+    if os.path.abspath(log_path) == os.path.abspath(LOG_FILE_PATH):
+        return SYMBOL
+    return os.path.basename(log_path).split('_')[0].upper()
+
+
+def latency_log_path(log_path: str) -> str:
+    # Per-cycle stage timings written next to the trade log by latency.LatencyRecorder
+    root, _ = os.path.splitext(log_path)
+    return root + '_latency.csv'
+
+
+def _typed(df: pd.DataFrame, columns: tuple) -> pd.DataFrame:
+    # Fixed column set and types, so every Parquet part shares one schema
+    df = df.reindex(columns=list(columns))
+    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce', format='ISO8601')
+    for col in columns:
+        if col == 'timestamp':
+            continue
+        if col in TEXT_COLUMNS:
+            df[col] = df[col].astype('string')
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float64)
+    return df.dropna(subset=['timestamp']).sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+
+class AnalyticsStore:
+    def __init__(self, root: str = ANALYTICS_STORE_PATH, compact_files: int = ANALYTICS_COMPACT_FILES):
+        try:
+            import pyarrow as pa
+            import pyarrow.dataset as ds
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("analytics_store needs pyarrow (pip install pyarrow)", name='pyarrow')
+        self._pa, self._ds, self._pq = pa, ds, pq
+        self.root = root
+        self.compact_files = compact_files
+        os.makedirs(os.path.join(root, 'aggregates'), exist_ok=True)
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.manifest = {'sources': {}, 'next_part': 0, 'pending': None}
+        if os.path.isfile(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = {'pending': None, **json.load(f)}
+        self._aggregates = {}
+
+    # === Ingest ===
+    # Every change to the part files is journaled in the manifest first
+    # ('pending'), and the manifest is saved again once it is complete. Ingest
+    # advances the log offsets only in that final save, so parts written by an
+    # ingest that died before it are rolled back by the next one, and their
+    # rows read again, instead of being counted twice.
+    def ingest(self, log_path: str = LOG_FILE_PATH, symbol: str = None) -> int:
+        # Appends rows added to the trade log (and its latency log) since the
+        # last ingest; returns how many trade log rows were added
+        symbol = symbol or symbol_for(log_path)
+        self._recover()
+        trades, trades_source = self._read_new(log_path)
+        latency, latency_source = self._read_new(latency_log_path(log_path))
+        sources = dict(source for source in (trades_source, latency_source) if source is not None)
+        if trades is None and latency is None:
+            if sources:
+                # Only a header was new
+                self.manifest['sources'].update(sources)
+                self._save_manifest()
+            return 0
+
+        parts = []
+        touched = set()
+        if trades is not None:
+            trades['symbol'] = symbol
+            trades = _typed(trades, LOG_COLUMNS + ('symbol',))
+            parts += self._plan_parts('trades', trades, symbol)
+            touched.update(trades['timestamp'].dt.normalize().unique())
+        if latency is not None:
+            latency = _typed(latency, LATENCY_COLUMNS)
+            latency['symbol'] = symbol
+            parts += self._plan_parts('latency', latency, symbol)
+            touched.update(latency['timestamp'].dt.normalize().unique())
+
+        self._begin({'kind': 'ingest', 'parts': [self._relative(path) for path, _ in parts]})
+        for path, df in parts:
+            self._write_part(path, df)
+        self._refresh_aggregates(symbol, sorted(touched))
+        # Commit: the new offsets and the end of the journal entry in one manifest write
+        self.manifest['sources'].update(sources)
+        self.manifest['pending'] = None
+        self._save_manifest()
+
+        # Compacted once a partition has many files
+        for directory in sorted({os.path.dirname(path) for path, _ in parts}):
+            if len(glob.glob(os.path.join(directory, '*.parquet'))) >= self.compact_files:
+                self._compact(directory)
+        return 0 if trades is None else len(trades)
+
+    def _read_new(self, path: str) -> tuple:
+        # Complete lines appended since the recorded offset (as in log_tail.LogTail),
+        # and the (key, source) entry to record once they are stored
+        if not os.path.isfile(path):
+            return None, None
+        key = os.path.abspath(path)
+        source = dict(self.manifest['sources'].get(key, {'offset': 0, 'columns': None}))
+        size = os.path.getsize(path)
+        if size < source['offset']:
+            # Log was truncated or rotated
+            source = {'offset': 0, 'columns': None}
+        with open(path, 'rb') as f:
+            f.seek(source['offset'])
+            data = f.read(size - source['offset'])
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return None, None
+        data = data[:end]
+        source['offset'] += end
+        if source['columns'] is None:
+            header_end = data.index(b'\n') + 1
+            source['columns'] = data[:header_end].decode('utf-8').strip().split(',')
+            data = data[header_end:]
+        if not data:
+            return None, (key, source)
+        df = pd.read_csv(io.BytesIO(data), header=None, names=source['columns'], dtype=str, keep_default_na=False, na_values=[''])
+        return df, (key, source)
+
+    def _plan_parts(self, table: str, df: pd.DataFrame, symbol: str) -> list:
+        # One new file per (symbol, year) partition, as (path, rows)
+        parts = []
+        for year, part in df.groupby(df['timestamp'].dt.year):
+            directory = os.path.join(self.root, table, f"symbol={symbol}", f"year={year}")
+            parts.append((os.path.join(directory, self._next_part_name()), part.drop(columns='symbol')))
+        return parts
+
+    def _next_part_name(self) -> str:
+        name = f"part-{self.manifest['next_part']:08d}.parquet"
+        self.manifest['next_part'] += 1
+        return name
+
+    def _write_part(self, path: str, df: pd.DataFrame):
+        directory, name = os.path.split(path)
+        os.makedirs(directory, exist_ok=True)
+        # Dot-prefixed while being written, so readers never see a partial file
+        tmp_path = os.path.join(directory, '.' + name)
+        self._pq.write_table(self._pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+
+    def _compact(self, directory: str):
+        # Rewrites a partition as one timestamp-sorted file
+        parts = sorted(glob.glob(os.path.join(directory, '*.parquet')))
+        output = os.path.join(directory, self._next_part_name())
+        self._begin({'kind': 'compact', 'output': self._relative(output), 'inputs': [self._relative(path) for path in parts]})
+        df = self._pa.concat_tables([self._pq.read_table(path) for path in parts]).to_pandas()
+        self._write_part(output, df.sort_values('timestamp', kind='stable'))
+        for path in parts:
+            os.remove(path)
+        self.manifest['pending'] = None
+        self._save_manifest()
+
+    # === Journal ===
+    def _relative(self, path: str) -> str:
+        return os.path.relpath(path, self.root)
+
+    def _begin(self, entry: dict):
+        self.manifest['pending'] = entry
+        self._save_manifest()
+
+    def _recover(self):
+        # Finishes or undoes the change an interrupted ingest left behind
+        pending = self.manifest.get('pending')
+        if not pending:
+            return
+        if pending['kind'] == 'compact':
+            output = os.path.join(self.root, pending['output'])
+            # Complete once the compacted file is in place (it is renamed in whole):
+            # drop the inputs still left; otherwise the inputs are untouched
+            leftover = pending['inputs'] if os.path.isfile(output) else []
+            written = [output]
+        else:
+            # The offsets were never advanced, so the rows are read again
+            leftover = pending['parts']
+            written = [os.path.join(self.root, path) for path in pending['parts']]
+        for path in leftover:
+            path = os.path.join(self.root, path)
+            if os.path.isfile(path):
+                os.remove(path)
+        for path in written:
+            directory, name = os.path.split(path)
+            tmp_path = os.path.join(directory, '.' + name)
+            if os.path.isfile(tmp_path):
+                os.remove(tmp_path)
+        print(f"♻️ Recovered an interrupted {pending['kind']} ({len(leftover)} files removed)")
+        self.manifest['pending'] = None
+        self._save_manifest()
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # === Aggregates (per symbol and day) ===
+    def _refresh_aggregates(self, symbol: str, days: list):
+        # Recomputes only the days that received rows, from the stored rows of those days
+        if not days:
+            return
+        start, end = days[0], days[-1] + pd.Timedelta(days=1)
+        trades = self.scan('trades', start, end, symbol)
+        trades = trades[trades['timestamp'].dt.normalize().isin(days)]
+        latency = self.scan('latency', start, end, symbol)
+        latency = latency[latency['timestamp'].dt.normalize().isin(days)]
+        fresh = {
+            'daily': self._daily(trades),
+            'by_source': self._by_source(trades),
+            'fills': self._fills(trades),
+            'latency': self._latency(trades, latency),
+        }
+        for name, rows in fresh.items():
+            old = self.aggregate(name)
+            if not old.empty:
+                old = old[~((old['symbol'] == symbol) & old['day'].isin(days))]
+            frames = [df for df in (old, rows) if not df.empty]
+            merged = pd.concat(frames, ignore_index=True) if frames else rows
+            merged = merged.sort_values(['symbol', 'day'], kind='stable').reset_index(drop=True)
+            path = os.path.join(self.root, 'aggregates', f"{name}.parquet")
+            merged.to_parquet(path + '.tmp', index=False)
+            os.replace(path + '.tmp', path)
+            self._aggregates[name] = merged
+
+    @staticmethod
+    def _daily(trades: pd.DataFrame) -> pd.DataFrame:
+        if trades.empty:
+            return pd.DataFrame(columns=['symbol', 'day', 'rows', 'first_equity', 'last_equity', 'pnl', 'trades', 'fills'])
+        trades = trades.assign(
+            day=trades['timestamp'].dt.normalize(),
+            is_exit=trades['trade_type'].isin(EXIT_TYPES).fillna(False),
+            is_fill=trades['trade_type'].isin(ORDER_TYPES).fillna(False)
+        )
+        daily = trades.groupby(['symbol', 'day'], sort=True).agg(
+            rows=('timestamp', 'size'),
+            first_equity=('live_equity', 'first'),
+            last_equity=('live_equity', 'last'),
+            pnl=('pnl', 'sum'),
+            trades=('is_exit', 'sum'),
+            fills=('is_fill', 'sum'),
+        )
+        return daily.reset_index()
+
+    @staticmethod
+    def _by_source(trades: pd.DataFrame) -> pd.DataFrame:
+        # Exit and partial rows carry the source of the position they close
+        exits = trades[trades['trade_type'].isin(EXIT_TYPES).fillna(False)]
+        if exits.empty:
+            return pd.DataFrame(columns=['symbol', 'day', 'source', 'trades', 'pnl', 'wins', 'gross_profit', 'gross_loss'])
+        exits = exits.assign(
+            day=exits['timestamp'].dt.normalize(),
+            source=exits['source'].fillna('UNKNOWN'),
+            win=exits['pnl'] > 0,
+            profit=exits['pnl'].clip(lower=0),
+            loss=exits['pnl'].clip(upper=0)
+        )
+        by_source = exits.groupby(['symbol', 'day', 'source'], sort=True).agg(
+            trades=('pnl', 'size'),
+            pnl=('pnl', 'sum'),
+            wins=('win', 'sum'),
+            gross_profit=('profit', 'sum'),
+            gross_loss=('loss', 'sum'),
+        )
+        return by_source.reset_index()
+
+    @staticmethod
+    def _fills(trades: pd.DataFrame) -> pd.DataFrame:
+        # Only the rows with an executed order: a few per week
+        fills = trades[trades['trade_type'].isin(ORDER_TYPES).fillna(False)]
+        return pd.DataFrame({
+            'symbol': fills['symbol'],
+            'day': fills['timestamp'].dt.normalize(),
+            'timestamp': fills['timestamp'],
+            'signal': fills['signal'],
+            'source': fills['source'],
+            'executed_size': fills['executed_size'],
+            'price': fills['price'],
+            'slippage': fills['slippage'].fillna(0.0),
+            'slippage_bps': fills['slippage'].fillna(0.0) / fills['price'] * 1e4,
+        }).reset_index(drop=True)
+
+    @staticmethod
+    def _latency(trades: pd.DataFrame, latency: pd.DataFrame) -> pd.DataFrame:
+        # LatencyHistogram buckets per day and stage; buckets add up across days,
+        # so any date range gets percentiles without the raw timings
+        series = [('cycle', trades, trades['latency_ms'] if 'latency_ms' in trades else None)]
+        series += [(col[:-3], latency, latency[col]) for col in LATENCY_COLUMNS if col.endswith('_ms') and col in latency]
+        rows = []
+        for stage, frame, values in series:
+            if values is None or frame.empty:
+                continue
+            ns = values.to_numpy(dtype=np.float64) * 1e6
+            valid = ~np.isnan(ns)
+            if not valid.any():
+                continue
+            ns = np.maximum(ns[valid], 1.0)
+            part = pd.DataFrame({
+                'symbol': frame['symbol'].to_numpy()[valid],
+                'day': frame['timestamp'].dt.normalize().to_numpy()[valid],
+                'bucket': (np.log2(ns) * LatencyHistogram.BUCKETS_PER_OCTAVE).astype(np.int64),
+                'ns': ns,
+            })
+            grouped = part.groupby(['symbol', 'day', 'bucket'], sort=True)['ns'].agg(['size', 'sum', 'min', 'max']).reset_index()
+            grouped.insert(2, 'stage', stage)
+            rows.append(grouped.rename(columns={'size': 'count', 'sum': 'total_ns', 'min': 'min_ns', 'max': 'max_ns'}))
+        if not rows:
+            return pd.DataFrame(columns=['symbol', 'day', 'stage', 'bucket', 'count', 'total_ns', 'min_ns', 'max_ns'])
+        return pd.concat(rows, ignore_index=True)
+
+    def aggregate(self, name: str) -> pd.DataFrame:
+        # Aggregate tables are small (rows per day), so they are held in memory
+        if name not in self._aggregates:
+            path = os.path.join(self.root, 'aggregates', f"{name}.parquet")
+            self._aggregates[name] = pd.read_parquet(path) if os.path.isfile(path) else pd.DataFrame(columns=['symbol', 'day'])
+        return self._aggregates[name]
+
+    def _select(self, name: str, start=None, end=None, symbol: str = None) -> pd.DataFrame:
+        # start inclusive, end exclusive, by day
+        df = self.aggregate(name)
+        if df.empty:
+            return df
+        mask = np.ones(len(df), dtype=bool)
+        if symbol is not None:
+            mask &= (df['symbol'] == symbol).to_numpy()
+        if start is not None:
+            mask &= (df['day'] >= pd.Timestamp(start).normalize()).to_numpy()
+        if end is not None:
+            mask &= (df['day'] < pd.Timestamp(end)).to_numpy()
+        return df[mask]
+
+    # === Queries ===
+    def scan(self, table: str = 'trades', start=None, end=None, symbol: str = None, columns: list = None) -> pd.DataFrame:
+        # Raw rows in [start, end); partitions outside the range are never opened
+        directory = os.path.join(self.root, table)
+        if not os.path.isdir(directory):
+            empty = pd.DataFrame(columns=list(columns or ()))
+            return empty.assign(symbol=pd.Series(dtype='string'), timestamp=pd.Series(dtype='datetime64[ns]'))
+        ds = self._ds
+        dataset = ds.dataset(directory, format='parquet', partitioning='hive')
+        condition = None
+        clauses = []
+        if symbol is not None:
+            clauses.append(ds.field('symbol') == symbol)
+        if start is not None:
+            start = pd.Timestamp(start)
+            clauses += [ds.field('year') >= start.year, ds.field('timestamp') >= start.to_datetime64()]
+        if end is not None:
+            end = pd.Timestamp(end)
+            clauses += [ds.field('year') <= end.year, ds.field('timestamp') < end.to_datetime64()]
+        for clause in clauses:
+            condition = clause if condition is None else condition & clause
+        if columns is not None:
+            columns = list(dict.fromkeys(list(columns) + ['symbol', 'timestamp']))
+        df = dataset.to_table(columns=columns, filter=condition).to_pandas()
+        if 'symbol' in df:
+            df['symbol'] = df['symbol'].astype('string')
+        df = df.drop(columns='year', errors='ignore')
+        return df.sort_values(['symbol', 'timestamp'], kind='stable').reset_index(drop=True)
+
+    def pnl_by_source(self, start=None, end=None, symbol: str = None) -> pd.DataFrame:
+        rows = self._select('by_source', start, end, symbol)
+        columns = ['trades', 'pnl', 'wins', 'gross_profit', 'gross_loss']
+        if rows.empty:
+            return pd.DataFrame(columns=columns + ['win_rate', 'avg_pnl', 'profit_factor'])
+        table = rows.groupby('source')[columns].sum()
+        table['win_rate'] = table['wins'] / table['trades']
+        table['avg_pnl'] = table['pnl'] / table['trades']
+        table['profit_factor'] = (table['gross_profit'] / -table['gross_loss']).where(table['gross_loss'] < 0)
+        return table
+
+    def slippage_distribution(self, start=None, end=None, symbol: str = None, bins: int = 20) -> dict:
+        fills = self._select('fills', start, end, symbol)
+        if fills.empty:
+            return None
+        slippage = fills['slippage'].to_numpy(dtype=np.float64)
+        counts, edges = np.histogram(slippage, bins=bins)
+        p50, p90, p99 = np.percentile(slippage, (50, 90, 99))
+        return {
+            'fills': len(slippage),
+            'mean': float(slippage.mean()),
+            'p50': float(p50),
+            'p90': float(p90),
+            'p99': float(p99),
+            'max': float(slippage.max()),
+            'mean_bps': float(fills['slippage_bps'].mean()),
+            'by_source': fills.groupby(fills['source'].fillna('UNKNOWN'))['slippage'].describe(),
+            'histogram': pd.DataFrame({'low': edges[:-1], 'high': edges[1:], 'count': counts}),
+        }
+
+    def latency_percentiles(self, start=None, end=None, symbol: str = None) -> pd.DataFrame:
+        # Same summary as the live latency snapshot, for any date range
+        rows = self._select('latency', start, end, symbol)
+        summaries = {}
+        for stage, group in rows.groupby('stage', sort=False):
+            hist = LatencyHistogram()
+            buckets = group.groupby('bucket')['count'].sum()
+            hist.counts = {int(bucket): int(count) for bucket, count in buckets.items()}
+            hist.count = int(buckets.sum())
+            hist.total_ns = float(group['total_ns'].sum())
+            hist.min_ns = float(group['min_ns'].min())
+            hist.max_ns = float(group['max_ns'].max())
+            summaries[stage] = hist.summary()
+        return pd.DataFrame(summaries).T
+
+    def daily_returns(self, start=None, end=None, symbol: str = None) -> pd.DataFrame:
+        # Return on the previous day's closing live_equity (the first day on its opening one)
+        daily = self._select('daily', symbol=symbol)
+        if daily.empty:
+            return pd.DataFrame(columns=['symbol', 'day', 'equity', 'return', 'pnl', 'trades'])
+        previous = daily.groupby('symbol')['last_equity'].shift(1).fillna(daily['first_equity'])
+        returns = pd.DataFrame({
+            'symbol': daily['symbol'],
+            'day': daily['day'],
+            'equity': daily['last_equity'],
+            'return': daily['last_equity'] / previous - 1,
+            'pnl': daily['pnl'],
+            'trades': daily['trades'],
+        })
+        if start is not None:
+            returns = returns[returns['day'] >= pd.Timestamp(start).normalize()]
+        if end is not None:
+            returns = returns[returns['day'] < pd.Timestamp(end)]
+        return returns.reset_index(drop=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Trade log analytics store')
+    parser.add_argument('command', choices=['ingest', 'report'])
+    parser.add_argument('logs', nargs='*', help='trade logs to ingest (default: the live log)')
+    parser.add_argument('--store', default=ANALYTICS_STORE_PATH)
+    parser.add_argument('--since', help='first day to report (inclusive)')
+    parser.add_argument('--until', help='last day to report (exclusive)')
+    parser.add_argument('--symbol')
+    args = parser.parse_args(argv)
+
+    store = AnalyticsStore(args.store)
+    if args.command == 'ingest':
+        for path in args.logs or [LOG_FILE_PATH]:
+            added = store.ingest(path)
+            print(f"✅ {path}: {added} new rows ({symbol_for(path)})")
+        return 0
+
+    window = dict(start=args.since, end=args.until, symbol=args.symbol)
+    print("\n💰 PnL by source")
+    print(store.pnl_by_source(**window).to_string(float_format=lambda value: f"{value:.2f}"))
+    slippage = store.slippage_distribution(**window)
+    if slippage:
+        print(f"\n🧾 Slippage over {slippage['fills']} fills: mean {slippage['mean']:.4f} | p50 {slippage['p50']:.4f} | "
+              f"p90 {slippage['p90']:.4f} | p99 {slippage['p99']:.4f} | max {slippage['max']:.4f} ({slippage['mean_bps']:.2f} bps)")
+    print("\n⏱ Latency (ms)")
+    print(store.latency_percentiles(**window).to_string(float_format=lambda value: f"{value:.3f}"))
+    returns = store.daily_returns(**window)
+    if not returns.empty:
+        print(f"\n📈 {len(returns)} days | mean daily return {returns['return'].mean():.4%} | "
+              f"best {returns['return'].max():.4%} | worst {returns['return'].min():.4%}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
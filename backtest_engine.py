@@ -0,0 +1,171 @@
+# Single-pass backtest engine
+# Indicators are computed once over the full series, then the RSI/FOMC
+# kernel from strategy_core (the same one the live loop calls) is run over
+# the whole array in one compiled pass.
+
+import pandas as pd
+import numpy as np
+from talib import RSI, MACD
+
+from risk_engine import RiskEngine
+from indicators import IndicatorSet
+from execution_sim import simulate_execution
+import strategy_core
+
+
+def _last_valid(values: np.ndarray) -> np.ndarray:
+    # Equivalent of series.dropna().iloc[-1] evaluated on every prefix
+    return pd.Series(values).ffill().to_numpy()
+
+
+def compute_indicators(df: pd.DataFrame, equity: float = 100_000, streaming: bool = False) -> dict:
+    close = df['close'].to_numpy(dtype=np.float64)
+    risk_engine = RiskEngine(equity)
+
+    # === Strategy Indicators ===
+    if streaming:
+        # Same kernels the live loop uses, one bar at a time
+        values = IndicatorSet.batch(close)
+        rsi_line, macd_line, macd_signal = values['rsi'], values['macd'], values['macd_signal']
+    else:
+        rsi_line = RSI(close, timeperiod=14)
+        macd_line, macd_signal, _ = MACD(close)
+    rsi = _last_valid(rsi_line)
+    macd_val = _last_valid(macd_line)
+    macd_sig = _last_valid(macd_signal)
+
+    # === Volatility and ATR (causal: median over the live window's earlier bars) ===
+    risk_state = risk_engine.batch_state(close)
+
+    # === Dates ===
+    dates = df['date'].dt.date.to_numpy()
+    day_num = dates.astype('datetime64[D]').astype(np.int64)
+
+    # Bar range for the execution simulator's slippage model (MIDPOINT bars when missing)
+    high = df['high'].to_numpy(dtype=np.float64) if 'high' in df else close
+    low = df['low'].to_numpy(dtype=np.float64) if 'low' in df else close
+
+    return {
+        'close': close,
+        'high': high,
+        'low': low,
+        'dates': dates,
+        'day_num': day_num,
+        'rsi': rsi,
+        'macd_val': macd_val,
+        'macd_sig': macd_sig,
+        **risk_state,
+    }
+
+
+# === Strategy Parameters ===
+# Defined with the kernel so live and backtest share them
+DEFAULT_PARAMS = strategy_core.DEFAULT_PARAMS
+
+
+def position_sizes(ind: dict, sentiment, prob, equity: float = 100_000, risk_per_trade: float = 0.01,
+                   params: dict = None) -> tuple:
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    sizes = RiskEngine(equity).batch_size(
+        ind['close'], sentiment, prob,
+        risk_per_trade=risk_per_trade,
+        vol_switch=params['vol_switch'],
+        fomc_prob=params['fomc_prob'],
+        state=ind
+    )
+    return sizes['rsi_size'], sizes['fomc_size']
+
+
+def replay(ind: dict, sentiment, prob, fed_day, params: dict = None, start: int = 30, end: int = None,
+           size_rsi: np.ndarray = None, size_fomc: np.ndarray = None) -> dict:
+    # Runs the strategy kernel over bars [start, end) from a flat state.
+    # Log dates are calendar dates when ind has 'dates', day numbers otherwise.
+    # sentiment/prob/fed_day are either one FedWatch reading for every bar or
+    # arrays aligned to the bars (see fomc_events.FomcEventStore.align).
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    close = ind['close']
+    day_num = ind['day_num']
+    dates = ind.get('dates', day_num)
+    end = len(close) if end is None else end
+
+    fomc_dir, rsi_allowed = strategy_core.fomc_inputs(sentiment, prob, fed_day, day_num, params)
+    n = len(close)
+    actions, partials, directions, sources, entry_prices = strategy_core.run(
+        close, ind['rsi'], ind['macd_val'], ind['macd_sig'], day_num,
+        np.broadcast_to(fomc_dir, n), np.broadcast_to(rsi_allowed, n),
+        strategy_core.param_array(params), start, end
+    )
+
+    trade_log = []
+    pnl_log = []
+    sizes = []
+
+    # === Events (only the bars where something happened) ===
+    for k in np.flatnonzero(actions):
+        i = start + k
+        action = actions[k]
+        now = dates[i]
+        price = close[i]
+        direction = strategy_core.POSITIONS[directions[k]]
+
+        if action in (strategy_core.BUY, strategy_core.SELL):
+            trade_log.append({'date': now, 'price': price, 'type': 'entry', 'direction': direction, 'bar': i})
+            if size_rsi is not None:
+                source = strategy_core.SOURCES[sources[k]]
+                size = size_rsi[i] if source == 'RSI' else size_fomc[i]
+                sizes.append({'date': now, 'source': source, 'size': size, 'bar': i})
+        elif action in (strategy_core.PARTIAL_SELL, strategy_core.PARTIAL_COVER):
+            trade_log.append({'date': now, 'price': price, 'type': 'partial', 'direction': direction, 'bar': i})
+        else:
+            if partials[k]:
+                # Partial target and exit on the same bar: the partial fills first
+                trade_log.append({'date': now, 'price': price, 'type': 'partial', 'direction': direction, 'bar': i})
+            entry_price = entry_prices[k]
+            pnl = price - entry_price if direction == 'long' else entry_price - price
+            pnl_log.append({'date': now, 'pnl': pnl, 'direction': direction})
+            trade_log.append({'date': now, 'price': price, 'type': 'exit', 'direction': direction, 'bar': i})
+
+    return {'trade_log': trade_log, 'pnl_log': pnl_log, 'sizes': sizes}
+
+
+def run_backtest(df: pd.DataFrame, sentiment, prob, fed_date, equity: float = 100_000, warmup: int = 30,
+                 streaming: bool = False, params: dict = None, costs: dict = None) -> dict:
+    # fed_date: a date, or per-bar day numbers from FomcEventStore.align
+    ind = compute_indicators(df, equity, streaming=streaming)
+    size_rsi, size_fomc = position_sizes(ind, sentiment, prob, equity, params=params)
+    fed_day = fed_day_numbers(fed_date)
+    result = replay(ind, sentiment, prob, fed_day, params, start=warmup, size_rsi=size_rsi, size_fomc=size_fomc)
+    # Sized fills with spread, slippage and commissions, and the bar-level equity curve
+    result['execution'] = simulate_execution(ind, result['trade_log'], result['sizes'], equity, costs, start=warmup)
+    return result
+
+
+def fed_day_numbers(fed_date):
+    # Day number(s) of the FOMC meeting; integer arrays are taken as already converted
+    fed_date = np.asarray(fed_date)
+    if np.issubdtype(fed_date.dtype, np.integer):
+        return fed_date.astype(np.int64)
+    return fed_date.astype('datetime64[D]').astype(np.int64)
+
+
+def trade_metrics(pnl: np.ndarray) -> dict:
+    # NumPy version of performance_summary for sweeps
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if len(pnl) == 0:
+        return {'total_pnl': 0.0, 'sharpe': 0.0, 'max_dd': 0.0, 'trades': 0}
+    std = pnl.std(ddof=1) if len(pnl) > 1 else np.nan
+    sharpe = pnl.mean() / std * np.sqrt(252) if std else 0.0
+    cumulative = np.cumsum(pnl)
+    max_dd = (np.maximum.accumulate(cumulative) - cumulative).max()
+    return {'total_pnl': pnl.sum(), 'sharpe': sharpe, 'max_dd': max_dd, 'trades': len(pnl)}
+
+
+def performance_summary(pnl_log: list) -> dict:
+    pnl_df = pd.DataFrame(pnl_log)
+    if pnl_df.empty:
+        return {'pnl_df': pnl_df, 'total_pnl': 0.0, 'sharpe': 0.0, 'max_dd': 0.0}
+
+    pnl_df['cumulative'] = pnl_df['pnl'].cumsum()
+    sharpe = pnl_df['pnl'].mean() / pnl_df['pnl'].std() * np.sqrt(252) if pnl_df['pnl'].std() else 0
+    max_dd = (pnl_df['cumulative'].cummax() - pnl_df['cumulative']).max()
+    return {'pnl_df': pnl_df, 'total_pnl': pnl_df['pnl'].sum(), 'sharpe': sharpe, 'max_dd': max_dd}
@@ -0,0 +1,242 @@
+# Local bar store with incremental gap-fill
+# Bars are kept per contract/barSize/whatToShow as yearly NumPy partitions
+# (structured arrays, memory-mapped on read). Each key also records how far
+# back its requests have reached, so only the missing tail (and, for a longer
+# duration than before, the missing head) is requested from IBKR; repeat
+# backtests can run with no network calls.
+
+import os
+import json
+import math
+import datetime
+import numpy as np
+import pandas as pd
+from ib_insync import util
+from settings_loader import BAR_CACHE_DIR
+
+BAR_DTYPE = np.dtype([
+    ('date', 'i8'),  # UTC epoch seconds
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+])
+
+_UNIT_SECONDS = {
+    'sec': 1, 'secs': 1,
+    'min': 60, 'mins': 60,
+    'hour': 3600, 'hours': 3600,
+    'day': 86400, 'days': 86400,
+    'week': 604800, 'weeks': 604800,
+    'month': 2592000, 'months': 2592000,
+}
+
+_DURATION_SECONDS = {'S': 1, 'D': 86400, 'W': 604800, 'M': 2592000, 'Y': 31536000}
+
+
+def bar_size_seconds(bar_size: str) -> int:
+    count, unit = bar_size.split()
+    return int(count) * _UNIT_SECONDS[unit]
+
+
+def duration_seconds(duration: str) -> int:
+    count, unit = duration.split()
+    return int(count) * _DURATION_SECONDS[unit]
+
+
+def duration_for_gap(seconds: float) -> str:
+    # Smallest IBKR durationStr covering the gap
+    if seconds <= 86400:
+        return f"{max(int(math.ceil(seconds)), 60)} S"
+    days = int(math.ceil(seconds / 86400))
+    if days <= 365:
+        return f"{days} D"
+    return f"{int(math.ceil(days / 365))} Y"
+
+
+def _epoch(ts) -> int:
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    return ts.value // 10**9
+
+
+def bars_to_array(df: pd.DataFrame) -> np.ndarray:
+    dates = pd.to_datetime(df['date'], utc=True)
+    out = np.empty(len(df), dtype=BAR_DTYPE)
+    out['date'] = ((dates - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)).to_numpy()
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        out[col] = df[col].to_numpy(dtype=np.float64) if col in df else np.nan
+    return out
+
+
+def array_to_df(arr: np.ndarray) -> pd.DataFrame:
+    df = pd.DataFrame({col: arr[col] for col in BAR_DTYPE.names})
+    df['date'] = pd.to_datetime(df['date'], unit='s', utc=True)
+    return df
+
+
+class BarCache:
+    def __init__(self, root: str = BAR_CACHE_DIR):
+        self.root = root
+
+    def key(self, contract, bar_size: str, what_to_show: str) -> str:
+        parts = [contract.symbol, contract.secType, contract.exchange, contract.currency, bar_size, what_to_show]
+        return '_'.join(str(p).replace(' ', '') for p in parts)
+
+    def _dir(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def _partitions(self, key: str) -> list:
+        path = self._dir(key)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.npy'))
+
+    def load_array(self, contract, bar_size: str, what_to_show: str = 'MIDPOINT', start=None, end=None) -> np.ndarray:
+        key = self.key(contract, bar_size, what_to_show)
+        start_year = pd.Timestamp(start).year if start is not None else None
+        end_year = pd.Timestamp(end).year if end is not None else None
+
+        chunks = []
+        for path in self._partitions(key):
+            year = int(os.path.basename(path)[:-4])
+            if (start_year and year < start_year) or (end_year and year > end_year):
+                continue
+            chunks.append(np.load(path, mmap_mode='r'))
+        if not chunks:
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        arr = np.concatenate(chunks)
+        if start is not None:
+            arr = arr[arr['date'] >= _epoch(start)]
+        if end is not None:
+            arr = arr[arr['date'] <= _epoch(end)]
+        return arr
+
+    def load(self, contract, bar_size: str, what_to_show: str = 'MIDPOINT', start=None, end=None) -> pd.DataFrame:
+        return array_to_df(self.load_array(contract, bar_size, what_to_show, start, end))
+
+    def last_timestamp(self, contract, bar_size: str, what_to_show: str = 'MIDPOINT'):
+        partitions = self._partitions(self.key(contract, bar_size, what_to_show))
+        if not partitions:
+            return None
+        last = np.load(partitions[-1], mmap_mode='r')
+        return int(last['date'][-1]) if len(last) else None
+
+    def covered_start(self, contract, bar_size: str, what_to_show: str = 'MIDPOINT'):
+        # Earliest time the requests for this key have covered (epoch seconds)
+        key = self.key(contract, bar_size, what_to_show)
+        path = os.path.join(self._dir(key), 'coverage.json')
+        if os.path.isfile(path):
+            with open(path) as f:
+                return json.load(f)['start']
+        # Caches written before coverage was recorded: the first cached bar
+        partitions = self._partitions(key)
+        if not partitions:
+            return None
+        first = np.load(partitions[0], mmap_mode='r')
+        return int(first['date'][0]) if len(first) else None
+
+    def _record_coverage(self, contract, bar_size: str, what_to_show: str, start: float):
+        current = self.covered_start(contract, bar_size, what_to_show)
+        if current is not None and current <= start:
+            return
+        directory = self._dir(self.key(contract, bar_size, what_to_show))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, 'coverage.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'start': int(start)}, f)
+        os.replace(path + '.tmp', path)
+
+    def store(self, contract, bar_size: str, what_to_show: str, df: pd.DataFrame):
+        if df is None or df.empty:
+            return
+        key = self.key(contract, bar_size, what_to_show)
+        os.makedirs(self._dir(key), exist_ok=True)
+
+        new = bars_to_array(df)
+        years = pd.to_datetime(new['date'], unit='s', utc=True).year.to_numpy()
+        for year in np.unique(years):
+            path = os.path.join(self._dir(key), f"{year}.npy")
+            chunk = new[years == year]
+            if os.path.exists(path):
+                old = np.load(path)
+                # Fetched bars replace cached bars with the same timestamp
+                old = old[~np.isin(old['date'], chunk['date'])]
+                chunk = np.concatenate([old, chunk])
+            chunk = chunk[np.argsort(chunk['date'], kind='stable')]
+
+            # Write to a temp file and swap it in so readers never see a torn partition
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, chunk)
+            os.replace(tmp_path, path)
+
+    def _requests(self, contract, bar_size: str, what_to_show: str, duration: str, refresh_tail: bool) -> list:
+        # (endDateTime, durationStr, covered start) requests needed to cover `duration`
+        # back from now: the missing head, if the cache does not reach back that far,
+        # and the missing tail. endDateTime '' means now.
+        now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+        wanted_start = now - duration_seconds(duration)
+        last = self.last_timestamp(contract, bar_size, what_to_show)
+        if last is None:
+            return [('', duration, wanted_start)]
+
+        requests = []
+        covered = self.covered_start(contract, bar_size, what_to_show)
+        if covered is not None and covered > wanted_start:
+            head = duration_for_gap(covered - wanted_start)
+            end = datetime.datetime.fromtimestamp(covered, datetime.timezone.utc)
+            requests.append((end, head, covered - duration_seconds(head)))
+        if now - last >= bar_size_seconds(bar_size) or refresh_tail:
+            # Re-request from the last cached bar, which may have been incomplete
+            requests.append(('', duration_for_gap(now - last + bar_size_seconds(bar_size)), None))
+        return requests
+
+    def _store_request(self, contract, bar_size: str, what_to_show: str, bars, covered_start):
+        if bars:
+            self.store(contract, bar_size, what_to_show, util.df(bars))
+        if covered_start is not None:
+            self._record_coverage(contract, bar_size, what_to_show, covered_start)
+
+    def _window(self, contract, bar_size: str, what_to_show: str, duration: str, as_array: bool = False):
+        start = pd.Timestamp.now(tz='UTC') - pd.Timedelta(seconds=duration_seconds(duration))
+        arr = self.load_array(contract, bar_size, what_to_show, start=start)
+        return arr if as_array else array_to_df(arr)
+
+    def fetch(self, ib, contract, bar_size: str, what_to_show: str = 'MIDPOINT', duration: str = '2 Y',
+              use_rth: bool = False, refresh_tail: bool = False, as_array: bool = False):
+        # refresh_tail re-requests the latest (possibly still forming) bar even
+        # when the cache is current, which the live loop needs for fresh prices.
+        # as_array returns the BAR_DTYPE array instead of building a DataFrame.
+        for end, request_duration, covered_start in self._requests(contract, bar_size, what_to_show, duration, refresh_tail):
+            bars = ib.reqHistoricalData(
+                contract,
+                endDateTime=end,
+                durationStr=request_duration,
+                barSizeSetting=bar_size,
+                whatToShow=what_to_show,
+                useRTH=use_rth,
+                formatDate=2
+            )
+            self._store_request(contract, bar_size, what_to_show, bars, covered_start)
+
+        return self._window(contract, bar_size, what_to_show, duration, as_array)
+
+    async def fetch_async(self, ib, contract, bar_size: str, what_to_show: str = 'MIDPOINT', duration: str = '2 Y',
+                          use_rth: bool = False, refresh_tail: bool = False, as_array: bool = False):
+        for end, request_duration, covered_start in self._requests(contract, bar_size, what_to_show, duration, refresh_tail):
+            bars = await ib.reqHistoricalDataAsync(
+                contract,
+                endDateTime=end,
+                durationStr=request_duration,
+                barSizeSetting=bar_size,
+                whatToShow=what_to_show,
+                useRTH=use_rth,
+                formatDate=2
+            )
+            self._store_request(contract, bar_size, what_to_show, bars, covered_start)
+
+        return self._window(contract, bar_size, what_to_show, duration, as_array)
@@ -0,0 +1,100 @@
+# Fixed-capacity bar buffer for the live loop
+# OHLCV columns live in preallocated float64 arrays and timestamps (UTC epoch
+# seconds) in an int64 array, so a session's memory stays the same however
+# long it runs. Every bar is written twice, at slot i and i + capacity; the
+# newest `capacity` bars are then always one contiguous slice, and columns
+# come back as read-only views instead of copies or DataFrames.
+#
+#   ring['close']   float64 view, oldest to newest
+#   ring['date']    datetime64[s] view (UTC)
+
+import numpy as np
+import pandas as pd
+from bar_cache import BAR_DTYPE, bars_to_array, bar_size_seconds, duration_seconds, _epoch
+from settings_loader import DURATION, BAR_SIZE, STREAM_BUFFER_BARS
+
+COLUMNS = BAR_DTYPE.names  # date, open, high, low, close, volume
+
+
+def window_capacity(duration: str = DURATION, bar_size: str = BAR_SIZE, min_bars: int = STREAM_BUFFER_BARS) -> int:
+    # At least one history request's worth of bars, so the ring holds what the
+    # DataFrame used to, and never less than the streaming buffer
+    return max(duration_seconds(duration) // bar_size_seconds(bar_size) + 1, min_bars)
+
+
+class BarRing:
+    def __init__(self, capacity: int = None):
+        self.capacity = capacity if capacity is not None else window_capacity()
+        self._data = {col: np.zeros(2 * self.capacity, dtype=BAR_DTYPE[col]) for col in COLUMNS}
+        self.count = 0  # bars ever appended
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self._data.values())
+
+    # === Writes ===
+    def _write(self, slots: np.ndarray, rows: np.ndarray):
+        for col in COLUMNS:
+            self._data[col][slots] = rows[col]
+            self._data[col][slots + self.capacity] = rows[col]
+
+    def append_array(self, rows: np.ndarray):
+        # rows: BAR_DTYPE array sorted by date. A row with the newest timestamp
+        # revises that bar in place; rows older than it are ignored.
+        if len(self) and len(rows):
+            rows = rows[np.searchsorted(rows['date'], self._data['date'][(self.count - 1) % self.capacity]):]
+            if len(rows) and rows['date'][0] == self._data['date'][(self.count - 1) % self.capacity]:
+                self._write(np.array([(self.count - 1) % self.capacity]), rows[:1])
+                rows = rows[1:]
+        if not len(rows):
+            return
+        rows = rows[-self.capacity:]
+        self._write((self.count + np.arange(len(rows))) % self.capacity, rows)
+        self.count += len(rows)
+
+    def append(self, bar):
+        # One ib_insync BarData (or anything with date/open/high/low/close/volume)
+        row = np.empty(1, dtype=BAR_DTYPE)
+        row['date'] = _epoch(bar.date)
+        for col in COLUMNS[1:]:
+            row[col] = getattr(bar, col, np.nan)
+        self.append_array(row)
+
+    def extend(self, bars):
+        for bar in bars:
+            self.append(bar)
+
+    def update(self, bars):
+        # Merges a fetched window (BarCache array or DataFrame); only its tail is copied
+        self.append_array(bars if isinstance(bars, np.ndarray) else bars_to_array(bars))
+        return self
+
+    # === Zero-copy Reads ===
+    def column(self, col: str) -> np.ndarray:
+        n = len(self)
+        start = (self.count - n) % self.capacity
+        view = self._data[col][start:start + n]
+        view.flags.writeable = False
+        return view
+
+    def __getitem__(self, col: str) -> np.ndarray:
+        if col == 'date':
+            return self.column('date').view('datetime64[s]')
+        return self.column(col)
+
+    @property
+    def last_close(self) -> float:
+        return float(self._data['close'][(self.count - 1) % self.capacity])
+
+    @property
+    def last_date(self) -> pd.Timestamp:
+        return pd.Timestamp(int(self._data['date'][(self.count - 1) % self.capacity]), unit='s', tz='UTC')
+
+    def to_df(self) -> pd.DataFrame:
+        # Copy for plotting and debugging; the live loop reads the views
+        df = pd.DataFrame({col: np.array(self.column(col)) for col in COLUMNS})
+        df['date'] = pd.to_datetime(df['date'], unit='s', utc=True)
+        return df
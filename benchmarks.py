@@ -0,0 +1,248 @@
+# Benchmarks for the hot paths
+# Times the strategy decision, risk sizing, trade logging and the full
+# backtest on synthetic OHLC series of increasing length, writes the results
+# as JSON and compares them with a stored baseline. A timing more than
+# `tolerance` slower than the baseline is reported as a regression and makes
+# the run exit non-zero, so it can gate a deploy:
+#
+#   python benchmarks.py                        run and compare with the baseline
+#   python benchmarks.py --save-baseline        run and store the results as the baseline
+#   python benchmarks.py --sizes 1000,10000     only these series lengths
+#
+# Timings are best-of-repeats wall time; per-call paths also report the cost
+# of a single call. Baselines are only comparable on the same machine.
+
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import platform
+import datetime
+import numpy as np
+import pandas as pd
+
+import strategy_core
+from bar_ring import BarRing
+from indicators import IndicatorSet
+from risk_engine import RiskEngine
+from live_strats import combined_rsi_fomc_logic
+from log_utils import log_to_csv, close_logger
+from backtest_engine import compute_indicators, position_sizes, replay, run_backtest
+from settings_loader import BENCH_SIZES, BENCH_BASELINE_PATH, BENCH_RESULTS_PATH, BENCH_TOLERANCE
+
+LOG_ROWS = 10_000  # rows logged per run; cost per row does not depend on history length
+CALLS = 200  # calls per run for the per-call paths
+
+
+# === Synthetic Data ===
+def synthetic_ohlc(bars: int, seed: int = 0, freq: str = '15min', start: str = '2000-01-01') -> pd.DataFrame:
+    # Geometric random walk with a high/low range around each close
+    rng = np.random.default_rng(seed)
+    close = 2000 * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    spread = np.abs(rng.normal(0, 0.001, bars)) * close
+    return pd.DataFrame({
+        'date': pd.date_range(start, periods=bars, freq=freq),
+        'open': np.concatenate([[close[0]], close[:-1]]),
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+    })
+
+
+def synthetic_fomc(dates: pd.Series, every_days: int = 42, prob: float = 75.0) -> tuple:
+    # Meetings every `every_days`, cycling through HIKE/CUT/STAY, as
+    # (sentiment, prob, fed_day) arrays in the shape backtest_inputs returns
+    day_num = dates.dt.date.to_numpy().astype('datetime64[D]').astype(np.int64)
+    meeting = (day_num // every_days + 1) * every_days
+    sentiment = np.array(['HIKE', 'CUT', 'STAY'], dtype=object)[(meeting // every_days) % 3]
+    return sentiment, np.full(len(day_num), prob), meeting
+
+
+# === Timing ===
+def measure(func, repeats: int, ops: int = 1) -> dict:
+    # Garbage collection is paused while timing, as timeit does
+    times = []
+    for _ in range(repeats):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            func()
+            times.append(time.perf_counter_ns() - start)
+        finally:
+            gc.enable()
+    times = np.asarray(times) / 1e6
+    return {
+        'best_ms': float(times.min()),
+        'median_ms': float(np.median(times)),
+        'per_op_us': float(times.min() * 1000 / ops),
+        'ops': ops,
+        'repeats': repeats,
+    }
+
+
+def bench_size(bars: int, repeats: int, log_dir: str) -> dict:
+    df = synthetic_ohlc(bars)
+    sentiment, prob, fed_day = synthetic_fomc(df['date'])
+    results = {}
+    # The 1M series takes seconds per backtest; fewer repeats keep the run short
+    heavy_repeats = max(1, repeats // 3) if bars >= 1_000_000 else repeats
+
+    # The live loop reads bars from a BarRing holding the whole series
+    ring = BarRing(bars).update(df)
+
+    # === Strategy decision (live path: indicators already streamed) ===
+    indicators = IndicatorSet()
+    indicators.update_bars(ring)
+    fed_date = np.datetime64(int(fed_day[-1]), 'D').astype(datetime.date)
+
+    def strategy():
+        for _ in range(CALLS):
+            state = {'position': None, 'entry_price': None, 'entry_date': None, 'source': None, 'partial_exit_done': False}
+            combined_rsi_fomc_logic(ring, sentiment[-1], prob[-1], fed_date, state, 10.0, 5.0, indicators=indicators)
+    strategy()  # compiles the kernel
+    results['strategy'] = measure(strategy, repeats, CALLS)
+
+    # Without streaming indicators the decision recomputes RSI/MACD over the window
+    def strategy_cold():
+        state = {'position': None, 'entry_price': None, 'entry_date': None, 'source': None, 'partial_exit_done': False}
+        combined_rsi_fomc_logic(ring, sentiment[-1], prob[-1], fed_date, state, 10.0, 5.0)
+    results['strategy_cold'] = measure(strategy_cold, repeats)
+
+    # === Risk sizing ===
+    def risk_cold():
+        RiskEngine(100_000).compute_dynamic_size(ring, sentiment[-1], prob[-1])
+    results['risk_cold'] = measure(risk_cold, heavy_repeats)
+
+    engine = RiskEngine(100_000)
+    engine.compute_dynamic_size(ring, sentiment[-1], prob[-1])
+
+    def risk():
+        for _ in range(CALLS):
+            engine.compute_dynamic_size(ring, sentiment[-1], prob[-1])
+    results['risk'] = measure(risk, repeats, CALLS)
+
+    # === Trade logging (buffered rows plus the final flush) ===
+    rows = min(bars, LOG_ROWS)
+    closes = df['close'].to_numpy()
+
+    def log():
+        path = os.path.join(log_dir, f"bench_{bars}.csv")
+        if os.path.exists(path):
+            os.remove(path)
+        for i in range(rows):
+            log_to_csv(
+                timestamp=datetime.datetime.now().isoformat(), signal='HOLD', source=None, price=closes[i],
+                position=None, entry_price=None, entry_date=None, rsi_size=10.0, fomc_size=5.0,
+                sentiment=sentiment[i], probability=prob[i], fed_date=fed_date, equity=100_000, live_equity=100_000,
+                drawdown=0.0, latency_ms=1.0, short_vol=0.1, long_vol=0.1, executed_size=0, order_status='None',
+                filled=0, remaining=0, pnl=0, slippage=0, trade_type='hold', direction=None, exit_price=None,
+                volatility_10d=0.1, rsi_14=50.0, filepath=path
+            )
+        close_logger(path)
+    results['log_to_csv'] = measure(log, repeats, rows)
+
+    # === Backtest ===
+    ind = compute_indicators(df)
+    size_rsi, size_fomc = position_sizes(ind, sentiment, prob)
+    replay(ind, sentiment, prob, fed_day, start=30, size_rsi=size_rsi, size_fomc=size_fomc)
+
+    results['indicators'] = measure(lambda: compute_indicators(df), heavy_repeats)
+    results['replay'] = measure(
+        lambda: replay(ind, sentiment, prob, fed_day, start=30, size_rsi=size_rsi, size_fomc=size_fomc), heavy_repeats
+    )
+    results['backtest'] = measure(lambda: run_backtest(df, sentiment, prob, fed_day), heavy_repeats)
+    return results
+
+
+def environment() -> dict:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'numba': strategy_core.NUMBA_ENABLED,
+        'machine': platform.machine(),
+        'processor': platform.processor() or platform.node(),
+    }
+
+
+def run(sizes, repeats: int = 5) -> dict:
+    log_dir = tempfile.mkdtemp(prefix='bench_logs_')
+    results = {}
+    try:
+        for bars in sizes:
+            print(f"⏱ Benchmarking {bars:,} bars...")
+            for name, timing in bench_size(bars, repeats, log_dir).items():
+                results[f"{name}@{bars}"] = timing
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+    return {'created': datetime.datetime.now().isoformat(), 'environment': environment(), 'results': results}
+
+
+# === Baseline Comparison ===
+def compare(current: dict, baseline: dict, tolerance: float = BENCH_TOLERANCE) -> list:
+    # Rows of (name, baseline ms, current ms, ratio, regressed); best-of-repeats is compared
+    rows = []
+    for name, timing in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            rows.append((name, None, timing['best_ms'], None, False))
+            continue
+        ratio = timing['best_ms'] / base['best_ms'] if base['best_ms'] else np.inf
+        rows.append((name, base['best_ms'], timing['best_ms'], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def print_report(rows: list, tolerance: float):
+    print(f"{'benchmark':<24}{'baseline ms':>14}{'current ms':>14}{'ratio':>8}")
+    for name, base, now, ratio, regressed in rows:
+        base_text = f"{base:.3f}" if base is not None else '-'
+        ratio_text = f"{ratio:.2f}" if ratio is not None else 'new'
+        flag = '  ❌ regression' if regressed else ''
+        print(f"{name:<24}{base_text:>14}{now:>14.3f}{ratio_text:>8}{flag}")
+    regressions = sum(row[4] for row in rows)
+    if regressions:
+        print(f"❌ {regressions} benchmark(s) more than {tolerance:.0%} slower than the baseline")
+    else:
+        print(f"✅ No benchmark more than {tolerance:.0%} slower than the baseline")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the strategy, risk, logging and backtest hot paths')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in BENCH_SIZES), help='comma-separated bar counts')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--baseline', default=BENCH_BASELINE_PATH)
+    parser.add_argument('--output', default=BENCH_RESULTS_PATH)
+    parser.add_argument('--tolerance', type=float, default=BENCH_TOLERANCE)
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    args = parser.parse_args(argv)
+
+    current = run([int(size) for size in args.sizes.split(',')], args.repeats)
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"✅ Results written to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"✅ Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.isfile(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != current['environment']:
+        print(f"⚠️ Baseline was recorded on a different setup: {baseline.get('environment')}")
+
+    rows = compare(current, baseline, args.tolerance)
+    print_report(rows, args.tolerance)
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,32 +3,45 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import streamlit as st
-import pandas as pd 
+import pandas as pd
 import numpy as np
-from live_trading.settings_loader import LOG_FILE_PATH, REFRESH_SECONDS
+from live_trading.settings_loader import LOG_FILE_PATH, REFRESH_SECONDS, ANALYTICS_STORE_PATH
+from live_trading.log_tail import LogTail, read_latency_summary
 
-# Load CSV file into dashboard
-df = pd.read_csv(LOG_FILE_PATH, parse_dates=['timestamp'])
+PAGE_SIZE = 200
+
+
+# Reader survives Streamlit reruns, so each refresh only parses appended rows
+@st.cache_resource
+def get_log_tail(path):
+    return LogTail(path)
+
+
+tail = get_log_tail(LOG_FILE_PATH)
+tail.refresh()
+
+if len(tail) == 0:
+    st.warning("No trades logged yet.")
+    st.stop()
 
 # Sidebar settings
 st.sidebar.title("Strategy Dashboard")
 st.sidebar.write("Gold XAU/USD Strategy (Live Trading)")
 
 # Update Check
-st.sidebar.write(f"Last Update: {df['timestamp'].iloc[-1]}")
+st.sidebar.write(f"Last Update: {tail.last_row['timestamp']}")
+st.sidebar.write(f"Rows: {len(tail)}")
 
 # Live Equity Line vs Backtest Equity Line
 st.title("Live Equity vs Inital Equity")
 
-df['cum_pnl'] = df['live_equity'] - df['equity'].iloc[0]
-
-st.line_chart(df.set_index('timestamp')[['live_equity', 'cum_pnl']], use_container_width=True)
+st.line_chart(tail.chart_frame(), use_container_width=True)
 st.write("### Live Equity vs Initial Equity")
 
 # Current Open Positions
 st.title("Current Open Positions")
 
-current_position = df.iloc[-1]
+current_position = tail.last_row
 
 col1, col2, col3 = st.columns(3)
 col1.metric("Position", current_position['position'])
@@ -40,25 +53,54 @@ col4.metric("RSI Size", f"{current_position['rsi_size']:.2f}")
 col5.metric("FOMC Size", f"{current_position['fomc_size']:.2f}")
 col6.metric("Sentiment", current_position['sentiment'])
 
-# Rolling 20-day Sharpe and Max DD
+# Rolling 20-bar Sharpe and Max DD (carried forward between refreshes)
 st.title("Rolling Metrics")
 
-returns = df['live_equity'].pct_change()
-
-# Rolling Sharpe Ratio
-rolling_sharpe = returns.rolling(window=20).mean() / returns.rolling(window=20).std()
-rolling_sharpe = rolling_sharpe.dropna()
-
-# Rolling Maximum Drawdown
-cum_returns = (1 + returns).cumprod()
-rolling_max = cum_returns.cummax()
-drawdown = cum_returns / rolling_max - 1
-max_drawdown = drawdown.min()
+rolling_sharpe = tail.metrics.rolling_sharpe
+max_drawdown = tail.metrics.max_drawdown
 
 col1, col2 = st.columns(2)
-col1.metric("Rolling 20-bar Sharpe Ratio", f"{rolling_sharpe.iloc[-1]:.2f}" if not rolling_sharpe.empty else "N/A")
+col1.metric("Rolling 20-bar Sharpe Ratio", f"{rolling_sharpe:.2f}" if rolling_sharpe is not None else "N/A")
 col2.metric("Max Drawdown", f"{max_drawdown:.2%}")
 
-# Trade Log History
+# Per-stage cycle latency (percentiles written by the live loop)
+latency = read_latency_summary(LOG_FILE_PATH)
+if latency and latency['stages']:
+    st.title("Cycle Latency")
+    stages = pd.DataFrame(latency['stages']).T
+    st.bar_chart(stages[['p50_ms', 'p99_ms']], use_container_width=True)
+    st.dataframe(stages.round(3))
+
+# Performance attribution from the analytics store (skipped without pyarrow)
+@st.cache_resource
+def get_analytics_store(root):
+    try:
+        from live_trading.analytics_store import AnalyticsStore
+        return AnalyticsStore(root)
+    except ImportError as e:
+        # Any other import failure is a bug and surfaces as the page's error
+        if e.name != 'pyarrow':
+            raise
+        return None
+
+
+store = get_analytics_store(ANALYTICS_STORE_PATH)
+if store is None:
+    st.info("Analytics panel needs pyarrow (pip install pyarrow).")
+else:
+    store.ingest(LOG_FILE_PATH)  # only rows appended since the last refresh
+    by_source = store.pnl_by_source()
+    if not by_source.empty:
+        st.title("PnL by Source")
+        st.dataframe(by_source.round(2))
+    daily_returns = store.daily_returns()
+    if not daily_returns.empty:
+        st.title("Daily Returns")
+        st.bar_chart(daily_returns.set_index('day')['return'], use_container_width=True)
+
+# Trade Log History (one page at a time, newest first)
 with st.expander("Full Trade Log"):
-    st.dataframe(df)
\ No newline at end of file
+    pages = max(1, int(np.ceil(len(tail) / PAGE_SIZE)))
+    page = st.number_input("Page (1 = newest)", min_value=1, max_value=pages, value=1)
+    stop = len(tail) - (page - 1) * PAGE_SIZE
+    st.dataframe(tail.read_rows(stop - PAGE_SIZE, stop).iloc[::-1])
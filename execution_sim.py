@@ -0,0 +1,127 @@
+# Execution simulator for backtests
+# Turns the replay's entry/partial/exit events into sized fills and a
+# bar-level equity curve. Fills happen at the bar close plus half the spread
+# and a slippage term proportional to the bar's high-low range, and pay
+# commission on notional. Only the (few) events are walked in Python; the
+# per-bar position, cash and equity series are built with NumPy.
+
+import numpy as np
+from settings_loader import (
+    EXEC_SPREAD_BPS, EXEC_SLIPPAGE_RANGE_FRAC, EXEC_COMMISSION_BPS, EXEC_MIN_COMMISSION, EXEC_PARTIAL_FRACTION
+)
+
+DEFAULT_COSTS = {
+    'spread_bps': EXEC_SPREAD_BPS,
+    'slippage_range_frac': EXEC_SLIPPAGE_RANGE_FRAC,
+    'commission_bps': EXEC_COMMISSION_BPS,
+    'min_commission': EXEC_MIN_COMMISSION,
+    'partial_fraction': EXEC_PARTIAL_FRACTION,
+}
+
+
+def bars_per_year(day_num: np.ndarray) -> float:
+    # Annualization from the data itself, so it holds for any bar size or session
+    span_days = max(int(day_num[-1] - day_num[0]) + 1, 1)
+    return len(day_num) / span_days * 365.25
+
+
+def equity_metrics(equity: np.ndarray, periods_per_year: float) -> dict:
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) < 2:
+        return {'total_return': 0.0, 'sharpe': 0.0, 'max_dd': 0.0, 'volatility': 0.0}
+    returns = np.diff(equity) / equity[:-1]
+    std = returns.std(ddof=1)
+    peak = np.maximum.accumulate(equity)
+    return {
+        'total_return': equity[-1] / equity[0] - 1,
+        'sharpe': returns.mean() / std * np.sqrt(periods_per_year) if std else 0.0,
+        'max_dd': float((1 - equity / peak).max()),
+        'volatility': std * np.sqrt(periods_per_year),
+    }
+
+
+def simulate_execution(ind: dict, trade_log: list, sizes: list, equity: float = 100_000, costs: dict = None,
+                       start: int = 0, end: int = None) -> dict:
+    # ind: compute_indicators output; trade_log/sizes: replay output (with 'bar')
+    costs = {**DEFAULT_COSTS, **(costs or {})}
+    close, high, low = ind['close'], ind.get('high', ind['close']), ind.get('low', ind['close'])
+    end = len(close) if end is None else end
+
+    entry_size = {s['bar']: np.floor(s['size']) if np.isfinite(s['size']) else 0.0 for s in sizes}
+    half_spread = costs['spread_bps'] / 2e4
+    slippage_frac = costs['slippage_range_frac']
+    commission_rate = costs['commission_bps'] / 1e4
+
+    # === Fills (one per event that changes the position) ===
+    fill_bar, fill_qty, fill_price, fill_fee = [], [], [], []
+    trades = []
+    position, avg_cost, realized = 0.0, 0.0, 0.0
+    for event in trade_log:
+        i = event['bar']
+        if event['type'] == 'entry':
+            units = entry_size.get(i, 0.0)
+            target = units if event['direction'] == 'long' else -units
+        elif event['type'] == 'partial':
+            target = position - np.sign(position) * np.floor(abs(position) * costs['partial_fraction'])
+        else:
+            target = 0.0
+        qty = target - position
+        if qty == 0:
+            continue
+
+        side = np.sign(qty)
+        price = close[i] * (1 + side * half_spread) + side * slippage_frac * (high[i] - low[i])
+        fee = max(costs['min_commission'], abs(qty) * price * commission_rate)
+
+        # Realize PnL on the part of the fill that reduces the open position
+        closing = min(abs(qty), abs(position)) if np.sign(position) == -side else 0.0
+        if closing:
+            realized += closing * (price - avg_cost) * np.sign(position)
+        realized -= fee
+        if closing and closing == abs(position):
+            # Round trip complete (an exit, or a reversal into the other side)
+            trades.append({'date': event['date'], 'bar': i, 'pnl': realized, 'direction': 'long' if position > 0 else 'short'})
+            realized = 0.0
+
+        remaining = position + qty
+        if np.sign(remaining) != np.sign(position) and remaining != 0:
+            avg_cost = price  # opened or flipped
+        elif abs(remaining) > abs(position):
+            avg_cost = (avg_cost * abs(position) + price * abs(qty)) / abs(remaining)
+        position = remaining
+        fill_bar.append(i)
+        fill_qty.append(qty)
+        fill_price.append(price)
+        fill_fee.append(fee)
+
+    fill_bar = np.asarray(fill_bar, dtype=np.int64)
+    fill_qty = np.asarray(fill_qty, dtype=np.float64)
+    fill_price = np.asarray(fill_price, dtype=np.float64)
+    fill_fee = np.asarray(fill_fee, dtype=np.float64)
+
+    # === Bar-level series ===
+    n = len(close)
+    delta = np.zeros(n)
+    cash_flow = np.zeros(n)
+    np.add.at(delta, fill_bar, fill_qty)
+    np.add.at(cash_flow, fill_bar, -fill_qty * fill_price - fill_fee)
+    position_series = np.cumsum(delta)
+    equity_curve = equity + np.cumsum(cash_flow) + position_series * close
+    window = slice(start, end)
+
+    periods = bars_per_year(ind['day_num'][window]) if end - start > 1 else 1.0
+    notional = np.abs(fill_qty) * fill_price
+    return {
+        'position': position_series[window],
+        'equity': equity_curve[window],
+        'fills': {'bar': fill_bar, 'qty': fill_qty, 'price': fill_price, 'fee': fill_fee},
+        'trades': trades,
+        'metrics': {
+            **equity_metrics(equity_curve[window], periods),
+            'trades': len(trades),
+            'commission': fill_fee.sum(),
+            'slippage_cost': (np.abs(fill_qty) * np.abs(fill_price - close[fill_bar])).sum(),
+            'turnover': notional.sum(),
+            'exposure': float((position_series[window] != 0).mean()) if end > start else 0.0,
+        },
+    }
@@ -0,0 +1,260 @@
+# Offline stand-in for ib_insync.IB
+# Serves historical bars from a DataFrame, fills market orders at the last
+# close and pushes new bars to keepUpToDate subscriptions, so the live and
+# streaming code paths can be exercised without TWS. Quote ticks pushed to
+# reqMktData subscribers move the fill price until the next bar. Orders are
+# acknowledged and filled asynchronously with the same Trade events IBKR emits.
+# NetLiquidation is the starting equity plus the PnL of the fills, marked to
+# the latest price. Bar dates follow formatDate like IBKR: 2 is UTC, 1 is
+# naive local time in the TWS time zone (tws_tz).
+
+import asyncio
+import datetime
+import dataclasses
+import pandas as pd
+from ib_insync import (
+    AccountValue, BarData, BarDataList, CommissionReport, Execution, Fill,
+    OrderStatus, Position, Ticker, Trade, TradeLogEntry, util
+)
+
+
+def _to_bar(row) -> BarData:
+    return BarData(
+        date=row['date'],
+        open=float(row.get('open', row['close'])),
+        high=float(row.get('high', row['close'])),
+        low=float(row.get('low', row['close'])),
+        close=float(row['close']),
+        volume=float(row.get('volume', 0)),
+        average=float(row.get('average', row['close'])),
+        barCount=int(row.get('barCount', 0))
+    )
+
+
+class FakeIB:
+    def __init__(self, bars_df: pd.DataFrame, history: int = 120, equity: float = 100_000, account: str = 'DU0000000',
+                 fill_delay: float = 0.0, slippage: float = 0.0, fill_slices: int = 1, tws_tz: str = 'America/New_York'):
+        self.all_bars = [_to_bar(row) for row in bars_df.to_dict('records')]
+        self.tws_tz = tws_tz
+        self.cursor = min(history, len(self.all_bars))
+        self.equity = equity
+        self.account = account
+        self.connected = False
+        self.orders = []
+        self.pending = []
+        self.subscriptions = []
+        self.tickers = []
+        self.last_price = None  # last pushed tick; None fills at the bar close
+        self._next_order_id = 1
+        self._next_exec_id = 1
+
+        # Order simulation: seconds until fill (with a running loop), adverse
+        # price move as a fraction of the close, and fills per order
+        self.fill_delay = fill_delay
+        self.slippage = slippage
+        self.fill_slices = max(1, fill_slices)
+
+    # === Connection ===
+    def connect(self, host='127.0.0.1', port=7497, clientId=1, **kwargs):
+        self.connected = True
+        return self
+
+    async def connectAsync(self, host='127.0.0.1', port=7497, clientId=1, **kwargs):
+        return self.connect(host, port, clientId)
+
+    def disconnect(self):
+        self.connected = False
+
+    def isConnected(self) -> bool:
+        return self.connected
+
+    def qualifyContracts(self, *contracts):
+        return list(contracts)
+
+    async def qualifyContractsAsync(self, *contracts):
+        return self.qualifyContracts(*contracts)
+
+    # === Event Loop ===
+    def sleep(self, secs: float = 0.02):
+        # Like IB.sleep, gives pending order events a chance to arrive
+        for trade in list(self.pending):
+            self._fill(trade)
+        return True
+
+    def run(self, *awaitables):
+        return util.run(*awaitables)
+
+    # === Account ===
+    def net_liquidation(self) -> float:
+        mark = self.last_price if self.last_price is not None else self.last_bar.close
+        value = self.equity
+        for trade in self.orders:
+            for fill in trade.fills:
+                side = 1 if fill.execution.side == 'BOT' else -1
+                value += side * (mark - fill.execution.price) * fill.execution.shares
+        return value
+
+    def accountSummary(self, account: str = ''):
+        return [AccountValue(account=self.account, tag='NetLiquidation', value=str(self.net_liquidation()), currency='USD', modelCode='')]
+
+    async def accountSummaryAsync(self, account: str = ''):
+        return self.accountSummary(account)
+
+    def positions(self, account: str = ''):
+        holdings = {}
+        for trade in self.orders:
+            status = trade.orderStatus
+            qty = status.filled if trade.order.action == 'BUY' else -status.filled
+            holdings.setdefault(trade.contract.symbol, [trade.contract, 0.0])[1] += qty
+        return [Position(self.account, contract, qty, 0.0) for contract, qty in holdings.values() if qty]
+
+    async def reqPositionsAsync(self):
+        return self.positions()
+
+    # === Market Data ===
+    @property
+    def last_bar(self) -> BarData:
+        return self.all_bars[self.cursor - 1]
+
+    def reqHistoricalData(self, contract, endDateTime='', durationStr='', barSizeSetting='', whatToShow='MIDPOINT',
+                          useRTH=False, formatDate=1, keepUpToDate=False, **kwargs):
+        bars = BarDataList(self._formatted(bar, formatDate) for bar in self.all_bars[:self.cursor])
+        bars.formatDate = formatDate
+        bars.contract = contract
+        bars.durationStr = durationStr
+        bars.barSizeSetting = barSizeSetting
+        bars.whatToShow = whatToShow
+        bars.keepUpToDate = keepUpToDate
+        if keepUpToDate:
+            self.subscriptions.append(bars)
+        return bars
+
+    def _formatted(self, bar: BarData, formatDate: int) -> BarData:
+        date = pd.Timestamp(bar.date)
+        if formatDate == 2 or date.tzinfo is None:
+            return bar
+        return dataclasses.replace(bar, date=date.tz_convert(self.tws_tz).tz_localize(None).to_pydatetime())
+
+    async def reqHistoricalDataAsync(self, contract, *args, **kwargs):
+        return self.reqHistoricalData(contract, *args, **kwargs)
+
+    def cancelHistoricalData(self, bars):
+        if bars in self.subscriptions:
+            self.subscriptions.remove(bars)
+
+    def push_bar(self) -> bool:
+        # Advance one bar; keepUpToDate subscribers see a new (forming) bar
+        if self.cursor >= len(self.all_bars):
+            return False
+        bar = self.all_bars[self.cursor]
+        self.cursor += 1
+        self.last_price = None
+        for bars in list(self.subscriptions):
+            bars.append(self._formatted(bar, bars.formatDate))
+            bars.updateEvent.emit(bars, True)
+        return True
+
+    def reqMktData(self, contract, genericTickList: str = '', snapshot: bool = False, regulatorySnapshot: bool = False,
+                   mktDataOptions=None) -> Ticker:
+        for ticker in self.tickers:
+            if ticker.contract is contract:
+                return ticker
+        ticker = Ticker(contract=contract)
+        self.tickers.append(ticker)
+        return ticker
+
+    def cancelMktData(self, contract):
+        self.tickers = [ticker for ticker in self.tickers if ticker.contract is not contract]
+
+    def push_tick(self, price: float, time=None, spread: float = 0.0):
+        # Quote update for every reqMktData subscriber
+        self.last_price = price
+        for ticker in list(self.tickers):
+            ticker.time = time or self._now()
+            ticker.bid, ticker.ask, ticker.last = price - spread / 2, price + spread / 2, price
+            ticker.updateEvent.emit(ticker)
+
+    async def play(self, interval: float = 0.0, limit: int = None):
+        pushed = 0
+        while (limit is None or pushed < limit) and self.push_bar():
+            pushed += 1
+            await asyncio.sleep(interval)
+        return pushed
+
+    # === Orders ===
+    def placeOrder(self, contract, order):
+        order.orderId = self._next_order_id
+        self._next_order_id += 1
+        status = OrderStatus(orderId=order.orderId, status='PendingSubmit', remaining=order.totalQuantity)
+        trade = Trade(contract=contract, order=order, orderStatus=status)
+        trade.log.append(TradeLogEntry(self._now(), 'PendingSubmit', ''))
+        self.orders.append(trade)
+        self.pending.append(trade)
+
+        # With a running loop the fill arrives later; otherwise on the next sleep()
+        try:
+            asyncio.get_running_loop().call_later(self.fill_delay, self._fill, trade)
+        except RuntimeError:
+            pass
+        return trade
+
+    def _now(self):
+        return datetime.datetime.now(datetime.timezone.utc)
+
+    def _set_status(self, trade, status: str):
+        trade.orderStatus.status = status
+        trade.log.append(TradeLogEntry(self._now(), status, ''))
+        trade.statusEvent.emit(trade)
+
+    def _fill(self, trade):
+        if trade not in self.pending:
+            return
+        self.pending.remove(trade)
+        self._set_status(trade, 'Submitted')
+
+        order, status = trade.order, trade.orderStatus
+        side = 1 if order.action == 'BUY' else -1
+        reference = self.last_price if self.last_price is not None else self.last_bar.close
+        price = reference * (1 + side * self.slippage)
+        sizes = [order.totalQuantity / self.fill_slices] * self.fill_slices
+        for shares in sizes:
+            cost = status.avgFillPrice * status.filled + price * shares
+            status.filled += shares
+            status.remaining = order.totalQuantity - status.filled
+            status.avgFillPrice = cost / status.filled
+            status.lastFillPrice = price
+            execution = Execution(
+                execId=f"{self._next_exec_id:08d}",
+                time=self._now(),
+                acctNumber=self.account,
+                side='BOT' if side == 1 else 'SLD',
+                shares=shares,
+                price=price,
+                orderId=order.orderId,
+                cumQty=status.filled,
+                avgPrice=status.avgFillPrice
+            )
+            self._next_exec_id += 1
+            fill = Fill(trade.contract, execution, CommissionReport(execId=execution.execId), execution.time)
+            trade.fills.append(fill)
+            trade.fillEvent.emit(trade, fill)
+            if status.remaining > 0:
+                trade.statusEvent.emit(trade)
+
+        self._set_status(trade, 'Filled')
+        trade.filledEvent.emit(trade)
+
+    def cancelOrder(self, order):
+        for trade in list(self.pending):
+            if trade.order.orderId == order.orderId:
+                self.pending.remove(trade)
+                self._set_status(trade, 'Cancelled')
+                trade.cancelledEvent.emit(trade)
+                return trade
+        return None
+
+    def openTrades(self):
+        return [t for t in self.orders if not t.isDone()]
+
+    def trades(self):
+        return list(self.orders)
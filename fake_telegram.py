@@ -0,0 +1,82 @@
+# Local stand-in for the Telegram Bot API
+# Serves sendMessage on 127.0.0.1 so AlertDispatcher can be exercised without
+# network access. Responses can be delayed or failed to test retries, and
+# failures can come back as plain text like a proxy's error page:
+#
+#   server = FakeTelegram(fail_first=2).start()
+#   dispatcher = AlertDispatcher(token='test', chat_id='1', base_url=server.url)
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeTelegram:
+    def __init__(self, delay: float = 0.0, fail_first: int = 0, fail_status: int = 500, retry_after: int = 1,
+                 plain_errors: bool = False):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.plain_errors = plain_errors
+        self.messages = []
+        self.requests = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive, like api.telegram.org
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                with fake._lock:
+                    fake.requests += 1
+                    fake.connections.add(self.client_address)
+                    failing = fake.requests <= fake.fail_first
+                if fake.delay:
+                    time.sleep(fake.delay)
+
+                if failing:
+                    status = fake.fail_status
+                    reply = {'ok': False, 'error_code': status, 'description': 'simulated failure'}
+                    if status == 429:
+                        reply['parameters'] = {'retry_after': fake.retry_after}
+                else:
+                    status = 200
+                    with fake._lock:
+                        fake.messages.append(body)
+                    reply = {'ok': True, 'result': {'message_id': len(fake.messages), 'text': body.get('text')}}
+
+                content_type = 'application/json'
+                data = json.dumps(reply).encode()
+                if failing and fake.plain_errors:
+                    content_type, data = 'text/html', f"<html>{status} simulated failure</html>".encode()
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
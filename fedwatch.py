@@ -1,21 +1,22 @@
-import yaml
-from datetime import datetime
-import os
+import datetime
+from settings_loader import SETTINGS
+from fomc_events import get_event_store
 
 
-def fedwatch_sentiment():
-    # Get the absolute path of the current script directory
-    current_dir = os.path.dirname(__file__)
-    
-    # Build the path to settings.yaml relative to the current script
-    settings_path = os.path.join(current_dir, 'settings.yaml')
-    
-    with open(settings_path, 'r') as f:
-        settings = yaml.safe_load(f)
-    
-    fedwatch_settings = settings['fedwatch_settings']
-    sentiment = fedwatch_settings['sentiment']
-    probability = fedwatch_settings['probability']
-    fed_date = datetime.strptime(fedwatch_settings['fed_date'], "%Y-%m-%d").date()
+def fedwatch_sentiment(when=None):
+    # Same FOMC history the backtester aligns to bars; when it has nothing
+    # fresh for the date, the manual fedwatch_settings snapshot is used.
+    # Both are held in memory and only re-read after the files change.
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    when = when if when is not None else today
+    store = get_event_store()
+    event = store.lookup(when)
+    if event is None:
+        event = SETTINGS.fedwatch()
+        if when == today:
+            # Live only (a replay asks for past dates): today's reading joins the
+            # history, so later backtests see the odds as they were on the day
+            store.record(when, event)
+    sentiment, probability, fed_date = event
 
-    return sentiment, probability, fed_date
\ No newline at end of file
+    return sentiment, probability, fed_date
@@ -0,0 +1,190 @@
+# FOMC event store
+# Meeting calendar plus a daily history of FedWatch-style hike/cut/stay odds,
+# loaded from CSV or Parquet. For any date the prevailing view is the latest
+# observation on or before it for the next meeting still ahead, found with a
+# binary search (lookup) or precomputed for a whole bar series (align).
+#
+# meetings file:      meeting_date
+# probabilities file: date, meeting_date, hike, cut, stay   (percent)
+#
+# The live loop appends each day's fedwatch_settings reading to the
+# probabilities file (record), so the history backtests need builds up from
+# the dates the strategy actually traded on.
+
+import os
+import threading
+import datetime
+import numpy as np
+import pandas as pd
+from settings_loader import (
+    FedWatchSettings, FOMC_MEETINGS_PATH, FOMC_PROBABILITIES_PATH, FOMC_MAX_STALENESS_DAYS
+)
+
+SENTIMENTS = np.array(['HIKE', 'CUT', 'STAY'], dtype=object)
+NO_EVENT_DAY = np.iinfo(np.int64).max  # fed_day when no meeting is scheduled
+
+
+def _read_table(path: str) -> pd.DataFrame:
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def _days(values) -> np.ndarray:
+    return pd.to_datetime(pd.Series(values)).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+
+def _day_numbers(dates) -> np.ndarray:
+    # Calendar day numbers of bar dates, same convention as compute_indicators
+    dates = pd.Series(dates)
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        dates = dates.dt.date
+    return dates.to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+class FomcEventStore:
+    def __init__(self, meetings_path: str = FOMC_MEETINGS_PATH, probabilities_path: str = FOMC_PROBABILITIES_PATH,
+                 max_staleness_days: int = FOMC_MAX_STALENESS_DAYS):
+        self.meetings_path = meetings_path
+        self.probabilities_path = probabilities_path
+        self.max_staleness_days = max_staleness_days
+        self._lock = threading.Lock()
+        self._record_lock = threading.Lock()  # portfolio symbols record from worker threads
+        self._stamp = None
+        self.reload()
+
+    def _file_stamp(self):
+        stamp = []
+        for path in (self.meetings_path, self.probabilities_path):
+            stat = os.stat(path) if path and os.path.isfile(path) else None
+            stamp.append((stat.st_mtime_ns, stat.st_size) if stat else None)
+        return tuple(stamp)
+
+    def reload(self):
+        with self._lock:
+            stamp = self._file_stamp()
+            meeting_days = []
+            if stamp[0] is not None:
+                meeting_days = _days(_read_table(self.meetings_path)['meeting_date'])
+
+            obs_day = obs_meeting = obs_prob = np.empty(0, dtype=np.int64)
+            obs_sentiment = np.empty(0, dtype=object)
+            if stamp[1] is not None:
+                probs = _read_table(self.probabilities_path)
+                probs['day'] = _days(probs['date'])
+                probs['meeting_day'] = _days(probs['meeting_date'])
+                # Keep, per day, the odds for the nearest meeting not yet held
+                probs = probs[probs['meeting_day'] >= probs['day']]
+                probs = probs.sort_values(['day', 'meeting_day']).drop_duplicates('day', keep='first')
+                odds = probs[['hike', 'cut', 'stay']].to_numpy(dtype=np.float64)
+                obs_day = probs['day'].to_numpy()
+                obs_meeting = probs['meeting_day'].to_numpy()
+                obs_sentiment = SENTIMENTS[odds.argmax(axis=1)]
+                obs_prob = odds.max(axis=1)
+                meeting_days = np.concatenate([meeting_days, obs_meeting])
+
+            self.meeting_days = np.unique(np.asarray(meeting_days, dtype=np.int64))
+            self.obs_day = obs_day
+            self.obs_meeting = obs_meeting
+            self.obs_sentiment = obs_sentiment
+            self.obs_prob = obs_prob
+            self._stamp = stamp
+
+    def _check(self):
+        if self._file_stamp() != self._stamp:
+            self.reload()
+
+    @property
+    def has_probabilities(self) -> bool:
+        self._check()
+        return len(self.obs_day) > 0
+
+    def align(self, dates) -> dict:
+        # Prevailing sentiment, probability and next meeting day for every date.
+        # Dates without a fresh observation get STAY at 0%, so the FOMC leg stays off.
+        self._check()
+        days = _day_numbers(dates)
+
+        meeting_idx = np.searchsorted(self.meeting_days, days, side='left')
+        fed_day = np.full(len(days), NO_EVENT_DAY, dtype=np.int64)
+        scheduled = meeting_idx < len(self.meeting_days)
+        fed_day[scheduled] = self.meeting_days[meeting_idx[scheduled]]
+
+        sentiment = np.full(len(days), 'STAY', dtype=object)
+        prob = np.zeros(len(days), dtype=np.float64)
+        idx = np.searchsorted(self.obs_day, days, side='right') - 1
+        fresh = idx >= 0
+        safe = np.where(fresh, idx, 0)
+        if len(self.obs_day):
+            fresh &= (days - self.obs_day[safe] <= self.max_staleness_days) & (self.obs_meeting[safe] >= days)
+            sentiment[fresh] = self.obs_sentiment[safe[fresh]]
+            prob[fresh] = self.obs_prob[safe[fresh]]
+            fed_day[fresh] = self.obs_meeting[safe[fresh]]
+        else:
+            fresh[:] = False
+
+        return {'sentiment': sentiment, 'prob': prob, 'fed_day': fed_day, 'fresh': fresh}
+
+    def lookup(self, when=None) -> FedWatchSettings:
+        # None when there is no fresh observation for that date
+        when = when if when is not None else datetime.date.today()
+        aligned = self.align([when])
+        if not aligned['fresh'][0]:
+            return None
+        fed_date = np.datetime64(int(aligned['fed_day'][0]), 'D').astype(datetime.date)
+        return FedWatchSettings(aligned['sentiment'][0], float(aligned['prob'][0]), fed_date)
+
+    def record(self, when, event: FedWatchSettings) -> bool:
+        # Appends the reading for `when` unless that day is already covered.
+        # Only the leading odds are known; the rest is split over the other two.
+        day = _day_numbers([when])[0]
+        meeting_day = _day_numbers([event.fed_date])[0]
+        if self.probabilities_path.endswith('.parquet') or meeting_day < day:
+            return False
+        with self._record_lock:
+            self._check()
+            if day in self.obs_day:
+                return False
+            odds = {sentiment: (100.0 - event.probability) / 2 for sentiment in SENTIMENTS}
+            odds[event.sentiment] = event.probability
+            row = pd.DataFrame([{'date': str(np.datetime64(int(day), 'D')), 'meeting_date': str(np.datetime64(int(meeting_day), 'D')),
+                                 'hike': odds['HIKE'], 'cut': odds['CUT'], 'stay': odds['STAY']}])
+            new_file = not os.path.isfile(self.probabilities_path) or os.path.getsize(self.probabilities_path) == 0
+            row.to_csv(self.probabilities_path, mode='a', header=new_file, index=False)
+            self.reload()
+        return True
+
+    def next_meeting(self, when=None) -> datetime.date:
+        when = when if when is not None else datetime.date.today()
+        fed_day = self.align([when])['fed_day'][0]
+        return None if fed_day == NO_EVENT_DAY else np.datetime64(int(fed_day), 'D').astype(datetime.date)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_event_store() -> FomcEventStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FomcEventStore()
+        return _store
+
+
+def backtest_inputs(dates, store: FomcEventStore = None, allow_missing: bool = False) -> tuple:
+    # (sentiment, prob, fed_day) aligned to the bars for run_backtest/run_sweep.
+    # Bars the probability history does not cover raise, rather than reuse
+    # today's fedwatch_settings (look-ahead). With allow_missing they keep the
+    # calendar's next meeting but STAY at 0%, so only the RSI leg trades.
+    store = store if store is not None else get_event_store()
+    aligned = store.align(dates)
+    missing = ~aligned['fresh']
+    if missing.any() and not allow_missing:
+        dates = pd.Series(dates).reset_index(drop=True)
+        raise ValueError(
+            f"FOMC probability history at {store.probabilities_path} does not cover {int(missing.sum())} of "
+            f"{len(missing)} bars ({dates[missing].iloc[0]} to {dates[missing].iloc[-1]}); "
+            f"extend it, or backtest the RSI leg only (allow_missing)"
+        )
+    return aligned['sentiment'], aligned['prob'], aligned['fed_day']
@@ -0,0 +1,340 @@
+# Streaming indicator kernels
+# Each indicator takes one bar at a time via update(bar) in O(1) and exposes
+# its current value (None while warming up). RSI and MACD follow TA-Lib's
+# seeding so values match talib.RSI / talib.MACD on the same history; ATR and
+# volatility follow RiskEngine.rolling_atr / realized_volatility.
+
+import copy
+import bisect
+import math
+import numpy as np
+from collections import deque
+
+
+def _close(bar) -> float:
+    if isinstance(bar, (int, float)):
+        return float(bar)
+    if isinstance(bar, dict):
+        return float(bar['close'])
+    return float(bar.close)
+
+
+class StreamingIndicator:
+    value = None
+
+    def update(self, bar):
+        raise NotImplementedError
+
+    def seed(self, history):
+        for bar in history:
+            self.update(bar)
+        return self
+
+    @property
+    def ready(self) -> bool:
+        return self.value is not None
+
+
+class StreamingRSI(StreamingIndicator):
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.value = None
+        self._prev_close = None
+        self._count = 0
+        self._gain = 0.0
+        self._loss = 0.0
+
+    def update(self, bar):
+        close = _close(bar)
+        if self._prev_close is None:
+            self._prev_close = close
+            return self.value
+
+        diff = close - self._prev_close
+        self._prev_close = close
+        self._count += 1
+
+        if self._count <= self.period:
+            # Seed with simple averages of the first `period` moves
+            if diff < 0:
+                self._loss -= diff
+            else:
+                self._gain += diff
+            if self._count < self.period:
+                return self.value
+            self._loss /= self.period
+            self._gain /= self.period
+        else:
+            # Wilder smoothing
+            self._loss *= (self.period - 1)
+            self._gain *= (self.period - 1)
+            if diff < 0:
+                self._loss -= diff
+            else:
+                self._gain += diff
+            self._loss /= self.period
+            self._gain /= self.period
+
+        total = self._gain + self._loss
+        self.value = 100 * (self._gain / total) if total != 0 else 0.0
+        return self.value
+
+
+class StreamingEMA(StreamingIndicator):
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.value = None
+        self._seed = []
+
+    def update(self, bar):
+        close = _close(bar)
+        if self.value is None:
+            self._seed.append(close)
+            if len(self._seed) == self.period:
+                self.value = sum(self._seed) / self.period
+                self._seed = []
+            return self.value
+
+        self.value = ((close - self.value) * self.k) + self.value
+        return self.value
+
+
+class StreamingMACD(StreamingIndicator):
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        if slow < fast:
+            fast, slow = slow, fast
+        self.fast_period = fast
+        self.slow_period = slow
+        self.fast_k = 2.0 / (fast + 1)
+        self.slow_k = 2.0 / (slow + 1)
+        self.signal_ema = StreamingEMA(signal)
+        self.value = None
+        self.macd = None
+        self.signal = None
+        self.hist = None
+        self._fast = None
+        self._slow = None
+        self._seed = deque(maxlen=slow)
+
+    def update(self, bar):
+        close = _close(bar)
+        if self._slow is None:
+            # TA-Lib seeds both EMAs so they become valid on the same bar
+            self._seed.append(close)
+            if len(self._seed) < self.slow_period:
+                return self.value
+            seed = list(self._seed)
+            self._slow = sum(seed) / self.slow_period
+            self._fast = sum(seed[-self.fast_period:]) / self.fast_period
+            self._seed = None
+        else:
+            self._slow = ((close - self._slow) * self.slow_k) + self._slow
+            self._fast = ((close - self._fast) * self.fast_k) + self._fast
+
+        line = self._fast - self._slow
+        signal = self.signal_ema.update(line)
+        if signal is not None:
+            self.macd = line
+            self.signal = signal
+            self.hist = line - signal
+            self.value = line
+        return self.value
+
+
+class StreamingATR(StreamingIndicator):
+    # Close-to-close true range, same definition as RiskEngine.rolling_atr
+    def __init__(self, window: int = 20):
+        self.window = window
+        self.value = None
+        self._prev_close = None
+        self._ranges = deque(maxlen=window)
+        self._sum = 0.0
+
+    def update(self, bar):
+        close = _close(bar)
+        if self._prev_close is None:
+            self._prev_close = close
+            return self.value
+
+        tr = abs(close - self._prev_close)
+        self._prev_close = close
+        if len(self._ranges) == self.window:
+            self._sum -= self._ranges[0]
+        self._ranges.append(tr)
+        self._sum += tr
+
+        if len(self._ranges) == self.window:
+            self.value = self._sum / self.window
+        return self.value
+
+    def peek(self, bar):
+        # The value update(bar) would give, leaving the state as it is
+        close = _close(bar)
+        if self._prev_close is None:
+            return self.value
+        tr = abs(close - self._prev_close)
+        if len(self._ranges) == self.window:
+            return (self._sum - self._ranges[0] + tr) / self.window
+        if len(self._ranges) + 1 == self.window:
+            return (self._sum + tr) / self.window
+        return self.value
+
+
+class StreamingVolatility(StreamingIndicator):
+    # Rolling sample std of simple returns, annualized like RiskEngine.realized_volatility
+    def __init__(self, window: int, periods_per_year: int = 252):
+        self.window = window
+        self.scale = math.sqrt(periods_per_year)
+        self.value = None
+        self._prev_close = None
+        self._returns = deque(maxlen=window)
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._updates = 0
+
+    def update(self, bar):
+        close = _close(bar)
+        if self._prev_close is None:
+            self._prev_close = close
+            return self.value
+
+        ret = close / self._prev_close - 1
+        self._prev_close = close
+        if len(self._returns) == self.window:
+            old = self._returns[0]
+            self._sum -= old
+            self._sumsq -= old * old
+        self._returns.append(ret)
+        self._sum += ret
+        self._sumsq += ret * ret
+
+        # Re-sum once per window to stop floating point drift (amortized O(1))
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self._sum = sum(self._returns)
+            self._sumsq = sum(r * r for r in self._returns)
+
+        n = len(self._returns)
+        if n == self.window and n > 1:
+            var = (self._sumsq - self._sum * self._sum / n) / (n - 1)
+            self.value = math.sqrt(max(var, 0.0)) * self.scale
+        return self.value
+
+    def peek(self, bar):
+        # The value update(bar) would give, leaving the state as it is
+        close = _close(bar)
+        if self._prev_close is None:
+            return self.value
+        ret = close / self._prev_close - 1
+        total, total_sq, n = self._sum + ret, self._sumsq + ret * ret, len(self._returns) + 1
+        if n > self.window:
+            old = self._returns[0]
+            total, total_sq, n = total - old, total_sq - old * old, self.window
+        if n == self.window and n > 1:
+            var = (total_sq - total * total / n) / (n - 1)
+            return math.sqrt(max(var, 0.0)) * self.scale
+        return self.value
+
+
+class StreamingMedian(StreamingIndicator):
+    # Median of the last `window` values: arrival order in a deque plus the same
+    # values kept sorted, so an update is a bisect and a short list shift
+    def __init__(self, window: int):
+        self.window = window
+        self.value = None
+        self._values = deque()
+        self._sorted = []
+
+    def update(self, bar):
+        x = _close(bar)
+        if len(self._values) == self.window:
+            del self._sorted[bisect.bisect_left(self._sorted, self._values.popleft())]
+        self._values.append(x)
+        bisect.insort(self._sorted, x)
+
+        n = len(self._sorted)
+        mid = n // 2
+        self.value = self._sorted[mid] if n % 2 else (self._sorted[mid - 1] + self._sorted[mid]) / 2
+        return self.value
+
+    def __len__(self):
+        return len(self._values)
+
+
+class IndicatorSet:
+    # RSI(14), MACD(12, 26, 9), ATR(20) and 10/126-bar volatility as used by
+    # the strategy and risk engine. Bars sharing the last timestamp replace
+    # the previous update, so an in-progress bar can be revised in place.
+    def __init__(self, rsi_period: int = 14, atr_window: int = 20, short_window: int = 10, long_window: int = 126):
+        self.rsi = StreamingRSI(rsi_period)
+        self.macd = StreamingMACD()
+        self.atr = StreamingATR(atr_window)
+        self.short_vol = StreamingVolatility(short_window)
+        self.long_vol = StreamingVolatility(long_window)
+        self.last_date = None
+        self.count = 0
+        self._before_last = None
+
+    def _kernels(self):
+        return (self.rsi, self.macd, self.atr, self.short_vol, self.long_vol)
+
+    def update(self, bar, date=None):
+        if date is None and isinstance(bar, dict):
+            date = bar.get('date')
+        elif date is None and not isinstance(bar, (int, float)):
+            date = getattr(bar, 'date', None)
+        return self._push(bar, date, revisable=date is not None)
+
+    def _push(self, bar, date, revisable):
+        if date is not None and date == self.last_date and self._before_last is not None:
+            self.rsi, self.macd, self.atr, self.short_vol, self.long_vol = self._before_last
+            self.count -= 1
+        elif date is not None and self.last_date is not None and date < self.last_date:
+            return self.snapshot()
+
+        self._before_last = copy.deepcopy(self._kernels()) if revisable else None
+        for kernel in self._kernels():
+            kernel.update(bar)
+        self.last_date = date
+        self.count += 1
+        return self.snapshot()
+
+    def seed(self, history):
+        for bar in history:
+            self.update(bar)
+        return self
+
+    def update_bars(self, bars):
+        # bars: BarRing or DataFrame with date/close. Feed only rows at or after
+        # the last seen timestamp; only the final row is kept revisable since
+        # it may still be an in-progress bar
+        dates = np.asarray(bars['date'])
+        closes = np.asarray(bars['close'], dtype=np.float64)
+        start = 0 if self.last_date is None else int(np.searchsorted(dates, self.last_date, side='left'))
+        last = len(closes) - 1
+        for i in range(start, len(closes)):
+            self._push(float(closes[i]), dates[i], revisable=i == last)
+        return self.snapshot()
+
+    update_df = update_bars
+
+    def snapshot(self) -> dict:
+        return {
+            'rsi': self.rsi.value,
+            'macd': self.macd.macd,
+            'macd_signal': self.macd.signal,
+            'atr': self.atr.value,
+            'short_vol': self.short_vol.value,
+            'long_vol': self.long_vol.value,
+        }
+
+    @classmethod
+    def batch(cls, closes) -> dict:
+        # Run the kernels over a whole array, returning one value per bar
+        indicators = cls()
+        out = {key: [] for key in indicators.snapshot()}
+        for close in closes:
+            for key, value in indicators.update(float(close)).items():
+                out[key].append(math.nan if value is None else value)
+        return out
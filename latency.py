@@ -0,0 +1,115 @@
+# Hot-path latency instrumentation
+# Per-stage spans measured with perf_counter_ns and aggregated into
+# log-bucketed (HDR-style) histograms with bounded memory and ~2% relative
+# precision, so p50/p99 stay cheap no matter how many cycles are recorded.
+
+import os
+import json
+import math
+import time
+import datetime
+from contextlib import contextmanager
+# Importable from the repo root and as the live_trading package (dashboard)
+if __package__:
+    from .log_utils import TradeLogger, CsvSink
+else:
+    from log_utils import TradeLogger, CsvSink
+
+STAGES = ('fetch', 'indicator', 'risk', 'strategy', 'order_submit', 'order_ack', 'log')
+LATENCY_COLUMNS = ('timestamp', 'symbol') + tuple(f"{stage}_ms" for stage in STAGES) + ('decision_ms',)
+
+
+class LatencyHistogram:
+    BUCKETS_PER_OCTAVE = 32
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = None
+
+    def _bucket(self, value_ns: int) -> int:
+        return int(math.log2(max(value_ns, 1)) * self.BUCKETS_PER_OCTAVE)
+
+    def record(self, value_ns: int):
+        bucket = self._bucket(value_ns)
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.count += 1
+        self.total_ns += value_ns
+        self.min_ns = value_ns if self.min_ns is None else min(self.min_ns, value_ns)
+        self.max_ns = value_ns if self.max_ns is None else max(self.max_ns, value_ns)
+
+    def percentile(self, q: float) -> float:
+        # Upper edge of the bucket holding the q-th percentile, clamped to the observed range (ns)
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q / 100 * self.count))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                upper = 2 ** ((bucket + 1) / self.BUCKETS_PER_OCTAVE)
+                return min(max(upper, self.min_ns), self.max_ns)
+        return self.max_ns
+
+    def summary(self) -> dict:
+        ms = lambda ns: ns / 1e6 if ns is not None else None
+        return {
+            'count': self.count,
+            'mean_ms': ms(self.total_ns / self.count) if self.count else None,
+            'p50_ms': ms(self.percentile(50)),
+            'p90_ms': ms(self.percentile(90)),
+            'p99_ms': ms(self.percentile(99)),
+            'max_ms': ms(self.max_ns),
+        }
+
+
+class StageTimer:
+    def __init__(self, stages: tuple = STAGES):
+        self.histograms = {stage: LatencyHistogram() for stage in stages}
+        self.current = {}
+
+    def start_cycle(self):
+        self.current = {}
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter_ns() - start)
+
+    def record(self, stage: str, elapsed_ns: int):
+        self.histograms.setdefault(stage, LatencyHistogram()).record(elapsed_ns)
+        self.current[stage] = self.current.get(stage, 0) + elapsed_ns
+
+    def cycle_ms(self) -> dict:
+        return {stage: ns / 1e6 for stage, ns in self.current.items()}
+
+    def decision_ms(self) -> float:
+        # Market data in to order out, excluding the wait for the broker's ack and logging
+        return sum(ns for stage, ns in self.current.items() if stage not in ('order_ack', 'log')) / 1e6
+
+    def summary(self) -> dict:
+        return {stage: hist.summary() for stage, hist in self.histograms.items() if hist.count}
+
+
+class LatencyRecorder:
+    # Writes one row per cycle next to the trade log, plus a percentile snapshot
+    def __init__(self, log_path: str):
+        root, _ = os.path.splitext(log_path)
+        self.summary_path = root + '_latency_summary.json'
+        self.logger = TradeLogger([CsvSink(root + '_latency.csv', columns=LATENCY_COLUMNS)])
+
+    def record(self, timer: StageTimer, symbol: str):
+        row = {'timestamp': datetime.datetime.now().isoformat(), 'symbol': symbol, 'decision_ms': timer.decision_ms()}
+        row.update({f"{stage}_ms": ms for stage, ms in timer.cycle_ms().items()})
+        self.logger.log(row)
+
+        tmp_path = self.summary_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'updated': row['timestamp'], 'symbol': symbol, 'stages': timer.summary()}, f, indent=2)
+        os.replace(tmp_path, self.summary_path)
+
@@ -3,244 +3,528 @@ from fedwatch import fedwatch_sentiment as get_fedwatch_sentiment
 from log_utils import log_to_csv
 from risk_engine import RiskEngine
 from live_strats import combined_rsi_fomc_logic
-from alert_utils import send_telegram_alert
-import talib
+from alert_utils import send_telegram_alert, drawdown_key
+from indicators import IndicatorSet
+from bar_cache import BarCache
+from bar_ring import BarRing
+from latency import StageTimer, LatencyRecorder
+from order_manager import OrderManager
+from state_store import StateStore
+from risk_monitor import RiskMonitor
 import pandas as pd
 import numpy as np
 import datetime
+import asyncio
 import time
+import sys
 from settings_loader import (
     HOST, PORT, CLIENT_ID,
     SYMBOL, SEC_TYPE, EXCHANGE, CURRENCY,
-    DURATION, BAR_SIZE, DRAW_DOWN_ALERT
+    DURATION, BAR_SIZE, SETTINGS,
+    STREAMING_ENABLED, LOG_FILE_PATH
 )
 
-# === IBKR Setup ===
-ib = IB()
-ib.connect(HOST, PORT, clientId=CLIENT_ID)
-contract = Contract(symbol=SYMBOL, secType=SEC_TYPE, exchange=EXCHANGE, currency=CURRENCY)
-ib.qualifyContracts(contract)
-# === Initialize State ===
-state = {
-    'position': None,
-    'entry_price': None,
-    'entry_date': None,
-    'source': None,
-    'partial_exit_done': False
-}
-
-account_summary = ib.accountSummary()
-account_df = util.df(account_summary)
-
-initial_equity = float(account_df.loc[account_df['tag'] == 'NetLiquidation', 'value'].values[0])
-
-# Default trade metadata
-executed_size = None
-order_status = None
-filled = None
-remaining = None
-max_equity = initial_equity
-while True:
-    try:
-        start_time = time.time() # Start timer for latency measurement
-
-        # === 1. Get Latest Data ===
-        bars = ib.reqHistoricalData(
-            contract,
-            endDateTime='',
-            durationStr=DURATION,
-            barSizeSetting=BAR_SIZE,
-            whatToShow='MIDPOINT',
-            useRTH=False,
-            formatDate=1
+
+CYCLE_SECONDS = 4 * 60 * 60  # 4 hours
+
+
+def net_liquidation(summary) -> float:
+    account_df = util.df(summary)
+    return float(account_df.loc[account_df['tag'] == 'NetLiquidation', 'value'].values[0])
+
+
+def account_equity(ib) -> float:
+    return net_liquidation(ib.accountSummary())
+
+
+class LiveSession:
+    def __init__(self, ib, contract, initial_equity: float = None, log_path: str = LOG_FILE_PATH, order_manager=None,
+                 state_store: StateStore = None, equity_share: float = 1.0):
+        self.ib = ib
+        self.contract = contract
+        self.log_path = log_path
+        # Fraction of the account's NetLiquidation this session trades (portfolio sessions split it)
+        self.equity_share = equity_share
+
+        # === Initialize State ===
+        self.state = {
+            'position': None,
+            'entry_price': None,
+            'entry_date': None,
+            'source': None,
+            'partial_exit_done': False,
+            'quantity': 0
+        }
+
+        # Position state and the equity high-water mark survive restarts
+        self.state_store = state_store if state_store is not None else StateStore(log_path)
+        saved = self.state_store.load()
+        for key in self.state:
+            if key in saved:
+                self.state[key] = saved[key]
+        if self.state['entry_date'] is not None:
+            self.state['entry_date'] = pd.Timestamp(self.state['entry_date'])
+
+        if initial_equity is None:
+            initial_equity = saved.get('initial_equity') or account_equity(ib)
+        self.initial_equity = initial_equity
+
+        # Default trade metadata
+        self.executed_size = None
+        self.order_status = None
+        self.filled = None
+        self.remaining = None
+        self.trade = None
+        self.order = None
+        self.max_equity = max(saved.get('max_equity') or self.initial_equity, self.initial_equity)
+        # Account equity, refreshed every cycle; mark_price is the price it was valued at
+        self.equity = saved.get('equity') or self.initial_equity
+        self.mark_price = saved.get('mark_price')
+        self.indicators = IndicatorSet()
+        self.risk_engine = RiskEngine(self.equity)
+        self.bar_cache = BarCache()
+        # Fixed-size bar window reused every cycle instead of a fresh DataFrame
+        self.bars = BarRing()
+        self.latency = StageTimer()
+        self.latency_recorder = LatencyRecorder(log_path)
+
+        # Orders are tracked from broker events instead of sleeping after placeOrder;
+        # a manager may be shared between sessions
+        self.orders = order_manager if order_manager is not None else OrderManager(ib, log_path)
+        self.orders.add_listener(self._on_order_update)
+
+        self.reconcile()
+        if self.mark_price is None:
+            # Journals from before equity was tracked: value an open position from its entry
+            self.mark_price = self.state['entry_price']
+        self.persist()
+
+        # Stops, take-profits and drawdown checked on live ticks between cycles
+        # (only while risk_management.intrabar_monitor is on, see RiskMonitor.sync)
+        self.risk_monitor = RiskMonitor(self)
+        self.risk_monitor.sync()
+
+    def persist(self):
+        self.state_store.save({
+            **self.state, 'initial_equity': self.initial_equity, 'max_equity': self.max_equity,
+            'equity': self.equity, 'mark_price': self.mark_price
+        })
+
+    def broker_position(self) -> tuple:
+        # (signed quantity, average cost) held at IBKR for this contract
+        for p in self.ib.positions():
+            c = p.contract
+            same = c.conId == self.contract.conId if self.contract.conId else (
+                c.symbol == self.contract.symbol and c.secType == self.contract.secType and c.currency == self.contract.currency
+            )
+            if same:
+                return p.position, p.avgCost
+        return 0.0, None
+
+    def reconcile(self):
+        # The broker is the source of truth for what is held; the journal for why
+        state = self.state
+        quantity, avg_cost = self.broker_position()
+        held = 'long' if quantity > 0 else 'short' if quantity < 0 else None
+
+        if held is None and state['position'] is not None:
+            print(f"⚠️ Journal says {state['position']} {self.contract.symbol} but IBKR is flat; resetting state")
+            state.update(position=None, entry_price=None, entry_date=None, source=None, partial_exit_done=False, quantity=0)
+        elif held is not None and held != state['position']:
+            print(f"⚠️ IBKR holds {quantity} {self.contract.symbol} not in the journal; adopting it")
+            state.update(position=held, entry_price=avg_cost, entry_date=pd.Timestamp.now(tz='UTC'),
+                         source='RECOVERED', partial_exit_done=False, quantity=abs(quantity))
+        elif held is not None:
+            state['quantity'] = abs(quantity)
+        if state['position'] is not None:
+            print(f"♻️ Resuming {state['position']} {state['quantity']} {self.contract.symbol} @ {state['entry_price']} ({state['source']})")
+
+    def check_position(self):
+        # Per cycle: re-reconciles when the broker's position no longer matches
+        # the state (e.g. closed by hand in TWS), unless our orders are in flight
+        quantity, _ = self.broker_position()
+        state = self.state
+        side = 1 if state['position'] == 'long' else -1 if state['position'] == 'short' else 0
+        if quantity == side * state['quantity']:
+            return
+        if any(record.trade.contract is self.contract for record in self.orders.in_flight()):
+            return
+        self.reconcile()
+        self.persist()
+        self.risk_monitor.sync()
+
+    def revalue(self, price: float, equity: float = None) -> float:
+        # Account equity at price: the broker's figure when one was fetched,
+        # otherwise the last one carried forward with the open position marked to price
+        if equity is None:
+            state = self.state
+            side = 1 if state['position'] == 'long' else -1 if state['position'] == 'short' else 0
+            equity = self.equity
+            if side and self.mark_price is not None:
+                equity += side * (price - self.mark_price) * state['quantity']
+        self.equity, self.mark_price = equity, price
+        self.risk_engine.equity = equity
+        return equity
+
+    def _sync_order(self, record):
+        self.trade = record.trade
+        self.executed_size = record.filled
+        self.filled = record.filled
+        self.remaining = record.remaining
+        self.order_status = record.status
+
+    def _on_order_update(self, record):
+        if record.trade.contract is not self.contract:
+            return
+        self._sync_order(record)
+        if record.done.is_set() and record.ack_ns is not None:
+            # The ack arrives after the cycle that placed the order, so it only feeds the histogram
+            self.latency.histograms['order_ack'].record(record.ack_ns - record.submitted_ns)
+
+    def reduce_position(self, quantity: int, price: float, tag: str, close: bool = False) -> dict:
+        # Exits reduce the open position: sell a long, buy back a short.
+        # Returns the part closed (captured before any reset) for PnL.
+        state = self.state
+        # Realize the move up to the exit price before the position shrinks
+        self.revalue(price)
+        if quantity > 0:
+            action = 'SELL' if state['position'] == 'long' else 'BUY'
+            self.order = self.orders.submit(self.contract, MarketOrder(action, quantity), reference_price=price, tag=tag)
+            self._sync_order(self.order)
+
+        closed = {**state, 'quantity': quantity}
+        if close:
+            state['position'] = None
+            state['entry_price'] = None
+            state['entry_date'] = None
+            state['source'] = None
+            state['partial_exit_done'] = False
+            state['quantity'] = 0
+        else:
+            state['quantity'] = state['quantity'] - quantity
+        return closed
+
+    async def fetch_bars_async(self) -> np.ndarray:
+        # Only the bars missing from the local cache are requested from IBKR
+        return await self.bar_cache.fetch_async(
+            self.ib,
+            self.contract,
+            BAR_SIZE,
+            'MIDPOINT',
+            duration=DURATION,
+            refresh_tail=True,
+            as_array=True
         )
-        df = util.df(bars)
-        df_window = df.copy()
-
-        rsi_series = talib.RSI(df_window['close'], timeperiod=14)
-        latest_rsi = rsi_series.dropna().iloc[-1] if not rsi_series.dropna().empty else None
-
-        # === 2. Setup Risk Engine ===
-        risk_engine = RiskEngine(pd.Series([initial_equity]), df['close'])
-        # === 3. Get FedWatch Sentiment ===
-        fed_sentiment, fed_prob, fed_date = get_fedwatch_sentiment()
-        risk_output = risk_engine.compute_dynamic_size(df_window, fed_sentiment, fed_prob)
-        position_size_rsi = risk_output['base_size'].iloc[0] * risk_output['rsi_weight']
-        position_size_fomc = risk_output['base_size'].iloc[0] * risk_output['fomc_weight']
-
-        print(f"Position Size RSI: {position_size_rsi:.2f} | Position Size FOMC: {position_size_fomc:.2f}")
-        # === 4. Apply Strategy ===
-        plan = combined_rsi_fomc_logic(
-            df_window,
-            fed_sentiment,
-            fed_prob,
-            fed_date,
-            state,
-            position_size_rsi,
-            position_size_fomc
+
+    async def gather_inputs(self) -> dict:
+        # The cycle's independent I/O (bars, account values, positions, FedWatch)
+        # requested concurrently, so it waits for the slowest instead of the sum.
+        # Only missing bars fail the cycle; the rest fall back to the last known values.
+        fetch_start = time.perf_counter_ns()
+        bars, account = await asyncio.gather(self.fetch_bars_async(), self.gather_account(), return_exceptions=True)
+        fetch_ns = time.perf_counter_ns() - fetch_start
+
+        if isinstance(bars, Exception):
+            raise bars
+        if not len(bars):
+            raise RuntimeError('no bars returned')
+        return {'bars': bars, 'fetch_ns': fetch_ns, **account}
+
+    async def gather_account(self) -> dict:
+        # Account values, positions and FedWatch, concurrently; never raises
+        ib = self.ib
+        summary, positions, sentiment = await asyncio.gather(
+            ib.accountSummaryAsync(),
+            ib.reqPositionsAsync(),
+            asyncio.to_thread(get_fedwatch_sentiment, datetime.datetime.now(datetime.timezone.utc).date()),
+            return_exceptions=True
         )
-        print(f"Returned plan: {plan}")
-        signal = plan['signal']
-        print(f"Signal: {signal}")
-        source = plan['type']
-
-        # === 5. Place Order ===
-        if signal in ['BUY', 'SELL']:
-            size = position_size_rsi if source == 'RSI' else position_size_fomc
-            round_size = int(np.floor(size))  # Ensure size is an integer
-
-            order = MarketOrder(signal, round_size)
-            trade = ib.placeOrder(contract, order)
-            ib.sleep(1)  # give IBKR time to process order status
-
-            executed_size = trade.orderStatus.filled
-            filled = trade.orderStatus.filled
-            remaining = trade.orderStatus.remaining
-            order_status = trade.orderStatus.status
-
-            print(f"{datetime.datetime.now()} - Placed {signal} order of size {size:.2f} ({source})")
-            print(f"📥 Order Status: {order_status} | Filled: {filled} | Remaining: {remaining}")
-
-            if signal == 'BUY':
-                state['position'] = 'long'
-                state['entry_price'] = df_window['close'].iloc[-1]
-                state['entry_date'] = df_window['date'].iloc[-1]
-                state['source'] = source
-                state['partial_exit_done'] = False
-            elif signal == 'SELL':
-                state['position'] = 'short'
-                state['entry_price'] = df_window['close'].iloc[-1]
-                state['entry_date'] = df_window['date'].iloc[-1]
+        equity = None
+        if isinstance(summary, Exception):
+            print(f"⚠️ Account summary failed ({summary}); carrying equity forward")
+        else:
+            equity = net_liquidation(summary) * self.equity_share
+        if isinstance(positions, Exception):
+            print(f"⚠️ Positions request failed ({positions}); skipping the position check")
+        if isinstance(sentiment, Exception):
+            print(f"⚠️ FedWatch lookup failed ({sentiment}); using the bar date")
+            sentiment = None
+        return {'equity': equity, 'sentiment': sentiment, 'positions_ok': not isinstance(positions, Exception)}
+
+    async def run_cycle_async(self):
+        inputs = await self.gather_inputs()
+        if inputs.pop('positions_ok'):
+            self.check_position()
+        self.run_cycle(**inputs)
+
+    async def run_streamed_cycle(self, ring, fetch_ns: int = 0):
+        # The streamer supplies the closed bar; equity and the broker position
+        # are still refreshed first, as in run_cycle_async
+        fetch_start = time.perf_counter_ns()
+        inputs = await self.gather_account()
+        if inputs.pop('positions_ok'):
+            self.check_position()
+        self.run_cycle(ring, fetch_ns + time.perf_counter_ns() - fetch_start, **inputs)
+
+    def run_cycle(self, bars, fetch_ns: int = 0, equity: float = None, sentiment: tuple = None):
+        # bars: a fetched window (BarCache array or DataFrame), merged into the
+        # session's ring, or a streamer's own BarRing.
+        # fetch_ns: time the caller spent getting inputs, recorded as the fetch stage
+        # equity: account equity for this session if fetched, else carried forward
+        # sentiment: FedWatch (sentiment, probability, meeting) if fetched, else looked up for the bar date
+        timer = self.latency
+        timer.start_cycle()
+        if fetch_ns:
+            timer.record('fetch', fetch_ns)
+        ib = self.ib
+        contract = self.contract
+        state = self.state
+        initial_equity = self.initial_equity
+        indicators = self.indicators
+
+        try:
+            window = bars if isinstance(bars, BarRing) else self.bars.update(bars)
+            # Sizing uses the current account equity, not the equity at startup
+            self.revalue(window.last_close, equity)
+
+            # Only bars newer than the last cycle are fed to the indicators
+            with timer.span('indicator'):
+                indicators.update_bars(window)
+                latest_rsi = indicators.rsi.value
+
+            with timer.span('risk'):
+                # === 2. Risk Engine (ATR/vol state cached across cycles) ===
+                risk_engine = self.risk_engine
+                # === 3. Get FedWatch Sentiment ===
+                # Fetched with the bars, or as of the latest bar (the bar's date in a replay)
+                if sentiment is None:
+                    sentiment = get_fedwatch_sentiment(window.last_date.date())
+                fed_sentiment, fed_prob, fed_date = sentiment
+                risk_output = risk_engine.compute_dynamic_size(window, fed_sentiment, fed_prob)
+                position_size_rsi = risk_output['base_size'] * risk_output['rsi_weight']
+                position_size_fomc = risk_output['base_size'] * risk_output['fomc_weight']
+
+            print(f"Position Size RSI: {position_size_rsi:.2f} | Position Size FOMC: {position_size_fomc:.2f}")
+            # === 4. Apply Strategy ===
+            with timer.span('strategy'):
+                plan = combined_rsi_fomc_logic(
+                    window,
+                    fed_sentiment,
+                    fed_prob,
+                    fed_date,
+                    state,
+                    position_size_rsi,
+                    position_size_fomc,
+                    indicators=indicators
+                )
+            print(f"Returned plan: {plan}")
+            signal = plan['signal']
+            print(f"Signal: {signal}")
+            source = plan['type']
+
+            # === 5. Place Order ===
+            price = window.last_close
+            closed = None
+            if signal in ['BUY', 'SELL']:
+                size = position_size_rsi if source == 'RSI' else position_size_fomc
+                if not np.isfinite(size) or size < 1:
+                    # No usable size (e.g. NaN while the ATR warms up): skip the entry
+                    print(f"⚠️ {signal} ({source}) skipped: position size {size}")
+                    signal = 'HOLD'
+            if signal in ['BUY', 'SELL']:
+                round_size = int(np.floor(size))  # Ensure size is an integer
+                # Entries are position targets, as in the backtest: a reversal also
+                # flattens the opposite position, and a repeated FOMC entry in the
+                # same direction only tops up or trims to the new size
+                reversing = state['position'] == ('short' if signal == 'BUY' else 'long')
+                holding = state['position'] == ('long' if signal == 'BUY' else 'short')
+                order_size = round_size + (int(state['quantity']) if reversing else 0)
+                action = signal
+                if reversing:
+                    closed = dict(state)
+                elif holding:
+                    order_size = round_size - int(state['quantity'])
+                    if order_size < 0:
+                        action, order_size = ('SELL' if signal == 'BUY' else 'BUY'), -order_size
+
+                if order_size:
+                    with timer.span('order_submit'):
+                        order = MarketOrder(action, order_size)
+                        self.order = self.orders.submit(contract, order, reference_price=price, tag=source)
+                    # Fill details keep arriving through _on_order_update after the cycle returns
+                    self._sync_order(self.order)
+                    print(f"{datetime.datetime.now()} - Placed {action} order of size {order_size} ({source})")
+                    print(f"📥 Order Status: {self.order_status} | Filled: {self.filled} | Remaining: {self.remaining}")
+
+                state['position'] = 'long' if signal == 'BUY' else 'short'
+                state['entry_price'] = price
+                state['entry_date'] = window.last_date
                 state['source'] = source
                 state['partial_exit_done'] = False
+                state['quantity'] = round_size
 
-        elif signal in ['CLOSE', 'PARTIAL_SELL', 'PARTIAL_COVER']:
-            print(f"{datetime.datetime.now()} - {signal} triggered")
-            if signal == 'CLOSE':
-                state['position'] = None
-                state['entry_price'] = None
-                state['entry_date'] = None
-                state['source'] = None
-                state['partial_exit_done'] = False
+            elif signal in ['CLOSE', 'PARTIAL_SELL', 'PARTIAL_COVER']:
+                with timer.span('order_submit'):
+                    closed = self.reduce_position(int(plan['size']), price, signal, close=signal == 'CLOSE')
+                print(f"{datetime.datetime.now()} - {signal} triggered: {closed['quantity']} ({closed['position']})")
 
-    except Exception as e:
-        print(f"❌ Error: {e}")
+        except Exception:
+            # Keep whatever state changed before the failure, then let the caller report it
+            self.persist()
+            raise
 
-    latency_ms = (time.time() - start_time) * 1000
+        # Decision latency: fetch through order submit, excluding the ack wait
+        latency_ms = timer.decision_ms()
+        log_start = time.perf_counter_ns()
 
-    # Simulate equity change
-    current_price = df_window['close'].iloc[-1]
-    if state['position'] == 'long':
-        live_equity = initial_equity + (current_price - state['entry_price']) * plan['size']
-    elif state['position'] == 'short':
-        live_equity = initial_equity + (state['entry_price'] - current_price) * plan['size']
-    else:
-        live_equity = initial_equity
-
-    # Compute drawdown
-    if state['position'] is not None and live_equity > max_equity:
-        max_equity = live_equity
-    
-    drawdown = live_equity - max_equity
-    # Telegram alert if drawdown exceeds -5%
-    if drawdown < -DRAW_DOWN_ALERT * initial_equity:
-        send_telegram_alert(f"⚠️ Drawdown Alert!\nLive equity has dropped to {live_equity:.2f} USD\nDD: {drawdown:.2f} USD")
-
-    # === PnL and Trade Metadata ===
-    if signal == 'CLOSE':
-        direction = state['position']
-        entry_price = state['entry_price']
-        exit_price = current_price
-        trade_type = 'exit'
-
-        if direction == 'long':
-            pnl = (exit_price - entry_price) * plan['size']
-        elif direction == 'short':
-            pnl = (entry_price - exit_price) * plan['size']
+        # Account equity at the last close (realized and open PnL included)
+        current_price = window.last_close
+        live_equity = self.revalue(current_price)
+
+        # Compute drawdown
+        if live_equity > self.max_equity:
+            self.max_equity = live_equity
+
+        drawdown = live_equity - self.max_equity
+        self.persist()
+        self.risk_monitor.sync()
+        # Telegram alert if drawdown exceeds -5%
+        drawdown_alert = SETTINGS.risk().drawdown_alert_threshold
+        if drawdown < -drawdown_alert * initial_equity:
+            # Queued in the background; repeats within a severity band are held back by the per-key cooldown
+            send_telegram_alert(
+                f"⚠️ Drawdown Alert!\nLive equity has dropped to {live_equity:.2f} USD\nDD: {drawdown:.2f} USD",
+                key=drawdown_key(contract.symbol, drawdown, drawdown_alert * initial_equity)
+            )
+
+        # === PnL and Trade Metadata ===
+        if closed is not None:
+            # Position (or the part of it) closed this cycle, captured before the state reset
+            direction = closed['position']
+            entry_price = closed['entry_price']
+            exit_price = current_price
+            trade_type = 'exit' if signal in ['CLOSE', 'BUY', 'SELL'] else 'partial'
+
+            if direction == 'long':
+                pnl = (exit_price - entry_price) * closed['quantity']
+            elif direction == 'short':
+                pnl = (entry_price - exit_price) * closed['quantity']
+            else:
+                pnl = 0
         else:
+            trade_type = 'entry' if signal in ['BUY', 'SELL'] else 'hold'
+            direction = state['position']
+            exit_price = None
             pnl = 0
+
+        # 10 bar volatility from the streaming indicators
+        short_vol_10d = indicators.short_vol.value
+
+        # === 6. Log Strategy State ===
+        print("\n🕒 [LOG UPDATE] Strategy Status:")
+        print(f"📅 Current Time: {datetime.datetime.now()}")
+        print(f"📊 Signal: {signal}")
+        print(f"📈 Price: {window.last_close:.2f}")
+        print(f"⚙️ Source: {source}")
+        print(f"💰 Position: {state['position']}")
+        print(f"🛠 Entry Price: {state['entry_price']}")
+        print(f"⏳ Entry Date: {state['entry_date']}")
+        print(f"📦 RSI Size: {position_size_rsi:.2f} | FOMC Size: {position_size_fomc:.2f}")
+        print(f"🎯 Sentiment: {fed_sentiment} | Prob: {fed_prob:.1f}% | Meeting: {fed_date}")
+        print(f"🪙 Equity (initial): {initial_equity:.2f}")
+        print(f"⏱ Latency: {latency_ms:.2f} ms")
+        print(f"📊 Short Volatility: {risk_output['short_vol']:.2f}")
+        print(f"📊 Long Volatility: {risk_output['long_vol']:.2f}")
+        print(f"💵 Live Equity: {live_equity:.2f}")
+        print("Volatility (10d):", short_vol_10d)
+        print(f"📉 Drawdown: {drawdown:.2f}")
+        print(f"📉 RSI (14): {latest_rsi:.2f}" if latest_rsi else "📉 RSI: N/A")
+        print("----------------------------------------------------------")
+
+        # === Default values if no trade was placed ===
+        executed_size = self.executed_size if self.executed_size is not None else 0
+        order_status = self.order_status if self.order_status is not None else 'None'
+        filled = self.filled if self.filled is not None else 0
+        remaining = self.remaining if self.remaining is not None else 0
+
+        if self.order is not None and self.order.filled:
+            executed_price = self.order.avg_fill_price
+            slippage = abs(self.order.slippage)
+        else:
+            executed_price = 0
+            slippage = 0
+
+        log_to_csv(
+            timestamp=datetime.datetime.now().isoformat(),
+            signal=signal,
+            source=source,
+            price=window.last_close,
+            position=state['position'],
+            entry_price=state['entry_price'],
+            entry_date=state['entry_date'].isoformat() if state['entry_date'] else None,
+            rsi_size=float(position_size_rsi),
+            fomc_size=float(position_size_fomc),
+            sentiment=fed_sentiment,
+            probability=fed_prob,
+            fed_date=fed_date.isoformat(),
+            equity=initial_equity,
+            live_equity=live_equity,
+            drawdown=drawdown,
+            latency_ms=latency_ms,
+            short_vol=risk_output['short_vol'],
+            long_vol=risk_output['long_vol'],
+            executed_size=executed_size,
+            order_status=order_status,
+            filled=filled,
+            remaining=remaining,
+            pnl=pnl,
+            slippage=slippage if slippage else 0,
+            trade_type=trade_type,
+            direction=direction,
+            exit_price=exit_price,
+            volatility_10d=short_vol_10d,
+            rsi_14=latest_rsi,
+            filepath=self.log_path
+        )
+
+        timer.record('log', time.perf_counter_ns() - log_start)
+        self.latency_recorder.record(timer, self.contract.symbol)
+
+        print("✅ Log updated to CSV.")
+        print(f"⏱ Stages (ms): " + " | ".join(f"{stage} {ms:.2f}" for stage, ms in timer.cycle_ms().items()))
+        print("----------------------------------------------------------")
+
+
+# === IBKR Setup ===
+def connect(ib=None):
+    ib = ib if ib is not None else IB()
+    ib.connect(HOST, PORT, clientId=CLIENT_ID)
+    contract = Contract(symbol=SYMBOL, secType=SEC_TYPE, exchange=EXCHANGE, currency=CURRENCY)
+    ib.qualifyContracts(contract)
+    return ib, contract
+
+
+def run_polling(session: LiveSession):
+    while True:
+        try:
+            # === 1. Get Latest Data (bars, account, positions, FedWatch at once) ===
+            session.ib.run(session.run_cycle_async())
+        except Exception as e:
+            print(f"❌ Error: {e}")
+
+        # ib.sleep keeps processing order events while waiting for the next cycle
+        session.ib.sleep(CYCLE_SECONDS)
+
+
+def main(ib=None, stream=STREAMING_ENABLED):
+    ib, contract = connect(ib)
+    session = LiveSession(ib, contract)
+    if stream:
+        from live_stream import run_streaming
+        run_streaming(session)
     else:
-        trade_type = 'entry' if signal in ['BUY', 'SELL'] else 'hold'
-        direction = state['position']
-        exit_price = None
-        pnl = 0
-
-    # Compute 10 day volatility
-    returns = df_window['close'].pct_change()
-    short_vol_10d = risk_engine.realized_volatility(returns, 10).iloc[-1]
-
-    # === 6. Log Strategy State ===
-    print("\n🕒 [LOG UPDATE] Strategy Status:")
-    print(f"📅 Current Time: {datetime.datetime.now()}")
-    print(f"📊 Signal: {signal}")
-    print(f"📈 Price: {df_window['close'].iloc[-1]:.2f}")
-    print(f"⚙️ Source: {source}")
-    print(f"💰 Position: {state['position']}")
-    print(f"🛠 Entry Price: {state['entry_price']}")
-    print(f"⏳ Entry Date: {state['entry_date']}")
-    print(f"📦 RSI Size: {position_size_rsi:.2f} | FOMC Size: {position_size_fomc:.2f}")
-    print(f"🎯 Sentiment: {fed_sentiment} | Prob: {fed_prob:.1f}% | Meeting: {fed_date}")
-    print(f"🪙 Equity (simulated): {initial_equity:.2f}")
-    print(f"⏱ Latency: {latency_ms:.2f} ms")
-    print(f"📊 Short Volatility: {risk_output['short_vol']:.2f}")
-    print(f"📊 Long Volatility: {risk_output['long_vol']:.2f}")
-    print(f"💵 Live Equity: {live_equity:.2f}")
-    print("Volatility (10d):", short_vol_10d)
-    print(f"📉 Drawdown: {drawdown:.2f}")
-    print(f"📉 RSI (14): {latest_rsi:.2f}" if latest_rsi else "📉 RSI: N/A")
-    print("----------------------------------------------------------")
-
-    # === Default values if no trade was placed ===
-    executed_size = executed_size if executed_size is not None else 0
-    order_status = order_status if order_status is not None else 'None'
-    filled = filled if filled is not None else 0
-    remaining = remaining if remaining is not None else 0
-
-    try:
-        executed_price = trade.orderStatus.avgFillPrice
-        slippage = abs(executed_price - df_window['close'].iloc[-1])
-    except NameError:
-        executed_price = 0
-        slippage = 0
-
-    log_to_csv(
-        timestamp=datetime.datetime.now().isoformat(),
-        signal=signal,
-        source=source,
-        price=df_window['close'].iloc[-1],
-        position=state['position'],
-        entry_price=state['entry_price'],
-        entry_date=state['entry_date'].isoformat() if state['entry_date'] else None,
-        rsi_size=float(position_size_rsi),
-        fomc_size=float(position_size_fomc),
-        sentiment=fed_sentiment,
-        probability=fed_prob,
-        fed_date=fed_date.isoformat(),
-        equity=initial_equity,
-        live_equity=live_equity,
-        drawdown=drawdown,
-        latency_ms=latency_ms,
-        short_vol=risk_output['short_vol'],
-        long_vol=risk_output['long_vol'],
-        executed_size=executed_size,
-        order_status=order_status,
-        filled=filled,
-        remaining=remaining,
-        pnl=pnl,
-        slippage=slippage if slippage else 0,
-        trade_type=trade_type,
-        direction=direction,
-        exit_price=exit_price,
-        volatility_10d=short_vol_10d,
-        rsi_14=latest_rsi
-    )
-    
-    print("✅ Log updated to CSV.")
-    print("----------------------------------------------------------")
-
-    # After running the full strategy:
-    sleep_total = 4 * 60 * 60  # 4 hours total
-    heartbeat_interval = 30 * 60  # every 30 minutes
-    slept = 0
-
-    time.sleep(4 * 60 * 60)  # Sleep for the remainder of the cycle
\ No newline at end of file
+        run_polling(session)
+
+
+if __name__ == '__main__':
+    main(stream=STREAMING_ENABLED or '--stream' in sys.argv)
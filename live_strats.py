@@ -1,4 +1,13 @@
+import numpy as np
+import pandas as pd
 from talib import RSI, MACD
+import strategy_core
+from settings_loader import SETTINGS
+
+
+def day_number(value) -> int:
+    # Calendar day number, the convention backtest_engine uses for day_num
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64))
 
 
 # === State Tracking ===
@@ -17,66 +26,61 @@ def combined_rsi_fomc_logic(
     fed_date,
     state,
     position_size_rsi,
-    position_size_fomc
+    position_size_fomc,
+    indicators=None,
+    params=None
 ):
-    now = df_window['date'].iloc[-1].date()
-    close = df_window['close'].iloc[-1]
+    # df_window: BarRing (zero-copy column views) or DataFrame
+    closes = np.asarray(df_window['close'], dtype=np.float64)
+    now = pd.Timestamp(np.asarray(df_window['date'])[-1]).date()
+    close = closes[-1]
 
     # === Indicators ===
-    rsi_series = RSI(df_window['close'], timeperiod=14)
-    macd_line, macd_signal, _ = MACD(df_window['close'])
-
-    if rsi_series.dropna().empty or macd_line.dropna().empty or macd_signal.dropna().empty:
-        return {'signal': 'HOLD', 'type': None, 'size': 0}
-    print("RSI Series:", rsi_series)
-    print("MACD Line:", macd_line)
-    print("MACD Signal:", macd_signal)
+    if indicators is not None:
+        # Streaming IndicatorSet already updated with this bar
+        rsi = indicators.rsi.value
+        macd_val = indicators.macd.macd
+        macd_sig = indicators.macd.signal
+        if rsi is None or macd_val is None or macd_sig is None:
+            return {'signal': 'HOLD', 'type': None, 'size': 0}
+    else:
+        rsi_series = pd.Series(RSI(closes, timeperiod=14))
+        macd_line, macd_signal, _ = (pd.Series(line) for line in MACD(closes))
 
-    rsi = rsi_series.dropna().iloc[-1]
-    macd_val = macd_line.dropna().iloc[-1]
-    macd_sig = macd_signal.dropna().iloc[-1]
+        if rsi_series.dropna().empty or macd_line.dropna().empty or macd_signal.dropna().empty:
+            return {'signal': 'HOLD', 'type': None, 'size': 0}
 
-    # === FOMC Logic ===
-    if sentiment == 'HIKE' and prob >= 70 and (fed_date - now).days <= 5:
-        return {'signal': 'SELL', 'type': 'FOMC', 'size': position_size_fomc}
-    elif sentiment == 'CUT' and prob >= 70 and (fed_date - now).days <= 5:
-        return {'signal': 'BUY', 'type': 'FOMC', 'size': position_size_fomc}
-    elif sentiment == 'STAY' and prob >= 70 and (fed_date - now).days <= 5:
-        return {'signal': 'HOLD', 'type': None, 'size': 0}
+        rsi = rsi_series.dropna().iloc[-1]
+        macd_val = macd_line.dropna().iloc[-1]
+        macd_sig = macd_signal.dropna().iloc[-1]
 
-    # === RSI Entry Logic ===
-    if rsi < 35 and state['position'] is None:
-        return {'signal': 'BUY', 'type': 'RSI', 'size': position_size_rsi}
-    elif rsi > 85 and state['position'] is None:
-        return {'signal': 'SELL', 'type': 'RSI', 'size': position_size_rsi}
-
-    entry = state.get('entry_price')
+    # === Strategy Kernel (same rules as the backtester) ===
+    params = {**strategy_core.DEFAULT_PARAMS, **(params or {})}
+    day = day_number(now)
+    fomc_dir, rsi_allowed = strategy_core.fomc_inputs(sentiment, prob, day_number(fed_date), day, params)
     entry_date = state.get('entry_date')
-    source = state.get('source')
-
-    if entry is None or entry_date is None:
-        return {'signal': 'HOLD', 'type': None, 'size': 0}
-
-    # === Manage Long ===
-    if state['position'] == 'long':
-        if source == 'RSI':
-            if not state['partial_exit_done'] and close >= entry * 1.015 and macd_sig < macd_val:
-                state['partial_exit_done'] = True
-                return {'signal': 'PARTIAL SELL', 'type': 'RSI', 'size': position_size_rsi * 0.4}
-            if (now - entry_date).days >= 15:
-                return {'signal': 'CLOSE', 'type': 'RSI', 'size': position_size_rsi}
-        if close >= entry * 1.05 or close <= entry * 0.97:
-            return {'signal': 'CLOSE', 'type': source, 'size': position_size_rsi if source == 'RSI' else position_size_fomc}
+    entry_price = state.get('entry_price')
 
-    # === Manage Short ===
-    elif state['position'] == 'short':
-        if source == 'RSI':
-            if not state['partial_exit_done'] and close <= entry * 0.985 and macd_sig > macd_val:
-                state['partial_exit_done'] = True
-                return {'signal': 'PARTIAL COVER', 'type': 'RSI', 'size': position_size_rsi * 0.4}
-            if (now - entry_date).days >= 15:
-                return {'signal': 'CLOSE', 'type': 'RSI', 'size': position_size_rsi}
-        if close <= entry * 0.95 or close >= entry * 1.03:
-            return {'signal': 'CLOSE', 'type': source, 'size': position_size_rsi if source == 'RSI' else position_size_fomc}
+    action, _, _, _, _, source, _ = strategy_core.step(
+        strategy_core.POSITION_CODES[state['position']],
+        float(entry_price) if entry_price is not None else np.nan,
+        day_number(entry_date) if entry_date is not None else day,
+        strategy_core.SOURCE_CODES[state.get('source')],
+        bool(state['partial_exit_done']),
+        float(close), float(rsi), float(macd_val), float(macd_sig),
+        day, int(fomc_dir), bool(rsi_allowed),
+        strategy_core.param_array(params)
+    )
+    signal = strategy_core.SIGNALS[action]
+    quantity = state.get('quantity') or 0
 
-    return {'signal': 'HOLD', 'type': None, 'size': 0}
\ No newline at end of file
+    if action in (strategy_core.BUY, strategy_core.SELL):
+        source = strategy_core.SOURCES[source]
+        return {'signal': signal, 'type': source, 'size': position_size_rsi if source == 'RSI' else position_size_fomc}
+    if action in (strategy_core.PARTIAL_SELL, strategy_core.PARTIAL_COVER):
+        state['partial_exit_done'] = True
+        return {'signal': signal, 'type': state['source'], 'size': np.floor(quantity * SETTINGS.execution().partial_fraction)}
+    if action == strategy_core.CLOSE:
+        # A partial target hit on the closing bar is folded into the one closing order
+        return {'signal': signal, 'type': state['source'], 'size': quantity}
+    return {'signal': 'HOLD', 'type': None, 'size': 0}
@@ -0,0 +1,77 @@
+# Event-driven market data path for the live loop
+# Subscribes to keepUpToDate historical bars and evaluates the strategy only
+# when a bar closes, instead of re-downloading the full history every cycle.
+
+import asyncio
+import time
+from ib_insync import util
+from bar_ring import BarRing
+from settings_loader import DURATION, BAR_SIZE, STREAM_BUFFER_BARS
+
+
+class BarStreamer:
+    def __init__(self, ib, contract, on_bar_close, duration: str = DURATION, bar_size: str = BAR_SIZE,
+                 max_bars: int = STREAM_BUFFER_BARS, what_to_show: str = 'MIDPOINT'):
+        self.ib = ib
+        self.contract = contract
+        self.on_bar_close = on_bar_close
+        self.duration = duration
+        self.bar_size = bar_size
+        self.what_to_show = what_to_show
+        self.buffer = BarRing(max_bars)
+        self.bars_closed = 0
+        self.errors = 0
+        self._closed = asyncio.Queue()
+
+    def _on_update(self, bars, has_new_bar):
+        # A new bar was appended, so the one before it has just closed
+        if has_new_bar and len(bars) >= 2:
+            self._closed.put_nowait(bars[-2])
+
+    async def run(self):
+        bars = await self.ib.reqHistoricalDataAsync(
+            self.contract,
+            endDateTime='',
+            durationStr=self.duration,
+            barSizeSetting=self.bar_size,
+            whatToShow=self.what_to_show,
+            useRTH=False,
+            formatDate=2,  # UTC, like BarCache; 1 would give naive TWS-local times
+            keepUpToDate=True
+        )
+        self.buffer.extend(bars[:-1])  # the last bar is still forming
+        print(f"📡 Streaming {self.bar_size} bars for {self.contract.symbol} ({len(self.buffer)} bars buffered)")
+
+        bars.updateEvent += self._on_update
+        try:
+            while True:
+                bar = await self._closed.get()
+                if bar is None:
+                    break
+                fetch_start = time.perf_counter_ns()
+                self.buffer.append(bar)
+                self.bars_closed += 1
+                # The ring itself is passed on: indicators read views, no DataFrame is built.
+                # on_bar_close may be a coroutine function (e.g. LiveSession.run_streamed_cycle)
+                try:
+                    result = self.on_bar_close(self.buffer, time.perf_counter_ns() - fetch_start)
+                    if asyncio.iscoroutine(result):
+                        await result
+                except Exception as e:
+                    # A failed cycle skips this bar; the stream carries on with the next
+                    self.errors += 1
+                    print(f"❌ Cycle failed on bar {bar.date}: {e}")
+        finally:
+            bars.updateEvent -= self._on_update
+            self.ib.cancelHistoricalData(bars)
+
+    def stop(self):
+        # Bars already queued are processed before run() returns
+        self._closed.put_nowait(None)
+
+
+def run_streaming(session):
+    # Allow the blocking IB calls made inside a cycle to run on the event loop
+    util.patchAsyncio()
+    streamer = BarStreamer(session.ib, session.contract, session.run_streamed_cycle)
+    session.ib.run(streamer.run())
@@ -0,0 +1,153 @@
+# Incremental reader for the trade log CSV
+# Remembers the byte offset it has parsed up to, so each refresh only parses
+# rows appended since the last one. Chart series and rolling metrics are
+# carried forward from the previous refresh instead of recomputed.
+
+import io
+import os
+import json
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+
+
+class RollingMetrics:
+    # Same definitions as the dashboard: rolling Sharpe of live_equity returns
+    # and max drawdown of the compounded return path
+    def __init__(self, window: int = 20):
+        self.window = window
+        self.returns = deque(maxlen=window)
+        self.last_equity = None
+        self.cum = 1.0
+        self.peak = -np.inf
+        self.max_drawdown = 0.0
+
+    def update(self, equity: np.ndarray):
+        if len(equity) == 0:
+            return
+        prev = np.concatenate([[self.last_equity if self.last_equity is not None else np.nan], equity[:-1]])
+        returns = equity / prev - 1
+        self.last_equity = equity[-1]
+
+        valid = returns[~np.isnan(returns)]
+        if len(valid):
+            cum = self.cum * np.cumprod(1 + valid)
+            peak = np.maximum.accumulate(np.maximum(cum, self.peak))
+            self.max_drawdown = min(self.max_drawdown, float((cum / peak - 1).min()))
+            self.cum, self.peak = cum[-1], peak[-1]
+        self.returns.extend(valid[-self.window:])
+
+    @property
+    def rolling_sharpe(self):
+        if len(self.returns) < self.window:
+            return None
+        returns = np.array(self.returns)
+        std = returns.std(ddof=1)
+        return returns.mean() / std if std else None
+
+
+class LogTail:
+    def __init__(self, path: str, max_points: int = 2000):
+        self.path = path
+        self.max_points = max_points
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.offset = 0
+        self.columns = None
+        self.row_offsets = []  # byte offset of every data row, for paging
+        self.timestamps = []
+        self.live_equity = []
+        self.initial_equity = None
+        self.last_row = None
+        self.metrics = RollingMetrics()
+
+    def __len__(self):
+        return len(self.row_offsets)
+
+    def _parse(self, data: bytes) -> pd.DataFrame:
+        df = pd.read_csv(io.BytesIO(data), header=None, names=self.columns)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        return df
+
+    def refresh(self) -> int:
+        # Parses rows appended since the last call; returns how many
+        with self._lock:
+            if not os.path.isfile(self.path):
+                return 0
+            size = os.path.getsize(self.path)
+            if size < self.offset:
+                # Log was truncated or rotated
+                self.reset()
+            if size == self.offset:
+                return 0
+
+            with open(self.path, 'rb') as f:
+                f.seek(self.offset)
+                data = f.read(size - self.offset)
+
+            # Only consume complete lines; a partial last row waits for the next refresh
+            end = data.rfind(b'\n') + 1
+            if end == 0:
+                return 0
+            data = data[:end]
+            base = self.offset
+            self.offset += end
+
+            if self.columns is None:
+                header_end = data.index(b'\n') + 1
+                self.columns = data[:header_end].decode('utf-8').strip().split(',')
+                data = data[header_end:]
+                base += header_end
+                if not data:
+                    return 0
+
+            starts = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == ord('\n'))[:-1] + 1
+            self.row_offsets.extend([base] + (base + starts).tolist())
+
+            new = self._parse(data)
+            if self.initial_equity is None:
+                self.initial_equity = float(new['equity'].iloc[0])
+            self.timestamps.extend(new['timestamp'].tolist())
+            self.live_equity.extend(new['live_equity'].astype(float).tolist())
+            self.metrics.update(new['live_equity'].to_numpy(dtype=np.float64))
+            self.last_row = new.iloc[-1]
+            return len(new)
+
+    def chart_frame(self) -> pd.DataFrame:
+        # live_equity and cum_pnl, downsampled to at most max_points (last row always kept)
+        n = len(self.live_equity)
+        step = max(1, int(np.ceil(n / self.max_points)))
+        idx = list(range(0, n, step))
+        if idx and idx[-1] != n - 1:
+            idx.append(n - 1)
+        equity = np.array(self.live_equity)[idx]
+        return pd.DataFrame(
+            {'live_equity': equity, 'cum_pnl': equity - self.initial_equity},
+            index=pd.Index([self.timestamps[i] for i in idx], name='timestamp')
+        )
+
+    def read_rows(self, start: int, stop: int) -> pd.DataFrame:
+        # Reads rows [start, stop) straight from the file using the offset index
+        start, stop = max(0, start), min(stop, len(self.row_offsets))
+        if start >= stop:
+            return pd.DataFrame(columns=self.columns)
+        end_offset = self.row_offsets[stop] if stop < len(self.row_offsets) else self.offset
+        with open(self.path, 'rb') as f:
+            f.seek(self.row_offsets[start])
+            data = f.read(end_offset - self.row_offsets[start])
+        df = self._parse(data)
+        df.index = range(start, stop)
+        return df
+
+
+def read_latency_summary(log_path: str) -> dict:
+    # Percentile snapshot written next to the trade log by latency.LatencyRecorder
+    root, _ = os.path.splitext(log_path)
+    path = root + '_latency_summary.json'
+    if not os.path.isfile(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -1,6 +1,202 @@
-import pandas as pd
-from settings_loader import LOG_FILE_PATH
 import os
+import io
+import csv
+import time
+import atexit
+import sqlite3
+import threading
+# Importable from the repo root and as the live_trading package (dashboard)
+if __package__:
+    from .settings_loader import LOG_FILE_PATH, LOG_SINKS, LOG_BUFFER_ROWS, LOG_FLUSH_SECONDS
+else:
+    from settings_loader import LOG_FILE_PATH, LOG_SINKS, LOG_BUFFER_ROWS, LOG_FLUSH_SECONDS
+
+# === Trade Log Schema ===
+LOG_COLUMNS = (
+    'timestamp', 'signal', 'source', 'price', 'position', 'entry_price', 'entry_date',
+    'rsi_size', 'fomc_size', 'sentiment', 'probability', 'fed_date', 'equity', 'live_equity',
+    'drawdown', 'latency_ms', 'short_vol', 'long_vol',
+    'executed_size', 'order_status', 'filled', 'remaining',
+    'pnl', 'slippage', 'trade_type', 'direction', 'exit_price', 'volatility_10d', 'rsi_14'
+)
+
+
+class CsvSink:
+    # Each flush is formatted up front and appended with one write() on an
+    # O_APPEND descriptor, so batches from concurrent writers do not interleave.
+    # Only a short write (e.g. disk full) splits a batch; the rest is retried.
+    def __init__(self, filepath: str, columns: tuple = LOG_COLUMNS):
+        self.filepath = filepath
+        self.columns = columns
+
+    def write(self, rows: list):
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator='\n')
+        new_file = not os.path.isfile(self.filepath) or os.path.getsize(self.filepath) == 0
+        if new_file:
+            writer.writerow(self.columns)
+        writer.writerows([['' if row.get(col) is None else row.get(col) for col in self.columns] for row in rows])
+
+        data = buf.getvalue().encode('utf-8')
+        fd = os.open(self.filepath, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            while data:
+                written = os.write(fd, data)
+                data = data[written:]
+        finally:
+            os.close(fd)
+
+    def close(self):
+        pass
+
+
+class SQLiteSink:
+    def __init__(self, filepath: str, columns: tuple = LOG_COLUMNS, table: str = 'trade_log'):
+        self.columns = columns
+        self.table = table
+        self.conn = sqlite3.connect(filepath, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(columns)})")
+        self.conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_timestamp ON {table} (timestamp)")
+        self._insert = f"INSERT INTO {table} VALUES ({', '.join('?' for _ in columns)})"
+
+    def write(self, rows: list):
+        with self.conn:
+            self.conn.executemany(self._insert, [tuple(_plain(row.get(col)) for col in self.columns) for row in rows])
+
+    def close(self):
+        self.conn.close()
+
+
+class ParquetSink:
+    # One complete Parquet file per flush in a directory (read it with
+    # pd.read_parquet(directory)), so a restart or crash never truncates or
+    # leaves unreadable what was already written; needs pyarrow
+    def __init__(self, directory: str, columns: tuple = LOG_COLUMNS):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        # pyarrow imports pandas on first use; import it now so the flush at
+        # exit does not have to (imports that start threads fail during shutdown)
+        import pandas
+        self._pa = pa
+        self._pq = pq
+        self.directory = directory
+        self.columns = columns
+        self.schema = pa.schema([(col, pa.string()) for col in columns])
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, rows: list):
+        table = self._pa.table(
+            {col: [None if row.get(col) is None else str(row.get(col)) for row in rows] for col in self.columns},
+            schema=self.schema
+        )
+        # Nanosecond names keep parts in write order across restarts; dot-prefixed
+        # while being written so readers skip a partial file
+        name = f"part-{time.time_ns()}.parquet"
+        tmp_path = os.path.join(self.directory, '.' + name)
+        self._pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+
+    def close(self):
+        pass
+
+
+def _plain(value):
+    # numpy scalars -> Python scalars for sqlite
+    return value.item() if hasattr(value, 'item') else value
+
+
+def make_sinks(filepath: str, sinks=LOG_SINKS) -> list:
+    root, _ = os.path.splitext(filepath)
+    factories = {
+        'csv': lambda: CsvSink(filepath),
+        'sqlite': lambda: SQLiteSink(root + '.sqlite'),
+        'parquet': lambda: ParquetSink(root + '_parquet'),
+    }
+    return [factories[name]() for name in sinks]
+
+
+class TradeLogger:
+    # Buffers rows in memory and flushes them to every sink when the buffer
+    # reaches max_rows or when flush_seconds have passed (background thread)
+    def __init__(self, sinks: list, max_rows: int = LOG_BUFFER_ROWS, flush_seconds: float = LOG_FLUSH_SECONDS):
+        self.sinks = sinks
+        self.max_rows = max_rows
+        self.flush_seconds = flush_seconds
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+        self._flusher.start()
+        _open_loggers.append(self)
+
+    def log(self, row: dict):
+        with self._lock:
+            self._buffer.append(row)
+            if len(self._buffer) < self.max_rows:
+                return
+        self.flush()
+
+    def flush(self):
+        # Swap the buffer under the lock so callers of log() never wait on I/O
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+        if not rows:
+            return
+        with self._write_lock:
+            for sink in self.sinks:
+                try:
+                    sink.write(rows)
+                except Exception as e:
+                    print(f"❌ Log flush failed ({type(sink).__name__}): {e}")
+
+    def _flush_periodically(self):
+        while not self._closed.wait(self.flush_seconds):
+            if self._buffer and time.monotonic() - self._last_flush >= self.flush_seconds:
+                self.flush()
+
+    def close(self):
+        if self in _open_loggers:
+            _open_loggers.remove(self)
+        self._closed.set()
+        self.flush()
+        for sink in self.sinks:
+            sink.close()
+
+
+_loggers = {}
+_open_loggers = []  # every TradeLogger, including the latency loggers, for the exit hook
+
+
+def get_logger(filepath: str = LOG_FILE_PATH) -> TradeLogger:
+    if filepath not in _loggers:
+        _loggers[filepath] = TradeLogger(make_sinks(filepath))
+    return _loggers[filepath]
+
+
+def close_logger(filepath: str = LOG_FILE_PATH):
+    # Flushes and closes one trade log; the next log_to_csv to it opens a new logger
+    logger = _loggers.pop(filepath, None)
+    if logger is not None:
+        logger.close()
+
+
+def flush_logs():
+    for logger in list(_open_loggers):
+        logger.flush()
+
+
+@atexit.register
+def close_logs():
+    # Final flush and close of every sink at exit
+    _loggers.clear()
+    for logger in list(_open_loggers):
+        logger.close()
+
 
 def log_to_csv(
     timestamp, signal, source, price, position, entry_price, entry_date,
@@ -42,10 +238,5 @@ def log_to_csv(
         'rsi_14': rsi_14
     }
 
-    df = pd.DataFrame([log_row])
-
-    # Append to CSV (create header if new)
-    if not os.path.isfile(filepath):
-        df.to_csv(filepath, index=False)
-    else:
-        df.to_csv(filepath, mode='a', header=False, index=False)
\ No newline at end of file
+    # Buffered: rows reach disk on size or time, see TradeLogger
+    get_logger(filepath).log(log_row)
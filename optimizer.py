@@ -0,0 +1,154 @@
+# Parameter sweep / walk-forward optimizer
+# Indicators are computed once in the parent and placed in shared memory;
+# worker processes attach to the block and replay the strategy for each
+# parameter set on every walk-forward fold.
+
+import os
+import sys
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from backtest_engine import DEFAULT_PARAMS, compute_indicators, replay, position_sizes, fed_day_numbers
+from execution_sim import simulate_execution
+
+SHARED_FIELDS = ('close', 'high', 'low', 'day_num', 'rsi', 'macd_val', 'macd_sig', 'short_vol', 'long_vol', 'current_atr', 'median_atr')
+
+# Per-worker view of the shared indicator block
+_shared = {}
+
+
+def parameter_grid(grid: dict) -> list:
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def walk_forward_folds(n_bars: int, train_bars: int, test_bars: int, warmup: int = 30) -> list:
+    # Rolling (train_start, train_end, test_end) windows stepping by test_bars
+    folds = []
+    start = warmup
+    while start + train_bars + test_bars <= n_bars:
+        folds.append((start, start + train_bars, start + train_bars + test_bars))
+        start += test_bars
+    return folds
+
+
+class SharedIndicators:
+    def __init__(self, ind: dict):
+        n = len(ind['close'])
+        self.shape = (len(SHARED_FIELDS), n)
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self.shape)) * 8)
+        block = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+        for row, field in enumerate(SHARED_FIELDS):
+            block[row] = ind[field]
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _attach(name: str, shape: tuple, sentiment, prob, fed_day, equity: float):
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    _shared['shm'] = shm
+    _shared['ind'] = {field: block[row] for row, field in enumerate(SHARED_FIELDS)}
+    _shared['context'] = (sentiment, prob, fed_day, equity)
+
+
+def _evaluate(task: tuple) -> list:
+    config_id, params, folds = task
+    ind = _shared['ind']
+    sentiment, prob, fed_day, equity = _shared['context']
+
+    # Sizes depend on vol_switch/fomc_prob, so they are per config (one vectorized pass)
+    size_rsi, size_fomc = position_sizes(ind, sentiment, prob, equity, params=params)
+
+    rows = []
+    for fold, (train_start, train_end, test_end) in enumerate(folds):
+        row = {'config_id': config_id, 'fold': fold}
+        for segment, (start, end) in (('train', (train_start, train_end)), ('test', (train_end, test_end))):
+            result = replay(ind, sentiment, prob, fed_day, params, start=start, end=end, size_rsi=size_rsi, size_fomc=size_fomc)
+            execution = simulate_execution(ind, result['trade_log'], result['sizes'], equity, start=start, end=end)
+            metrics = execution['metrics']
+            metrics['total_pnl'] = execution['equity'][-1] - equity
+            row.update({f"{segment}_{key}": value for key, value in metrics.items()})
+        rows.append(row)
+    return rows
+
+
+def run_sweep(df: pd.DataFrame, grid: dict, sentiment, prob, fed_date, train_bars: int = 1000,
+              test_bars: int = 250, equity: float = 100_000, max_workers: int = None, rank_by: str = 'test_sharpe') -> dict:
+    ind = compute_indicators(df, equity)
+    configs = [{**DEFAULT_PARAMS, **params} for params in parameter_grid(grid)]
+    folds = walk_forward_folds(len(df), train_bars, test_bars)
+    if not folds:
+        # Not enough history for a split: evaluate each config in-sample only
+        folds = [(30, len(df), len(df))]
+    fed_day = fed_day_numbers(fed_date)
+
+    shared = SharedIndicators(ind)
+    try:
+        tasks = [(config_id, params, folds) for config_id, params in enumerate(configs)]
+        workers = max_workers or os.cpu_count()
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_attach,
+            initargs=(shared.name, shared.shape, sentiment, prob, fed_day, equity)
+        ) as executor:
+            rows = [row for result in executor.map(_evaluate, tasks, chunksize=chunksize) for row in result]
+    finally:
+        shared.close()
+
+    folds_df = pd.DataFrame(rows)
+    params_df = pd.DataFrame(configs)
+    params_df.index.name = 'config_id'
+
+    # === Ranked table: out-of-sample performance aggregated over folds ===
+    summary = folds_df.groupby('config_id').agg(
+        train_sharpe=('train_sharpe', 'mean'),
+        test_sharpe=('test_sharpe', 'mean'),
+        test_pnl=('test_total_pnl', 'sum'),
+        test_max_dd=('test_max_dd', 'max'),
+        test_trades=('test_trades', 'sum'),
+    )
+    ranked = params_df.join(summary).sort_values(rank_by, ascending=False, na_position='last')
+
+    # === Walk-forward selection: best in-sample config per fold, scored out of sample ===
+    score = folds_df['train_sharpe'].fillna(-np.inf)
+    best = folds_df.loc[score.groupby(folds_df['fold']).idxmax()]
+    walk_forward = best[['fold', 'config_id', 'train_sharpe', 'test_sharpe', 'test_total_pnl', 'test_trades']]
+
+    return {'ranked': ranked, 'folds': folds_df, 'walk_forward': walk_forward.reset_index(drop=True)}
+
+
+if __name__ == '__main__':
+    from ib_insync import Contract
+    from bar_cache import BarCache
+    from fomc_events import backtest_inputs
+
+    contract = Contract(symbol='XAUUSD', secType='CMDTY', exchange='SMART', currency='USD')
+    df = BarCache().load(contract, '4 hours', 'MIDPOINT')
+    if df.empty:
+        print("❌ No cached bars. Run live_strat_backtest.py once to fill the bar cache.")
+        sys.exit(1)
+
+    sentiment, prob, fed_date = backtest_inputs(df['date'], allow_missing='--rsi-only' in sys.argv)
+    grid = {
+        'rsi_buy': [25, 30, 35, 40],
+        'rsi_sell': [70, 75, 80, 85],
+        'take_profit': [0.03, 0.05, 0.08],
+        'stop_loss': [0.02, 0.03, 0.05],
+        'time_stop_days': [10, 15, 20],
+    }
+    result = run_sweep(df, grid, sentiment, prob, fed_date, train_bars=len(df) // 3, test_bars=len(df) // 6)
+    print(result['ranked'].head(20).to_string())
+    print("\n🔁 Walk-forward selection:")
+    print(result['walk_forward'].to_string(index=False))
+    result['ranked'].to_csv('sweep_results.csv')
+    print("✅ Ranked results written to sweep_results.csv")
@@ -0,0 +1,174 @@
+# Event-driven order tracking
+# Orders are submitted without waiting on the broker; status and fills arrive
+# through the ib_insync Trade events (statusEvent, fillEvent, filledEvent) and
+# are folded into one OrderRecord per order. Completed orders are written to a
+# fills log with the decision price, so slippage uses the real average fill.
+
+import os
+import time
+import asyncio
+import datetime
+from log_utils import TradeLogger, CsvSink
+
+FILL_COLUMNS = (
+    'order_id', 'symbol', 'action', 'quantity', 'status', 'filled', 'remaining',
+    'reference_price', 'avg_fill_price', 'slippage', 'slippage_bps',
+    'submitted_at', 'acked_at', 'filled_at', 'ack_ms', 'fill_ms', 'tag'
+)
+
+
+class OrderRecord:
+    def __init__(self, trade, symbol: str, reference_price: float = None, tag: str = None):
+        self.trade = trade
+        self.symbol = symbol
+        self.reference_price = reference_price
+        self.tag = tag
+        self.submitted_at = datetime.datetime.now(datetime.timezone.utc)
+        self.submitted_ns = time.perf_counter_ns()
+        self.acked_at = None
+        self.filled_at = None
+        self.ack_ns = None
+        self.fill_ns = None
+        self.fills = []
+        self.done = asyncio.Event()
+
+    @property
+    def order_id(self):
+        return self.trade.order.orderId
+
+    @property
+    def status(self):
+        return self.trade.orderStatus.status
+
+    @property
+    def filled(self):
+        return self.trade.orderStatus.filled
+
+    @property
+    def remaining(self):
+        return self.trade.orderStatus.remaining
+
+    @property
+    def avg_fill_price(self):
+        return self.trade.orderStatus.avgFillPrice
+
+    @property
+    def slippage(self):
+        # Signed against the trader: positive means the fill was worse than the decision price
+        if not self.filled or not self.reference_price:
+            return 0.0
+        side = 1 if self.trade.order.action == 'BUY' else -1
+        return side * (self.avg_fill_price - self.reference_price)
+
+    def to_row(self) -> dict:
+        ms = lambda ns: ns / 1e6 if ns is not None else None
+        return {
+            'order_id': self.order_id,
+            'symbol': self.symbol,
+            'action': self.trade.order.action,
+            'quantity': self.trade.order.totalQuantity,
+            'status': self.status,
+            'filled': self.filled,
+            'remaining': self.remaining,
+            'reference_price': self.reference_price,
+            'avg_fill_price': self.avg_fill_price,
+            'slippage': self.slippage,
+            'slippage_bps': self.slippage / self.reference_price * 1e4 if self.reference_price else 0.0,
+            'submitted_at': self.submitted_at.isoformat() if self.submitted_at else None,
+            'acked_at': self.acked_at.isoformat() if self.acked_at else None,
+            'filled_at': self.filled_at.isoformat() if self.filled_at else None,
+            'ack_ms': ms(self.ack_ns - self.submitted_ns if self.ack_ns is not None else None),
+            'fill_ms': ms(self.fill_ns - self.submitted_ns if self.fill_ns is not None else None),
+            'tag': self.tag,
+        }
+
+
+class OrderManager:
+    # One instance can be shared by several sessions; orders are keyed by orderId
+    DONE_STATES = ('Filled', 'Cancelled', 'ApiCancelled', 'Inactive')
+
+    def __init__(self, ib, log_path: str = None):
+        self.ib = ib
+        self.orders = {}  # records until they finish; then only the fills log and the caller keep them
+        self.listeners = []
+        self.logger = None
+        if log_path is not None:
+            root, _ = os.path.splitext(log_path)
+            self.logger = TradeLogger([CsvSink(root + '_fills.csv', columns=FILL_COLUMNS)])
+
+    def add_listener(self, callback):
+        # callback(record) runs on every status change and fill
+        self.listeners.append(callback)
+
+    def submit(self, contract, order, reference_price: float = None, tag: str = None) -> OrderRecord:
+        # Returns immediately; the record fills in as the broker's events arrive
+        submitted_ns = time.perf_counter_ns()
+        trade = self.ib.placeOrder(contract, order)
+        record = OrderRecord(trade, contract.symbol, reference_price, tag)
+        record.submitted_ns = submitted_ns
+        self.orders[order.orderId] = record
+
+        trade.statusEvent += self._on_status
+        trade.fillEvent += self._on_fill
+        trade.filledEvent += self._on_status
+        trade.cancelledEvent += self._on_status
+        # The broker may have answered before the handlers were attached
+        if trade.orderStatus.status != 'PendingSubmit':
+            self._on_status(trade)
+        return record
+
+    def _on_status(self, trade):
+        record = self.orders.get(trade.order.orderId)
+        if record is None:
+            return
+        if record.ack_ns is None and trade.orderStatus.status not in ('PendingSubmit', ''):
+            record.ack_ns = time.perf_counter_ns()
+            record.acked_at = datetime.datetime.now(datetime.timezone.utc)
+        if trade.orderStatus.status in self.DONE_STATES and not record.done.is_set():
+            self._finish(record)
+        self._notify(record)
+
+    def _on_fill(self, trade, fill):
+        record = self.orders.get(trade.order.orderId)
+        if record is None:
+            return
+        record.fills.append(fill)
+        record.fill_ns = time.perf_counter_ns()
+        record.filled_at = fill.time
+        self._notify(record)
+
+    def _finish(self, record: OrderRecord):
+        trade = record.trade
+        trade.statusEvent -= self._on_status
+        trade.fillEvent -= self._on_fill
+        trade.filledEvent -= self._on_status
+        trade.cancelledEvent -= self._on_status
+        record.done.set()
+        if self.logger is not None:
+            self.logger.log(record.to_row())
+        # Journaled: stop tracking it, so a long-running process doesn't keep every order
+        self.orders.pop(record.order_id, None)
+        print(f"📥 Order {record.order_id} {record.symbol} {record.status}: "
+              f"{record.filled} @ {record.avg_fill_price:.2f} (slippage {record.slippage:.4f})")
+
+    def _notify(self, record: OrderRecord):
+        for callback in self.listeners:
+            try:
+                callback(record)
+            except Exception as e:
+                print(f"❌ Order listener error: {e}")
+
+    def in_flight(self) -> list:
+        return [r for r in self.orders.values() if not r.done.is_set()]
+
+    async def wait(self, record: OrderRecord, timeout: float = None) -> OrderRecord:
+        try:
+            await asyncio.wait_for(record.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return record
+
+    async def wait_all(self, timeout: float = None) -> list:
+        records = self.in_flight()
+        await asyncio.gather(*(self.wait(r, timeout) for r in records))
+        return records
@@ -0,0 +1,125 @@
+# Multi-instrument portfolio runner
+# Trades every contract listed under portfolio.contracts in settings.yaml with
+# the same RSI/FOMC logic. Each symbol keeps its own LiveSession (position
+# state, streaming indicators, risk state). Only the I/O is concurrent: bars
+# for all symbols, account values, positions and FedWatch are fetched in one
+# round, so the fetch waits for the slowest request, not the sum. The
+# per-symbol decisions then run one after another on the event loop; they
+# are CPU-bound and place orders through the one (single-threaded) IB client,
+# so running them in parallel would gain nothing under the GIL.
+
+import os
+import time
+import asyncio
+import datetime
+from ib_insync import IB, Contract, util
+from fedwatch import fedwatch_sentiment
+from live_ibkr import LiveSession, account_equity, net_liquidation, CYCLE_SECONDS
+from order_manager import OrderManager
+from settings_loader import HOST, PORT, CLIENT_ID, CONTRACTS, DURATION, BAR_SIZE, LOG_FILE_PATH
+
+
+def contract_name(contract) -> str:
+    # FX pairs are quoted as base + quote currency, e.g. EURUSD
+    if contract.secType == 'CASH':
+        return f"{contract.symbol}{contract.currency}"
+    return contract.symbol
+
+
+def symbol_log_path(name: str) -> str:
+    return os.path.join(os.path.dirname(LOG_FILE_PATH), f"{name.lower()}_live_log.csv")
+
+
+class PortfolioRunner:
+    def __init__(self, ib, contracts: list, initial_equity: float = None):
+        self.ib = ib
+        self.contracts = contracts
+        equity = initial_equity if initial_equity is not None else account_equity(ib)
+
+        # Equity is split evenly so total risk matches the single-instrument setup
+        per_symbol_equity = equity / len(contracts)
+        # One order manager tracks in-flight orders for every symbol
+        self.orders = OrderManager(ib, symbol_log_path('portfolio'))
+        self.sessions = {
+            contract_name(c): LiveSession(ib, c, initial_equity=per_symbol_equity, log_path=symbol_log_path(contract_name(c)),
+                                          order_manager=self.orders, equity_share=1 / len(contracts))
+            for c in contracts
+        }
+
+    async def fetch_all(self) -> tuple:
+        # Bars per symbol plus the account-wide inputs, all in one round of requests
+        names = list(self.sessions)
+        shared = asyncio.gather(
+            self.ib.accountSummaryAsync(),
+            self.ib.reqPositionsAsync(),
+            asyncio.to_thread(fedwatch_sentiment, datetime.datetime.now(datetime.timezone.utc).date()),
+            return_exceptions=True
+        )
+        bars = asyncio.gather(
+            *(self.sessions[name].bar_cache.fetch_async(
+                self.ib,
+                self.sessions[name].contract,
+                BAR_SIZE,
+                'MIDPOINT',
+                duration=DURATION,
+                refresh_tail=True,
+                as_array=True
+            ) for name in names),
+            return_exceptions=True
+        )
+        results, (summary, positions, sentiment) = await asyncio.gather(bars, shared)
+        return dict(zip(names, results)), summary, positions, sentiment
+
+    async def run_cycle(self):
+        fetch_start = time.perf_counter_ns()
+        frames, summary, positions, sentiment = await self.fetch_all()
+        fetch_ns = time.perf_counter_ns() - fetch_start
+        print(f"📡 Fetched {len(frames)} symbols in {fetch_ns / 1e6:.0f} ms")
+
+        # Failed account-wide requests fall back to carried-forward equity / the bar date
+        net_liq = None if isinstance(summary, Exception) else net_liquidation(summary)
+        if isinstance(sentiment, Exception):
+            sentiment = None
+
+        # Decisions in turn, each one order-submit away from the next (see the module comment)
+        for name, bars in frames.items():
+            if isinstance(bars, Exception) or not len(bars):
+                print(f"❌ {name}: no data ({bars if isinstance(bars, Exception) else 'empty'})")
+                continue
+            print(f"=== {name} ===")
+            session = self.sessions[name]
+            if not isinstance(positions, Exception):
+                session.check_position()
+            equity = net_liq * session.equity_share if net_liq is not None else None
+            try:
+                session.run_cycle(bars, fetch_ns, equity=equity, sentiment=sentiment)
+            except Exception as e:
+                # One symbol failing does not hold back the others
+                print(f"❌ {name}: cycle failed ({e})")
+
+    async def run(self, cycles: int = None):
+        completed = 0
+        while cycles is None or completed < cycles:
+            await self.run_cycle()
+            completed += 1
+            if cycles is None or completed < cycles:
+                await asyncio.sleep(CYCLE_SECONDS)
+
+
+async def connect_portfolio(ib=None) -> PortfolioRunner:
+    ib = ib if ib is not None else IB()
+    await ib.connectAsync(HOST, PORT, clientId=CLIENT_ID)
+    contracts = [Contract(**spec) for spec in CONTRACTS]
+    await ib.qualifyContractsAsync(*contracts)
+    return PortfolioRunner(ib, contracts)
+
+
+async def main():
+    runner = await connect_portfolio()
+    await runner.run()
+
+
+if __name__ == '__main__':
+    # Allow the blocking IB calls made inside a cycle to run on the event loop
+    util.patchAsyncio()
+    util.run(main())
@@ -1,11 +1,27 @@
 import pandas as pd
 import numpy as np
+from indicators import StreamingATR, StreamingVolatility, StreamingMedian
+from bar_ring import window_capacity
+from settings_loader import SETTINGS
 
 class RiskEngine:
-    def __init__(self, equity: float, price_series: pd.Series):
+    def __init__(self, equity: float, price_series: pd.Series = None, atr_window: int = 20, short_window: int = 10, long_window: int = 126,
+                 median_bars: int = None):
+        if isinstance(equity, pd.Series):
+            equity = float(equity.iloc[-1])
         self.equity = equity
         self.price_series = price_series
 
+        # === Cached incremental state (closed bars only) ===
+        self._atr = StreamingATR(atr_window)
+        self._short_vol = StreamingVolatility(short_window)
+        self._long_vol = StreamingVolatility(long_window)
+        # Median of the ATR values within one history request's worth of bars
+        # (DURATION at BAR_SIZE), the window the per-cycle DataFrame used to cover
+        median_bars = median_bars if median_bars is not None else window_capacity(min_bars=0)
+        self._median_atr = StreamingMedian(max(median_bars - atr_window, 1))
+        self._last_date = None
+
     def rolling_atr(self, window: int = 20) -> pd.Series:
         high = self.price_series.rolling(window=2).max()
         low = self.price_series.rolling(window=2).min()
@@ -28,27 +44,52 @@ class RiskEngine:
             return base_size * 0.5  # scale down FOMC legs
         return base_size
 
-    def allocate_weights(self, short_vol: float, long_vol: float, fedwatch_sentiment: str, fedwatch_prob: float) -> tuple:
-        switch = short_vol > 1.5 * long_vol and fedwatch_prob >= 70 and fedwatch_sentiment in ['HIKE', 'CUT']
+    def allocate_weights(self, short_vol: float, long_vol: float, fedwatch_sentiment: str, fedwatch_prob: float, vol_switch: float = 1.5) -> tuple:
+        switch = short_vol > vol_switch * long_vol and fedwatch_prob >= 70 and fedwatch_sentiment in ['HIKE', 'CUT']
         if switch:
             return 0.0, 1.5  # 150% FOMC, 0% RSI
         return 0.7, 0.3  # 70% RSI, 30% FOMC
 
-    def compute_dynamic_size(self, df_window: pd.DataFrame, fedwatch_sentiment: str, fedwatch_prob: float) -> dict:
-        current_price = df_window['close'].iloc[-1]
-        returns = df_window['close'].pct_change()
+    # === Incremental State ===
+    def _push_closed(self, close: float):
+        self._atr.update(close)
+        self._short_vol.update(close)
+        self._long_vol.update(close)
+        if self._atr.value is not None:
+            self._median_atr.update(self._atr.value)
+
+    def update(self, df_window) -> dict:
+        # df_window: BarRing or DataFrame. Feeds bars not seen yet. The last row
+        # may still be forming, so the kernels only peek at it; it enters the
+        # cached state once a newer bar arrives.
+        dates = np.asarray(df_window['date'])
+        closes = np.asarray(df_window['close'], dtype=np.float64)
+        last = len(closes) - 1
+        start = 0 if self._last_date is None else int(np.searchsorted(dates, self._last_date, side='right'))
+        for i in range(start, last):
+            self._push_closed(closes[i])
+        if last >= 1 and (self._last_date is None or dates[last - 1] > self._last_date):
+            self._last_date = dates[last - 1]
 
-        # Volatility
-        short_vol = self.realized_volatility(returns, 10).iloc[-1]
-        long_vol = self.realized_volatility(returns, 126).iloc[-1]
+        atr, short_vol, long_vol = (kernel.peek(closes[last]) for kernel in (self._atr, self._short_vol, self._long_vol))
+        median_atr = self._median_atr.value
+        return {
+            'short_vol': short_vol if short_vol is not None else np.nan,
+            'long_vol': long_vol if long_vol is not None else np.nan,
+            'current_atr': atr if atr is not None else np.nan,
+            'median_atr': median_atr if median_atr is not None else (atr if atr is not None else np.nan),
+        }
 
-        # ATR
-        atr_series = self.rolling_atr(window=20)
-        current_atr = atr_series.iloc[-1]
-        median_atr = atr_series.median()
+    def compute_dynamic_size(self, df_window, fedwatch_sentiment: str, fedwatch_prob: float) -> dict:
+        # Volatility and ATR from the cached state
+        risk_state = self.update(df_window)
+        short_vol = risk_state['short_vol']
+        long_vol = risk_state['long_vol']
+        current_atr = risk_state['current_atr']
+        median_atr = risk_state['median_atr']
 
-        # Position size (1% VaR)
-        base_size = self.determine_position_size(current_atr, median_atr)
+        # Position size (risk_management.risk_per_trade, re-read each cycle)
+        base_size = self.determine_position_size(current_atr, median_atr, SETTINGS.risk().risk_per_trade)
 
         # Strategy Weights
         rsi_weight, fomc_weight = self.allocate_weights(short_vol, long_vol, fedwatch_sentiment, fedwatch_prob)
@@ -62,3 +103,44 @@ class RiskEngine:
             'current_atr': current_atr,
             'median_atr': median_atr
         }
+
+    # === Batch API ===
+    def batch_state(self, closes) -> dict:
+        # Rolling vol/ATR and the ATR median for every bar at once, each bar
+        # seen as update() sees the last row of a live window: the median
+        # covers the same bounded window of earlier bars' ATR.
+        # closes is (bars,) or (bars, symbols); outputs have the same shape.
+        closes = np.asarray(closes, dtype=np.float64)
+        frame = pd.DataFrame(closes.reshape(len(closes), -1))
+        returns = frame.pct_change()
+        atr = frame.diff().abs().rolling(window=self._atr.window).mean()
+
+        state = {
+            'short_vol': self.realized_volatility(returns, self._short_vol.window),
+            'long_vol': self.realized_volatility(returns, self._long_vol.window),
+            'current_atr': atr,
+            'median_atr': atr.shift().rolling(window=self._median_atr.window, min_periods=1).median().fillna(atr),
+        }
+        return {key: value.to_numpy().reshape(closes.shape) for key, value in state.items()}
+
+    def batch_size(self, closes, fedwatch_sentiment: str, fedwatch_prob: float, risk_per_trade: float = 0.01,
+                   vol_switch: float = 1.5, fomc_prob: float = 70, state: dict = None) -> dict:
+        state = state if state is not None else self.batch_state(closes)
+        current_atr = state['current_atr']
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            base_size = self.equity * risk_per_trade / current_atr
+        base_size = np.where(current_atr > 1.3 * state['median_atr'], base_size * 0.5, base_size)
+
+        switch = (state['short_vol'] > vol_switch * state['long_vol']) & (np.asarray(fedwatch_prob) >= fomc_prob) & np.isin(fedwatch_sentiment, ['HIKE', 'CUT'])
+        rsi_weight = np.where(switch, 0.0, 0.7)
+        fomc_weight = np.where(switch, 1.5, 0.3)
+
+        return {
+            'base_size': base_size,
+            'rsi_weight': rsi_weight,
+            'fomc_weight': fomc_weight,
+            'rsi_size': base_size * rsi_weight,
+            'fomc_size': base_size * fomc_weight,
+            **{key: state[key] for key in ('short_vol', 'long_vol', 'current_atr', 'median_atr')}
+        }
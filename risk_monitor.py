@@ -0,0 +1,198 @@
+# Intrabar risk monitor
+# Between 4-hour cycles an open position is watched on live quotes
+# (reqMktData) instead of only at the next bar close. Stop and take-profit
+# prices are precomputed whenever the position changes, so each tick is a
+# couple of comparisons plus the drawdown update. A hit exits at once with a
+# market order through the session's OrderManager.
+#
+# Ticks are handled by ib_insync's event loop, which the live loop already
+# runs while it waits (ib.sleep / asyncio), so nothing blocks the cycle.
+# on_price() takes plain prices, so recorded ticks can be replayed through
+# it (replay_ticks) to test the rules offline.
+
+import time
+import datetime
+from collections import deque
+import numpy as np
+import pandas as pd
+from alert_utils import send_telegram_alert, drawdown_key
+from log_utils import log_to_csv
+from strategy_core import DEFAULT_PARAMS
+from settings_loader import SETTINGS
+
+
+class RiskMonitor:
+    def __init__(self, session, params: dict = None):
+        self.session = session
+        self.params = {**DEFAULT_PARAMS, **(params or {})}
+        self.ticker = None
+        self.events = deque(maxlen=1000)  # (time, kind, price) of exits and alerts
+        self.ticks = 0
+
+        # Precomputed by sync(); side is 1 long, -1 short, 0 disarmed
+        self.side = 0
+        self.entry_price = None
+        self.quantity = 0
+        self.stop_price = None
+        self.take_price = None
+        self.drawdown_limit = None
+        self.drawdown_band = 0  # multiples of the limit already alerted this cycle
+
+    # === Position Changes (called by the session) ===
+    def sync(self):
+        # Re-arms from the session state; subscribes while a position is open
+        # and risk_management.intrabar_monitor is on (re-read every sync)
+        state = self.session.state
+        position = state['position']
+        enabled = SETTINGS.risk().intrabar_monitor
+        if not enabled or position is None or not state['quantity'] or state['entry_price'] is None:
+            self.side = 0
+            self.unsubscribe()
+            return
+
+        self.side = 1 if position == 'long' else -1
+        self.entry_price = float(state['entry_price'])
+        self.quantity = float(state['quantity'])
+        take_profit, stop_loss = self.params['take_profit'], self.params['stop_loss']
+        # Same thresholds strategy_core applies at the bar close
+        self.stop_price = self.entry_price * (1 - self.side * stop_loss)
+        self.take_price = self.entry_price * (1 + self.side * take_profit)
+        threshold = SETTINGS.risk().drawdown_alert_threshold
+        self.drawdown_limit = -threshold * self.session.initial_equity
+        self.drawdown_band = 0
+        self.subscribe()
+
+    def subscribe(self):
+        if self.ticker is not None:
+            return
+        self.ticker = self.session.ib.reqMktData(self.session.contract, '', False, False)
+        self.ticker.updateEvent += self._on_ticker
+        print(f"👁 Watching {self.session.contract.symbol} ticks: stop {self.stop_price:.2f} | take profit {self.take_price:.2f}")
+
+    def unsubscribe(self):
+        if self.ticker is None:
+            return
+        self.ticker.updateEvent -= self._on_ticker
+        self.session.ib.cancelMktData(self.session.contract)
+        self.ticker = None
+
+    # === Ticks ===
+    def _on_ticker(self, ticker):
+        price = ticker.marketPrice()
+        if price == price and price > 0:  # skip NaN / missing quotes
+            self.on_price(price, ticker.time)
+
+    def on_price(self, price: float, when=None) -> str:
+        # Returns the action taken: 'STOP', 'TAKE_PROFIT', 'DRAWDOWN' or None
+        side = self.side
+        if not side:
+            return None
+        self.ticks += 1
+
+        if side * (price - self.stop_price) <= 0:
+            return self._exit('STOP', price, when)
+        if side * (price - self.take_price) >= 0:
+            return self._exit('TAKE_PROFIT', price, when)
+
+        # Drawdown on the cycle's account equity marked to this tick
+        session = self.session
+        live_equity = session.equity + side * (price - session.mark_price) * self.quantity
+        if live_equity > session.max_equity:
+            session.max_equity = live_equity
+        elif live_equity - session.max_equity < self.drawdown_limit:
+            drawdown = live_equity - session.max_equity
+            band = int(drawdown // self.drawdown_limit)
+            if band <= self.drawdown_band:
+                return None
+            # Once per band per cycle; the next cycle re-arms it if the drawdown persists
+            self.drawdown_band = band
+            self.events.append((when, 'DRAWDOWN', price))
+            # Same key as the cycle's alert, so the cooldown covers both
+            send_telegram_alert(
+                f"⚠️ Drawdown Alert (intrabar)!\nLive equity has dropped to {live_equity:.2f} USD\n"
+                f"DD: {drawdown:.2f} USD",
+                key=drawdown_key(session.contract.symbol, drawdown, self.drawdown_limit)
+            )
+            return 'DRAWDOWN'
+        return None
+
+    def _exit(self, kind: str, price: float, when) -> str:
+        session = self.session
+        self.side = 0  # disarm first: further ticks must not send a second exit
+        start = time.perf_counter_ns()
+        closed = session.reduce_position(int(session.state['quantity']), price, kind, close=True)
+        latency_ms = (time.perf_counter_ns() - start) / 1e6
+        session.persist()
+        self.unsubscribe()
+
+        direction = 1 if closed['position'] == 'long' else -1
+        pnl = direction * (price - closed['entry_price']) * closed['quantity']
+        self.events.append((when, kind, price))
+        self._log_exit(kind, price, closed, pnl, latency_ms)
+        print(f"{datetime.datetime.now()} - 🛑 Intrabar {kind}: closed {closed['position']} {closed['quantity']} @ {price:.2f} (PnL {pnl:.2f})")
+        send_telegram_alert(
+            f"🛑 {session.contract.symbol} {kind} hit intrabar at {price:.2f}\n"
+            f"Closed {closed['position']} {closed['quantity']} from {closed['entry_price']:.2f} | PnL {pnl:.2f} USD",
+            key=f"exit:{session.contract.symbol}"
+        )
+        return kind
+
+    def _log_exit(self, kind: str, price: float, closed: dict, pnl: float, latency_ms: float):
+        # Same trade log row as a cycle's exit, with the closed position's source;
+        # the cycle-only fields (sizes, FedWatch, volatility regime) are left empty
+        session = self.session
+        order = session.order
+        indicators = session.indicators
+        entry_date = closed['entry_date']
+        log_to_csv(
+            timestamp=datetime.datetime.now().isoformat(),
+            signal=kind,
+            source=closed['source'],
+            price=price,
+            position=session.state['position'],
+            entry_price=closed['entry_price'],
+            entry_date=entry_date.isoformat() if entry_date is not None else None,
+            rsi_size=None,
+            fomc_size=None,
+            sentiment=None,
+            probability=None,
+            fed_date=None,
+            equity=session.initial_equity,
+            live_equity=session.equity,
+            drawdown=session.equity - session.max_equity,
+            latency_ms=latency_ms,
+            short_vol=None,
+            long_vol=None,
+            executed_size=session.executed_size or 0,
+            order_status=session.order_status or 'None',
+            filled=session.filled or 0,
+            remaining=session.remaining or 0,
+            pnl=pnl,
+            slippage=abs(order.slippage) if order is not None and order.filled else 0,
+            trade_type='exit',
+            direction=closed['position'],
+            exit_price=price,
+            volatility_10d=indicators.short_vol.value,
+            rsi_14=indicators.rsi.value,
+            filepath=session.log_path
+        )
+
+
+# === Recorded Ticks ===
+def load_ticks(path: str) -> pd.DataFrame:
+    # CSV with time, price columns (e.g. captured from reqMktData or reqHistoricalTicks)
+    ticks = pd.read_csv(path)
+    ticks['time'] = pd.to_datetime(ticks['time'], utc=True)
+    return ticks
+
+
+def replay_ticks(monitor: RiskMonitor, ticks: pd.DataFrame) -> list:
+    # Feeds recorded ticks through the monitor; returns (time, action, price) of every action
+    actions = []
+    prices = ticks['price'].to_numpy(dtype=np.float64)
+    times = ticks['time'].tolist() if 'time' in ticks else [None] * len(prices)
+    for when, price in zip(times, prices):
+        action = monitor.on_price(price, when)
+        if action is not None:
+            actions.append((when, action, price))
+    return actions
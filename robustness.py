@@ -0,0 +1,218 @@
+# Monte Carlo robustness checks for backtest results
+# One historical run is a single draw; this resamples it into thousands of
+# alternative histories and reports the spread of Sharpe, max drawdown and
+# time under water, plus where the actual backtest falls in each:
+#
+#   block bootstrap   bar returns of the equity curve resampled in blocks,
+#                     which keeps short-range autocorrelation
+#   trades            closed-trade PnLs redrawn (with replacement) in random order
+#   synthetic paths   block-bootstrapped *price* paths with the strategy rerun
+#                     on each, so the rules themselves are tested, not one PnL path
+#
+# Samples are built as (samples, bars) matrices and scored in one vectorized
+# pass; batches are spread over worker processes.
+
+import os
+import math
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from execution_sim import bars_per_year
+from settings_loader import (
+    ROBUST_SAMPLES, ROBUST_SYNTHETIC_PATHS, ROBUST_BLOCK_BARS, ROBUST_BATCH_SIZE, ROBUST_SEED, ROBUST_OUTPUT_DIR
+)
+
+METRICS = ('total_return', 'sharpe', 'max_dd', 'time_under_water', 'longest_underwater')
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+# === Vectorized Path Metrics ===
+def path_metrics(equity: np.ndarray, periods_per_year: float) -> dict:
+    # equity: (samples, steps) with the starting equity in column 0
+    equity = np.atleast_2d(np.asarray(equity, dtype=np.float64))
+    returns = equity[:, 1:] / equity[:, :-1] - 1
+    mean = returns.mean(axis=1)
+    std = returns.std(axis=1, ddof=1) if returns.shape[1] > 1 else np.zeros(len(equity))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, mean / std * np.sqrt(periods_per_year), 0.0)
+
+    peak = np.maximum.accumulate(equity, axis=1)
+    under = equity < peak
+    # Length of the current underwater run at every step: steps since the last new high
+    steps = np.cumsum(under, axis=1)
+    run = steps - np.maximum.accumulate(np.where(under, 0, steps), axis=1)
+    return {
+        'total_return': equity[:, -1] / equity[:, 0] - 1,
+        'sharpe': sharpe,
+        'max_dd': (1 - equity / peak).max(axis=1),
+        'time_under_water': under[:, 1:].mean(axis=1) if equity.shape[1] > 1 else np.zeros(len(equity)),
+        'longest_underwater': run.max(axis=1),
+    }
+
+
+def block_indices(rng, samples: int, n: int, block: int) -> np.ndarray:
+    # (samples, n) indices made of random contiguous blocks of `block` steps
+    block = max(1, min(block, n))
+    blocks = math.ceil(n / block)
+    starts = rng.integers(0, n - block + 1, size=(samples, blocks))
+    return (starts[:, :, None] + np.arange(block)).reshape(samples, -1)[:, :n]
+
+
+# === Workers (one batch of samples each) ===
+def _bootstrap_batch(task: tuple) -> dict:
+    returns, equity, block, periods, size, seed = task
+    rng = np.random.default_rng(seed)
+    paths = equity * np.cumprod(1 + returns[block_indices(rng, size, len(returns), block)], axis=1)
+    return path_metrics(np.hstack([np.full((size, 1), equity), paths]), periods)
+
+
+def _trades_batch(task: tuple) -> dict:
+    pnl, equity, periods, size, seed = task
+    rng = np.random.default_rng(seed)
+    draws = pnl[rng.integers(0, len(pnl), size=(size, len(pnl)))]
+    return path_metrics(np.hstack([np.full((size, 1), equity), equity + np.cumsum(draws, axis=1)]), periods)
+
+
+def _synthetic_batch(task: tuple) -> dict:
+    from backtest_engine import run_backtest
+
+    df, sentiment, prob, fed_day, equity, block, size, seed = task
+    rng = np.random.default_rng(seed)
+    close = df['close'].to_numpy(dtype=np.float64)
+    log_returns = np.diff(np.log(close))
+    # High/low kept as the same fractional range around the close
+    high_frac = df['high'].to_numpy() / close if 'high' in df else np.ones(len(close))
+    low_frac = df['low'].to_numpy() / close if 'low' in df else np.ones(len(close))
+
+    idx = block_indices(rng, size, len(log_returns), block)
+    closes = close[0] * np.exp(np.hstack([np.zeros((size, 1)), np.cumsum(log_returns[idx], axis=1)]))
+    curves = []
+    for k in range(size):
+        bar_idx = np.concatenate([[0], idx[k] + 1])
+        path = pd.DataFrame({
+            'date': df['date'],
+            'close': closes[k],
+            'high': closes[k] * high_frac[bar_idx],
+            'low': closes[k] * low_frac[bar_idx],
+        })
+        curves.append(run_backtest(path, sentiment, prob, fed_day, equity=equity)['execution']['equity'])
+    curves = np.vstack(curves)
+    periods = bars_per_year(df['date'].dt.date.to_numpy().astype('datetime64[D]').astype(np.int64))
+    return path_metrics(np.hstack([np.full((size, 1), equity), curves]), periods)
+
+
+def _run_batches(worker, make_task, samples: int, batch_size: int, seed: int, max_workers: int = None) -> pd.DataFrame:
+    # Independent child seeds per batch, so results do not depend on the worker count
+    sizes = [min(batch_size, samples - start) for start in range(0, samples, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    tasks = [make_task(size, child) for size, child in zip(sizes, seeds)]
+    workers = min(max_workers or os.cpu_count(), len(tasks))
+    if workers <= 1:
+        batches = [worker(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            batches = list(executor.map(worker, tasks))
+    return pd.DataFrame({key: np.concatenate([batch[key] for batch in batches]) for key in METRICS})
+
+
+# === Resampling Methods ===
+def block_bootstrap(equity_curve, periods_per_year: float, samples: int = ROBUST_SAMPLES, block: int = ROBUST_BLOCK_BARS,
+                    seed: int = ROBUST_SEED, batch_size: int = ROBUST_BATCH_SIZE, max_workers: int = None) -> pd.DataFrame:
+    equity_curve = np.asarray(equity_curve, dtype=np.float64)
+    returns = equity_curve[1:] / equity_curve[:-1] - 1
+    return _run_batches(
+        _bootstrap_batch, lambda size, child: (returns, equity_curve[0], block, periods_per_year, size, child),
+        samples, batch_size, seed, max_workers
+    )
+
+
+def trade_resamples(trade_pnl, equity: float, trades_per_year: float, samples: int = ROBUST_SAMPLES,
+                    seed: int = ROBUST_SEED, batch_size: int = ROBUST_BATCH_SIZE, max_workers: int = None) -> pd.DataFrame:
+    # Steps are trades here, so time under water is a fraction of trades
+    trade_pnl = np.asarray(trade_pnl, dtype=np.float64)
+    return _run_batches(
+        _trades_batch, lambda size, child: (trade_pnl, equity, trades_per_year, size, child),
+        samples, batch_size, seed, max_workers
+    )
+
+
+def synthetic_paths(df: pd.DataFrame, sentiment, prob, fed_day, equity: float = 100_000, samples: int = ROBUST_SYNTHETIC_PATHS,
+                    block: int = ROBUST_BLOCK_BARS, seed: int = ROBUST_SEED, batch_size: int = 25, max_workers: int = None) -> pd.DataFrame:
+    # The FOMC calendar stays on the real dates; only prices are resampled
+    df = df[[col for col in ('date', 'close', 'high', 'low') if col in df]].reset_index(drop=True)
+    return _run_batches(
+        _synthetic_batch, lambda size, child: (df, sentiment, prob, fed_day, equity, block, size, child),
+        samples, batch_size, seed, max_workers
+    )
+
+
+def run_robustness(df: pd.DataFrame, result: dict, sentiment, prob, fed_day, equity: float = 100_000, warmup: int = 30,
+                   samples: int = ROBUST_SAMPLES, synthetic: int = ROBUST_SYNTHETIC_PATHS, block: int = ROBUST_BLOCK_BARS,
+                   seed: int = ROBUST_SEED, max_workers: int = None) -> dict:
+    # result: run_backtest output for df. Returns per-sample metrics per method
+    # and the actual backtest's metrics on the same definitions.
+    execution = result['execution']
+    curve = np.concatenate([[equity], execution['equity']])
+    day_num = df['date'].dt.date.to_numpy().astype('datetime64[D]').astype(np.int64)[warmup:]
+    periods = bars_per_year(day_num)
+    years = max((day_num[-1] - day_num[0] + 1) / 365.25, 1 / 365.25)
+    trade_pnl = np.array([trade['pnl'] for trade in execution['trades']], dtype=np.float64)
+
+    samples_by_method = {'block bootstrap': block_bootstrap(curve, periods, samples, block, seed, max_workers=max_workers)}
+    actual = {'block bootstrap': {key: float(value[0]) for key, value in path_metrics(curve, periods).items()}}
+    if len(trade_pnl) >= 2:
+        trade_curve = np.concatenate([[equity], equity + np.cumsum(trade_pnl)])
+        samples_by_method['trades'] = trade_resamples(trade_pnl, equity, len(trade_pnl) / years, samples, seed, max_workers=max_workers)
+        actual['trades'] = {key: float(value[0]) for key, value in path_metrics(trade_curve, len(trade_pnl) / years).items()}
+    if synthetic:
+        samples_by_method['synthetic paths'] = synthetic_paths(df, sentiment, prob, fed_day, equity, synthetic, block, seed,
+                                                               max_workers=max_workers)
+        actual['synthetic paths'] = actual['block bootstrap']
+    return {'samples': samples_by_method, 'actual': actual}
+
+
+# === Reporting ===
+def summarize(robustness: dict) -> pd.DataFrame:
+    # One row per (method, metric): percentiles, the actual value and its percentile rank
+    rows = []
+    for method, samples in robustness['samples'].items():
+        actual = robustness['actual'][method]
+        for metric in METRICS:
+            values = samples[metric].to_numpy()
+            row = {'method': method, 'metric': metric, 'mean': values.mean()}
+            row.update({f"p{q}": value for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES))})
+            row['actual'] = actual[metric]
+            row['actual_rank'] = (values < actual[metric]).mean()
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def plot_distributions(robustness: dict, path: str, metrics=('sharpe', 'max_dd', 'time_under_water')):
+    # Histogram grid (methods x metrics) with the actual backtest marked, written to a file
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    methods = list(robustness['samples'])
+    fig, axes = plt.subplots(len(methods), len(metrics), figsize=(4 * len(metrics), 3 * len(methods)), squeeze=False)
+    for row, method in enumerate(methods):
+        for col, metric in enumerate(metrics):
+            ax = axes[row][col]
+            ax.hist(robustness['samples'][method][metric], bins=50, color='steelblue', alpha=0.8)
+            ax.axvline(robustness['actual'][method][metric], color='crimson', linestyle='--', label='actual')
+            ax.set_title(f"{method}: {metric}", fontsize=9)
+            ax.grid(True, alpha=0.3)
+    axes[0][0].legend(fontsize=8)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def write_report(robustness: dict, output_dir: str = ROBUST_OUTPUT_DIR) -> pd.DataFrame:
+    os.makedirs(output_dir, exist_ok=True)
+    table = summarize(robustness)
+    table.to_csv(os.path.join(output_dir, 'robustness_summary.csv'), index=False)
+    for method, samples in robustness['samples'].items():
+        samples.to_csv(os.path.join(output_dir, f"robustness_{method.replace(' ', '_')}.csv"), index=False)
+    plot_distributions(robustness, os.path.join(output_dir, 'robustness.png'))
+    return table
@@ -1,4 +1,7 @@
 import os
+import threading
+from datetime import date, datetime
+from typing import NamedTuple
 import yaml
 from dotenv import load_dotenv
 
@@ -8,9 +11,160 @@ load_dotenv()
 
 settings_path = os.path.join(os.path.dirname(__file__), 'settings.yaml')
 
-# Open and read the settings file
-with open(settings_path, 'r') as f:
-    settings = yaml.safe_load(f)
+FED_SENTIMENTS = ('HIKE', 'CUT', 'STAY')
+
+
+class FedWatchSettings(NamedTuple):
+    sentiment: str
+    probability: float
+    fed_date: date
+
+
+def parse_fedwatch(section: dict) -> FedWatchSettings:
+    sentiment = str(section['sentiment']).upper()
+    if sentiment not in FED_SENTIMENTS:
+        raise ValueError(f"fedwatch_settings.sentiment must be one of {FED_SENTIMENTS}, got {section['sentiment']!r}")
+    probability = float(section['probability'])
+    if not 0 <= probability <= 100:
+        raise ValueError(f"fedwatch_settings.probability must be within 0-100, got {probability}")
+    fed_date = section['fed_date']
+    if not isinstance(fed_date, date):
+        fed_date = datetime.strptime(str(fed_date), "%Y-%m-%d").date()
+    return FedWatchSettings(sentiment, probability, fed_date)
+
+
+class RiskSettings(NamedTuple):
+    drawdown_alert_threshold: float
+    risk_per_trade: float
+    intrabar_monitor: bool
+
+
+class ExecutionSettings(NamedTuple):
+    spread_bps: float
+    slippage_range_frac: float
+    commission_bps: float
+    min_commission: float
+    partial_fraction: float
+
+
+class AlertSettings(NamedTuple):
+    cooldown_seconds: float
+    coalesce_seconds: float
+    max_retries: int
+    timeout_seconds: float
+
+
+def _number(section: dict, name: str, key: str, low: float = 0.0, high: float = None, low_open: bool = False) -> float:
+    value = float(section[key])
+    if value < low or (low_open and value == low) or (high is not None and value > high):
+        bounds = f"{'(' if low_open else '['}{low}, {high if high is not None else 'inf'}]"
+        raise ValueError(f"{name}.{key} must be within {bounds}, got {section[key]!r}")
+    return value
+
+
+def parse_risk(section: dict) -> RiskSettings:
+    return RiskSettings(
+        _number(section, 'risk_management', 'drawdown_alert_threshold', 0, 1, low_open=True),
+        _number(section, 'risk_management', 'risk_per_trade', 0, 1, low_open=True),
+        bool(section['intrabar_monitor']),
+    )
+
+
+def parse_execution(section: dict) -> ExecutionSettings:
+    return ExecutionSettings(
+        _number(section, 'execution', 'spread_bps'),
+        _number(section, 'execution', 'slippage_range_frac'),
+        _number(section, 'execution', 'commission_bps'),
+        _number(section, 'execution', 'min_commission'),
+        _number(section, 'execution', 'partial_fraction', 0, 1, low_open=True),
+    )
+
+
+def parse_alerts(section: dict) -> AlertSettings:
+    return AlertSettings(
+        _number(section, 'alerts', 'cooldown_seconds'),
+        _number(section, 'alerts', 'coalesce_seconds'),
+        int(_number(section, 'alerts', 'max_retries')),
+        _number(section, 'alerts', 'timeout_seconds', low_open=True),
+    )
+
+
+# Sections live processes re-read on every use; everything else is read
+# once at import into the module constants below and needs a restart
+LIVE_SECTIONS = {
+    'fedwatch_settings': parse_fedwatch,
+    'risk_management': parse_risk,
+    'execution': parse_execution,
+    'alerts': parse_alerts,
+}
+
+
+# === Settings Store ===
+# Parses settings.yaml once and keeps the validated result in memory. get()
+# only stats the file; it is re-parsed when the mtime or size changes, so
+# live processes pick up edits to LIVE_SECTIONS (FedWatch odds, risk limits,
+# the partial exit size, alert pacing) without a restart. An edit that fails
+# to parse or validate is reported and the last good snapshot stays in use.
+class SettingsStore:
+    def __init__(self, path: str = settings_path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._settings = None
+        self._sections = {}
+        self.reload()
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self) -> bool:
+        with self._lock:
+            stamp = self._file_stamp()
+            try:
+                with open(self.path, 'r') as f:
+                    settings = yaml.safe_load(f)
+                sections = {name: parse(settings[name]) for name, parse in LIVE_SECTIONS.items()}
+            except Exception as e:
+                if self._settings is None:
+                    raise
+                print(f"❌ Ignoring invalid {os.path.basename(self.path)}: {e}")
+                self._stamp = stamp  # don't re-parse the same broken file every call
+                return False
+            self._settings, self._sections, self._stamp = settings, sections, stamp
+            return True
+
+    def _check(self):
+        try:
+            stamp = self._file_stamp()
+        except OSError:
+            return  # file briefly missing while an editor replaces it
+        if stamp != self._stamp:
+            self.reload()
+
+    def get(self) -> dict:
+        self._check()
+        return self._settings
+
+    def fedwatch(self) -> FedWatchSettings:
+        self._check()
+        return self._sections['fedwatch_settings']
+
+    def risk(self) -> RiskSettings:
+        self._check()
+        return self._sections['risk_management']
+
+    def execution(self) -> ExecutionSettings:
+        self._check()
+        return self._sections['execution']
+
+    def alerts(self) -> AlertSettings:
+        self._check()
+        return self._sections['alerts']
+
+
+SETTINGS = SettingsStore()
+settings = SETTINGS.get()
 
 # IBKR
 HOST = settings['ibkr_connection']['host']
@@ -23,21 +177,67 @@ SEC_TYPE = settings['contract_settings']['secType']
 EXCHANGE = settings['contract_settings']['exchange']
 CURRENCY = settings['contract_settings']['currency']
 
+# Portfolio
+CONTRACTS = settings['portfolio']['contracts']
+
 # Historical Data
 DURATION = settings['historical_data']['duration']
 BAR_SIZE = settings['historical_data']['bar_size']
 
-# Risk
-DRAW_DOWN_ALERT = settings['risk_management']['drawdown_alert_threshold']
-RISK_PER_TRADE = settings['risk_management']['risk_per_trade']
+# Bar Cache
+BAR_CACHE_DIR = os.path.join(os.path.dirname(__file__), settings['bar_cache']['directory'])
+
+# Streaming
+STREAMING_ENABLED = settings['streaming']['enabled']
+STREAM_BUFFER_BARS = settings['streaming']['buffer_bars']
+
+# Backtest Execution (values at startup; live code reads SETTINGS.execution())
+EXEC_SPREAD_BPS, EXEC_SLIPPAGE_RANGE_FRAC, EXEC_COMMISSION_BPS, EXEC_MIN_COMMISSION, EXEC_PARTIAL_FRACTION = SETTINGS.execution()
+
+# FOMC Events
+FOMC_MEETINGS_PATH = os.path.join(os.path.dirname(__file__), settings['fomc_events']['meetings_path'])
+FOMC_PROBABILITIES_PATH = os.path.join(os.path.dirname(__file__), settings['fomc_events']['probabilities_path'])
+FOMC_MAX_STALENESS_DAYS = settings['fomc_events']['max_staleness_days']
+
+# Risk (values at startup; live code reads SETTINGS.risk())
+DRAW_DOWN_ALERT, RISK_PER_TRADE, _ = SETTINGS.risk()
 
 # Streamlit
 REFRESH_SECONDS = settings['streamlit_settings']['refresh_seconds']
 LOG_FILE_PATH = settings['streamlit_settings']['log_file_path']
 
+# Trade Log
+LOG_SINKS = settings['trade_log']['sinks']
+LOG_BUFFER_ROWS = settings['trade_log']['buffer_rows']
+LOG_FLUSH_SECONDS = settings['trade_log']['flush_seconds']
+
 # Polling
 POLL_INTERVAL = settings['polling']['interval_seconds']
 
+# Scheduler
+SCHEDULER_SETTLE_SECONDS = settings['scheduler']['settle_seconds']
+SCHEDULER_MAX_BACKOFF_SECONDS = settings['scheduler']['max_backoff_seconds']
+
+# Benchmarks
+BENCH_SIZES = settings['benchmarks']['sizes']
+BENCH_BASELINE_PATH = os.path.join(os.path.dirname(__file__), settings['benchmarks']['baseline_path'])
+BENCH_RESULTS_PATH = os.path.join(os.path.dirname(__file__), settings['benchmarks']['results_path'])
+BENCH_TOLERANCE = settings['benchmarks']['tolerance']
+
+# Robustness (Monte Carlo)
+ROBUST_SAMPLES = settings['robustness']['samples']
+ROBUST_SYNTHETIC_PATHS = settings['robustness']['synthetic_paths']
+ROBUST_BLOCK_BARS = settings['robustness']['block_bars']
+ROBUST_BATCH_SIZE = settings['robustness']['batch_size']
+ROBUST_SEED = settings['robustness']['seed']
+ROBUST_OUTPUT_DIR = os.path.join(os.path.dirname(__file__), settings['robustness']['output_dir'])
+
+# Analytics Store
+ANALYTICS_STORE_PATH = os.path.join(os.path.dirname(__file__), settings['analytics']['store_path'])
+ANALYTICS_COMPACT_FILES = settings['analytics']['compact_files']
+
 # Alerts
 TELEGRAM_API_KEY = os.getenv('TELEGRAM_API_KEY')
-TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
\ No newline at end of file
+TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TELEGRAM_API_URL = settings['alerts']['api_url']
+# Pacing (cooldown, coalescing, retries) is read through SETTINGS.alerts()
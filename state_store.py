@@ -0,0 +1,116 @@
+# Crash-safe strategy state
+# Every change is appended to a JSON-lines journal as the fields that changed,
+# each line written with a single O_APPEND write and fsynced. Every
+# snapshot_every entries the full state is written to a snapshot file
+# (temp file + os.replace) and the journal is started over. Recovery loads
+# the snapshot and replays the journal entries after it; a torn last line
+# from a crash mid-write is cut off, so the next append starts a clean line.
+
+import os
+import json
+import time
+import datetime
+import threading
+import numpy as np
+
+
+def _encode(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if hasattr(value, 'isoformat'):  # pandas Timestamp
+        return value.isoformat()
+    raise TypeError(f"Cannot journal {type(value).__name__}")
+
+
+class StateStore:
+    def __init__(self, log_path: str, snapshot_every: int = 500, fsync: bool = True):
+        root, _ = os.path.splitext(log_path)
+        self.journal_path = root + '_state.jsonl'
+        self.snapshot_path = root + '_state.snapshot.json'
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.state = {}
+        self.seq = 0
+        self.entries = 0  # journal entries since the last snapshot
+        self._lock = threading.Lock()
+
+    def load(self) -> dict:
+        start = time.perf_counter()
+        state, seq = {}, 0
+        if os.path.isfile(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            state, seq = snapshot['state'], snapshot['seq']
+
+        entries = 0
+        if os.path.isfile(self.journal_path):
+            valid_end = 0  # byte offset just past the last complete entry
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # torn write: everything before it is intact
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    valid_end += len(line)
+                    if entry['seq'] <= seq:
+                        continue  # already folded into the snapshot
+                    state.update(entry['changes'])
+                    seq = entry['seq']
+                    entries += 1
+            if valid_end < os.path.getsize(self.journal_path):
+                # Otherwise the next append would be glued onto the torn line
+                # and lost, with everything after it, on every later load
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(valid_end)
+                    f.flush()
+                    os.fsync(f.fileno())
+                print(f"⚠️ Dropped a torn state journal entry after seq {seq}")
+
+        with self._lock:
+            self.state, self.seq, self.entries = state, seq, entries
+        print(f"♻️ Restored state at seq {seq} ({entries} journal entries) in {(time.perf_counter() - start) * 1000:.1f} ms")
+        return dict(state)
+
+    def save(self, state: dict) -> bool:
+        # Journals the fields that differ from the last saved state; False if nothing changed
+        encoded = json.loads(json.dumps(state, default=_encode))
+        with self._lock:
+            changes = {key: value for key, value in encoded.items() if self.state.get(key, ...) != value}
+            if not changes:
+                return False
+            self.seq += 1
+            entry = {'seq': self.seq, 'ts': datetime.datetime.now().isoformat(), 'changes': changes}
+            line = (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8')
+
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            self.state.update(changes)
+            self.entries += 1
+            if self.entries >= self.snapshot_every:
+                self._snapshot()
+        return True
+
+    def _snapshot(self):
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'seq': self.seq, 'ts': datetime.datetime.now().isoformat(), 'state': self.state}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Safe to drop: a crash before this leaves entries the snapshot already covers
+        open(self.journal_path, 'w').close()
+        self.entries = 0
+
+    def snapshot(self):
+        with self._lock:
+            self._snapshot()
@@ -0,0 +1,148 @@
+# RSI/FOMC strategy kernel
+# The one definition of the entry and exit rules. step() advances the
+# strategy state by one bar using plain numbers, so the live loop can call it
+# per bar and run() can loop it over whole arrays for the backtester and the
+# optimizer. Both are compiled with Numba when it is installed and run as
+# ordinary Python otherwise.
+
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_ENABLED = True
+except ImportError:
+    NUMBA_ENABLED = False
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# === Codes ===
+FLAT, LONG, SHORT = 0, 1, -1
+NO_SOURCE, SOURCE_RSI, SOURCE_FOMC, SOURCE_RECOVERED = 0, 1, 2, 3
+HOLD, BUY, SELL, PARTIAL_SELL, PARTIAL_COVER, CLOSE = 0, 1, 2, 3, 4, 5
+
+SIGNALS = ('HOLD', 'BUY', 'SELL', 'PARTIAL_SELL', 'PARTIAL_COVER', 'CLOSE')
+SOURCES = (None, 'RSI', 'FOMC', 'RECOVERED')
+POSITIONS = {FLAT: None, LONG: 'long', SHORT: 'short'}
+POSITION_CODES = {None: FLAT, 'long': LONG, 'short': SHORT}
+SOURCE_CODES = {source: code for code, source in enumerate(SOURCES)}
+
+# === Strategy Parameters ===
+# Thresholds used by the RSI/FOMC rules; exits are fractions of the entry price
+DEFAULT_PARAMS = {
+    'rsi_buy': 35,
+    'rsi_sell': 85,
+    'fomc_prob': 70,
+    'fomc_days': 2,
+    'take_profit': 0.05,
+    'stop_loss': 0.03,
+    'partial_target': 0.015,
+    'time_stop_days': 15,
+    'vol_switch': 1.5,
+}
+
+# Order of the params array passed to step()/run()
+PARAM_KEYS = ('rsi_buy', 'rsi_sell', 'take_profit', 'stop_loss', 'partial_target', 'time_stop_days')
+
+
+def param_array(params: dict) -> np.ndarray:
+    return np.array([params[key] for key in PARAM_KEYS], dtype=np.float64)
+
+
+def fomc_inputs(sentiment, prob, fed_day, day_num, params: dict) -> tuple:
+    # (fomc_dir, rsi_allowed) per bar, or scalars for a single bar.
+    # fomc_dir is SHORT ahead of an expected hike, LONG ahead of a cut, else FLAT.
+    sentiment = np.asarray(sentiment, dtype=object)
+    prob = np.asarray(prob, dtype=np.float64)
+    likely = prob >= params['fomc_prob']
+    near = np.asarray(fed_day, dtype=np.int64) - np.asarray(day_num, dtype=np.int64) <= params['fomc_days']
+    fomc_dir = np.where(likely & near & (sentiment == 'HIKE'), SHORT, np.where(likely & near & (sentiment == 'CUT'), LONG, FLAT))
+    rsi_allowed = ~likely | (sentiment == 'STAY')
+    return fomc_dir.astype(np.int8), rsi_allowed
+
+
+@njit(cache=True)
+def step(position, entry_price, entry_day, source, partial_done,
+         close, rsi, macd_val, macd_sig, day, fomc_dir, rsi_allowed, params):
+    # Returns (action, partial, position, entry_price, entry_day, source, partial_done).
+    # partial is set when a partial exit fired on this bar, including the bar it closes on.
+    rsi_buy, rsi_sell = params[0], params[1]
+    take_profit, stop_loss, partial_target, time_stop = params[2], params[3], params[4], params[5]
+    action = HOLD
+    partial = False
+
+    # === Entry Signals ===
+    # FOMC enters on every bar of its window (re-anchoring an existing entry);
+    # RSI only trades from flat
+    if fomc_dir != FLAT:
+        action = BUY if fomc_dir == LONG else SELL
+        position, source = fomc_dir, SOURCE_FOMC
+        entry_price, entry_day, partial_done = close, day, False
+    elif rsi_allowed and position == FLAT and rsi == rsi and rsi != 0:
+        if rsi < rsi_buy:
+            action, position = BUY, LONG
+        elif rsi > rsi_sell:
+            action, position = SELL, SHORT
+        if action != HOLD:
+            source, entry_price, entry_day, partial_done = SOURCE_RSI, close, day, False
+
+    # === Exit Logic ===
+    close_out = False
+    if position == LONG:
+        if source == SOURCE_RSI:
+            if not partial_done and close >= entry_price * (1 + partial_target) and macd_sig < macd_val:
+                action, partial, partial_done = PARTIAL_SELL, True, True
+            elif day - entry_day >= time_stop:
+                close_out = True
+        if close >= entry_price * (1 + take_profit) or close <= entry_price * (1 - stop_loss):
+            close_out = True
+    elif position == SHORT:
+        if source == SOURCE_RSI:
+            if not partial_done and close <= entry_price * (1 - partial_target) and macd_sig > macd_val:
+                action, partial, partial_done = PARTIAL_COVER, True, True
+            elif day - entry_day >= time_stop:
+                close_out = True
+        if close <= entry_price * (1 - take_profit) or close >= entry_price * (1 + stop_loss):
+            close_out = True
+
+    if close_out:
+        action = CLOSE
+        position, entry_price, entry_day, source, partial_done = FLAT, np.nan, 0, NO_SOURCE, False
+
+    return action, partial, position, entry_price, entry_day, source, partial_done
+
+
+@njit(cache=True)
+def run(close, rsi, macd_val, macd_sig, day_num, fomc_dir, rsi_allowed, params, start, end):
+    # Replays step() over bars [start, end) from a flat state. For every bar:
+    # the action, whether a partial exit fired, the position direction it
+    # concerns, its source, and the entry price of the position it acts on (for exit PnL).
+    n = end - start
+    actions = np.zeros(n, dtype=np.int8)
+    partials = np.zeros(n, dtype=np.bool_)
+    directions = np.zeros(n, dtype=np.int8)
+    sources = np.zeros(n, dtype=np.int8)
+    entry_prices = np.full(n, np.nan)
+
+    position, entry_price, entry_day, source, partial_done = FLAT, np.nan, 0, NO_SOURCE, False
+    for k in range(n):
+        i = start + k
+        prev_position, prev_entry, prev_source = position, entry_price, source
+        action, partial, position, entry_price, entry_day, source, partial_done = step(
+            position, entry_price, entry_day, source, partial_done,
+            close[i], rsi[i], macd_val[i], macd_sig[i], day_num[i], fomc_dir[i], rsi_allowed[i], params
+        )
+        actions[k] = action
+        partials[k] = partial
+        if action == CLOSE:
+            # Report the position that was closed
+            directions[k] = prev_position
+            sources[k] = prev_source
+            entry_prices[k] = prev_entry
+        else:
+            directions[k] = position
+            sources[k] = source
+            entry_prices[k] = entry_price
+    return actions, partials, directions, sources, entry_prices
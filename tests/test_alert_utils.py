@@ -0,0 +1,127 @@
+# AlertDispatcher against FakeTelegram: cooldown, coalescing, retries and failures
+
+import time
+import pytest
+from alert_utils import AlertDispatcher
+from fake_telegram import FakeTelegram
+
+
+@pytest.fixture
+def serve():
+    servers, dispatchers = [], []
+
+    def start(dispatcher_kwargs=None, **server_kwargs):
+        server = FakeTelegram(**server_kwargs).start()
+        kwargs = {'coalesce_seconds': 0, 'max_retries': 2, 'timeout': 5, **(dispatcher_kwargs or {})}
+        dispatcher = AlertDispatcher(token='test', chat_id='1', base_url=server.url, **kwargs)
+        servers.append(server)
+        dispatchers.append(dispatcher)
+        return server, dispatcher
+
+    yield start
+    for dispatcher in dispatchers:
+        dispatcher.close(timeout=5)
+    for server in servers:
+        server.stop()
+
+
+def texts(server):
+    return [message['text'] for message in server.messages]
+
+
+def test_repeats_inside_the_cooldown_are_suppressed_and_counted(serve):
+    server, dispatcher = serve({'cooldown_seconds': 0.3})
+
+    assert dispatcher.alert('drawdown 5%', key='drawdown:XAUUSD:1x')
+    assert not dispatcher.alert('drawdown 6%', key='drawdown:XAUUSD:1x')
+    assert not dispatcher.alert('drawdown 7%', key='drawdown:XAUUSD:1x')
+    assert dispatcher.alert('drawdown 10%', key='drawdown:XAUUSD:2x')  # another key is not held back
+    assert dispatcher.suppressed == {'drawdown:XAUUSD:1x': 2}
+
+    time.sleep(0.35)
+    assert dispatcher.alert('drawdown 8%', key='drawdown:XAUUSD:1x')
+    assert dispatcher.flush(timeout=5)
+
+    assert texts(server) == ['drawdown 5%', 'drawdown 10%', 'drawdown 8%\n(+2 repeats suppressed)']
+    assert dispatcher.suppressed == {}
+
+
+def test_a_burst_goes_out_as_one_message(serve):
+    server, dispatcher = serve({'coalesce_seconds': 0.3})
+
+    for n in range(3):
+        assert dispatcher.alert(f"alert {n}")
+    assert dispatcher.flush(timeout=5)
+
+    assert texts(server) == ['alert 0\n\nalert 1\n\nalert 2']
+    assert dispatcher.sent == 1
+
+
+def test_429_waits_the_retry_after_it_is_given(serve):
+    server, dispatcher = serve(fail_first=1, fail_status=429, retry_after=1)
+
+    start = time.monotonic()
+    dispatcher.alert('rate limited')
+    assert dispatcher.flush(timeout=10)
+
+    # Telegram's retry_after (1 s), not the first exponential backoff (0.5 s)
+    assert time.monotonic() - start >= 1.0
+    assert server.requests == 2
+    assert texts(server) == ['rate limited']
+    assert dispatcher.sent == 1 and dispatcher.failed == 0
+
+
+def test_429_without_json_falls_back_to_backoff(serve):
+    server, dispatcher = serve(fail_first=1, fail_status=429, plain_errors=True)
+
+    dispatcher.alert('proxy limited')
+    assert dispatcher.flush(timeout=10)
+
+    assert server.requests == 2
+    assert texts(server) == ['proxy limited']
+
+
+def test_server_errors_are_retried_then_given_up(serve):
+    server, dispatcher = serve({'max_retries': 1}, fail_first=2, fail_status=500)
+
+    dispatcher.alert('lost')
+    assert dispatcher.flush(timeout=10)
+    assert server.requests == 2  # the first try and one retry
+    assert dispatcher.failed == 1 and texts(server) == []
+
+    # The worker is still running
+    dispatcher.alert('delivered')
+    assert dispatcher.flush(timeout=10)
+    assert texts(server) == ['delivered']
+
+
+def test_client_errors_are_not_retried(serve):
+    server, dispatcher = serve(fail_first=1, fail_status=400)
+
+    dispatcher.alert('bad chat id')
+    assert dispatcher.flush(timeout=5)
+
+    assert server.requests == 1
+    assert dispatcher.failed == 1
+
+
+def test_worker_survives_an_unexpected_error(serve, monkeypatch):
+    server, dispatcher = serve()
+    post = dispatcher.session.post
+    calls = []
+
+    def broken_once(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise ValueError('unexpected')
+        return post(*args, **kwargs)
+
+    monkeypatch.setattr(dispatcher.session, 'post', broken_once)
+
+    dispatcher.alert('first')
+    assert dispatcher.flush(timeout=5)
+    assert dispatcher.failed == 1
+
+    dispatcher.alert('second')
+    assert dispatcher.flush(timeout=5)
+    assert texts(server) == ['second']
@@ -0,0 +1,69 @@
+# The dashboard imports the repo as the live_trading package; its analytics
+# panel must load the store through that path, not hide a failed import
+
+import os
+import sys
+import pandas as pd
+import pytest
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD = os.path.join(REPO, 'dashboard', 'dashboard.py')
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    # The repo checked out as live_trading/, with its parent on sys.path and
+    # the repo itself off it, so flat imports of sibling modules fail
+    root = tmp_path / 'checkout'
+    root.mkdir()
+    os.symlink(REPO, root / 'live_trading')
+    monkeypatch.setattr(sys, 'path', [str(root)] + [path for path in sys.path if os.path.abspath(path or '.') != REPO])
+    for name in list(sys.modules):
+        module_file = getattr(sys.modules[name], '__file__', None) or ''
+        if os.path.dirname(os.path.abspath(module_file)) == REPO:
+            monkeypatch.delitem(sys.modules, name)
+    yield
+    for name in [name for name in sys.modules if name == 'live_trading' or name.startswith('live_trading.')]:
+        del sys.modules[name]
+
+
+def write_log(path):
+    rows = [
+        {'timestamp': '2025-03-10 08:00:00', 'signal': 'BUY', 'source': 'RSI', 'price': 2000.0, 'position': 'long',
+         'entry_price': 2000.0, 'equity': 100_000.0, 'live_equity': 100_000.0, 'drawdown': 0.0, 'trade_type': 'entry',
+         'executed_size': 10, 'direction': 'long'},
+        {'timestamp': '2025-03-10 12:00:00', 'signal': 'HOLD', 'source': 'RSI', 'price': 2010.0, 'position': 'long',
+         'entry_price': 2000.0, 'equity': 100_100.0, 'live_equity': 100_100.0, 'drawdown': 0.0, 'trade_type': 'hold'},
+        {'timestamp': '2025-03-11 08:00:00', 'signal': 'CLOSE', 'source': 'RSI', 'price': 2020.0, 'position': None,
+         'entry_price': 2000.0, 'equity': 100_200.0, 'live_equity': 100_200.0, 'drawdown': 0.0, 'trade_type': 'exit',
+         'executed_size': 10, 'pnl': 200.0, 'direction': 'long', 'exit_price': 2020.0},
+    ]
+    from live_trading.log_utils import LOG_COLUMNS
+    pd.DataFrame(rows, columns=list(LOG_COLUMNS)).to_csv(path, index=False)
+
+
+def test_store_accessor_imports_through_the_package(package, tmp_path):
+    from live_trading.analytics_store import AnalyticsStore
+    store = AnalyticsStore(str(tmp_path / 'store'))
+    log_path = str(tmp_path / 'live_log.csv')
+    write_log(log_path)
+    assert store.ingest(log_path, symbol='XAUUSD') == 3
+    assert store.pnl_by_source().loc['RSI', 'pnl'] == pytest.approx(200.0)
+
+
+def test_dashboard_renders_the_analytics_panel(package, tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    from streamlit.testing.v1 import AppTest
+    import live_trading.settings_loader as settings_loader
+    log_path = str(tmp_path / 'live_log.csv')
+    write_log(log_path)
+    monkeypatch.setattr(settings_loader, 'LOG_FILE_PATH', log_path)
+    monkeypatch.setattr(settings_loader, 'ANALYTICS_STORE_PATH', str(tmp_path / 'store'))
+
+    app = AppTest.from_file(DASHBOARD, default_timeout=30).run()
+
+    assert not app.exception
+    titles = [title.value for title in app.title]
+    assert 'PnL by Source' in titles
+    assert 'Daily Returns' in titles
+    assert not app.info
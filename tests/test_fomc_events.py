@@ -0,0 +1,58 @@
+# FOMC inputs for backtests: only dated history, never today's snapshot
+
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from fomc_events import FomcEventStore, backtest_inputs
+from settings_loader import FedWatchSettings
+
+
+@pytest.fixture
+def store(tmp_path):
+    meetings = tmp_path / 'meetings.csv'
+    meetings.write_text('meeting_date\n2025-03-19\n2025-05-07\n')
+    return FomcEventStore(str(meetings), str(tmp_path / 'probabilities.csv'), max_staleness_days=7)
+
+
+def bar_dates(start: str, days: int) -> pd.Series:
+    return pd.Series(pd.date_range(start, periods=days * 6, freq='4h', tz='UTC'))
+
+
+def day(value: str) -> int:
+    return int(np.datetime64(value, 'D').astype(np.int64))
+
+
+def test_missing_history_fails_the_backtest(store):
+    with pytest.raises(ValueError, match='does not cover 36 of 36 bars'):
+        backtest_inputs(bar_dates('2025-03-16', 6), store)
+
+
+def test_rsi_only_keeps_the_calendar_per_bar(store):
+    dates = bar_dates('2025-03-16', 6)
+    sentiment, prob, fed_day = backtest_inputs(dates, store, allow_missing=True)
+
+    assert set(sentiment) == {'STAY'} and not prob.any()
+    # Next meeting as of each bar: 19 March up to and including the day, then 7 May
+    before = (dates.dt.date <= datetime.date(2025, 3, 19)).to_numpy()
+    assert (fed_day[before] == day('2025-03-19')).all()
+    assert (fed_day[~before] == day('2025-05-07')).all()
+
+
+def test_recorded_readings_are_used_for_their_days_only(store):
+    reading = FedWatchSettings('CUT', 80.0, datetime.date(2025, 3, 19))
+    assert store.record(datetime.date(2025, 3, 17), reading)
+    assert not store.record(datetime.date(2025, 3, 17), reading)  # one per day
+    assert not store.record(datetime.date(2025, 3, 20), reading)  # that meeting is past
+
+    frame = pd.read_csv(store.probabilities_path)
+    assert frame.to_dict('records') == [{'date': '2025-03-17', 'meeting_date': '2025-03-19', 'hike': 10.0, 'cut': 80.0, 'stay': 10.0}]
+
+    dates = bar_dates('2025-03-17', 3)
+    sentiment, prob, fed_day = backtest_inputs(dates, store)
+    assert set(sentiment) == {'CUT'} and set(prob) == {80.0}
+    assert set(fed_day) == {day('2025-03-19')}
+
+    # The day before the first reading has no odds
+    with pytest.raises(ValueError, match='does not cover 6 of 24 bars'):
+        backtest_inputs(bar_dates('2025-03-16', 4), store)
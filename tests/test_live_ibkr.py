@@ -0,0 +1,29 @@
+# LiveSession.run_cycle on FakeIB
+
+import numpy as np
+import pandas as pd
+from ib_insync import Contract
+import live_ibkr
+from bar_ring import BarRing
+from fake_ib import FakeIB
+from live_ibkr import LiveSession
+from log_utils import flush_logs
+
+
+def test_entry_with_no_size_during_atr_warmup_is_skipped(tmp_path, monkeypatch):
+    bars = pd.DataFrame({'date': pd.date_range('2025-03-10', periods=5, freq='4h', tz='UTC'),
+                         'close': 2000.0 + np.arange(5, dtype=np.float64)})
+    ib = FakeIB(bars, history=5).connect()
+    contract = Contract(symbol='XAUUSD', secType='CMDTY', exchange='SMART', currency='USD')
+    session = LiveSession(ib, contract, initial_equity=100_000, log_path=str(tmp_path / 'live_log.csv'))
+    monkeypatch.setattr(live_ibkr, 'combined_rsi_fomc_logic', lambda *args, **kwargs: {'signal': 'BUY', 'type': 'RSI', 'size': 0})
+    ring = BarRing(50)
+    ring.extend(ib.all_bars)
+
+    session.run_cycle(ring)
+    flush_logs()
+
+    # Five bars are too few for ATR(20), so the size is NaN: no order and still flat
+    assert ib.orders == []
+    assert session.state['position'] is None and session.state['quantity'] == 0
+    assert pd.read_csv(tmp_path / 'live_log.csv')['trade_type'].tolist() == ['hold']
@@ -0,0 +1,153 @@
+# BarStreamer driven by FakeIB keepUpToDate bars
+
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from ib_insync import Contract, MarketOrder
+from fake_ib import FakeIB
+from live_stream import BarStreamer
+from live_ibkr import LiveSession
+from log_utils import flush_logs
+
+
+def make_ib(bars: int = 60, history: int = 40) -> FakeIB:
+    df = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=bars, freq='4h', tz='UTC'),
+                       'close': 2000.0 + np.arange(bars, dtype=np.float64)})
+    return FakeIB(df, history=history).connect()
+
+
+@pytest.fixture
+def contract():
+    return Contract(symbol='XAUUSD', secType='CMDTY', exchange='SMART', currency='USD')
+
+
+def stream(ib, streamer, pushes: int):
+    # Starts the streamer, pushes bars once it has subscribed, then stops it
+    async def main():
+        task = asyncio.ensure_future(streamer.run())
+        while not ib.subscriptions:
+            await asyncio.sleep(0)
+        for _ in range(pushes):
+            ib.push_bar()
+            await asyncio.sleep(0)
+        streamer.stop()
+        await asyncio.wait_for(task, 5)
+    asyncio.run(main())
+
+
+def test_each_closed_bar_triggers_one_cycle(contract):
+    ib = make_ib(history=40)
+    closed = []
+    streamer = BarStreamer(ib, contract, lambda ring, fetch_ns: closed.append((ring.last_date, ring.last_close, len(ring))))
+
+    stream(ib, streamer, pushes=5)
+
+    # The forming bar is held back: history 40 buffers 39, and each push closes one more
+    assert streamer.bars_closed == 5
+    assert [length for _, _, length in closed] == [40, 41, 42, 43, 44]
+    assert [close for _, close, _ in closed] == [2039.0, 2040.0, 2041.0, 2042.0, 2043.0]
+    assert closed[-1][0] == ib.all_bars[43].date
+    assert ib.subscriptions == []  # cancelled on stop
+
+
+def test_bars_queued_before_stop_are_processed(contract):
+    ib = make_ib(history=40)
+    seen = []
+    streamer = BarStreamer(ib, contract, lambda ring, fetch_ns: seen.append(ring.last_close))
+
+    async def main():
+        task = asyncio.ensure_future(streamer.run())
+        while not ib.subscriptions:
+            await asyncio.sleep(0)
+        # A burst of bars and the stop, with no chance to run in between
+        for _ in range(3):
+            ib.push_bar()
+        streamer.stop()
+        await asyncio.wait_for(task, 5)
+    asyncio.run(main())
+
+    assert seen == [2039.0, 2040.0, 2041.0]
+
+
+def test_buffer_keeps_only_the_last_max_bars(contract):
+    ib = make_ib(bars=60, history=40)
+    lengths = []
+    streamer = BarStreamer(ib, contract, lambda ring, fetch_ns: lengths.append(len(ring)), max_bars=30)
+
+    stream(ib, streamer, pushes=10)
+
+    assert lengths == [30] * 10
+    assert streamer.buffer.last_close == 2048.0
+
+
+def test_failed_cycle_skips_the_bar_and_keeps_streaming(contract):
+    ib = make_ib(history=40)
+    seen = []
+
+    def on_bar_close(ring, fetch_ns):
+        if ring.last_close == 2040.0:
+            raise RuntimeError('cycle failed')
+        seen.append(ring.last_close)
+
+    streamer = BarStreamer(ib, contract, on_bar_close)
+    stream(ib, streamer, pushes=4)
+
+    assert streamer.errors == 1
+    assert streamer.bars_closed == 4
+    assert seen == [2039.0, 2041.0, 2042.0]
+
+
+def test_streamed_bars_drive_the_live_session(contract, tmp_path):
+    ib = make_ib(bars=80, history=60)
+    session = LiveSession(ib, contract, initial_equity=100_000, log_path=str(tmp_path / 'live_log.csv'))
+    streamer = BarStreamer(ib, contract, session.run_cycle)
+
+    stream(ib, streamer, pushes=5)
+    flush_logs()
+
+    assert streamer.errors == 0
+    log = pd.read_csv(tmp_path / 'live_log.csv')
+    # One trade log row per closed bar, priced at that bar's close
+    assert log['price'].tolist() == [2059.0, 2060.0, 2061.0, 2062.0, 2063.0]
+    assert len(pd.read_csv(tmp_path / 'live_log_latency.csv')) == 5
+
+
+def test_streamed_cycles_refresh_equity_and_the_broker_position(contract, tmp_path, monkeypatch):
+    ib = make_ib(bars=80, history=60)
+    ib.equity = 250_000
+    session = LiveSession(ib, contract, initial_equity=100_000, log_path=str(tmp_path / 'live_log.csv'))
+    # Bought by hand in TWS after the session started
+    ib.placeOrder(contract, MarketOrder('BUY', 7))
+    ib.sleep(0)
+
+    seen = []
+    run_cycle = session.run_cycle
+
+    def spy(bars, fetch_ns=0, equity=None, sentiment=None):
+        seen.append((dict(session.state), equity, sentiment))
+        return run_cycle(bars, fetch_ns, equity, sentiment)
+
+    monkeypatch.setattr(session, 'run_cycle', spy)
+    streamer = BarStreamer(ib, contract, session.run_streamed_cycle)
+    stream(ib, streamer, pushes=1)
+    flush_logs()
+
+    assert streamer.errors == 0
+    (state, equity, sentiment), = seen
+    # Reconciled with the broker before the strategy ran
+    assert state['position'] == 'long' and state['quantity'] == 7 and state['source'] == 'RECOVERED'
+    # Sized on the broker's equity, not the session's starting figure
+    assert equity == pytest.approx(250_000, abs=100)
+    assert sentiment is not None
+
+
+def test_streamed_bars_keep_utc_timestamps(contract):
+    # TWS in New York: local-time bars would land five hours off in the UTC ring
+    ib = make_ib(history=40)
+    streamer = BarStreamer(ib, contract, lambda ring, fetch_ns: None)
+
+    stream(ib, streamer, pushes=3)
+
+    expected = pd.DatetimeIndex([bar.date for bar in ib.all_bars[:42]])
+    assert (pd.DatetimeIndex(streamer.buffer.to_df()['date']) == expected).all()
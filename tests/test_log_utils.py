@@ -0,0 +1,28 @@
+# Buffered trade log: closing one log flushes it and lets it be reopened
+
+import pandas as pd
+from log_utils import LOG_COLUMNS, close_logger, get_logger
+
+
+def row(price: float) -> dict:
+    return {'timestamp': '2025-03-11 08:00:00', 'signal': 'HOLD', 'price': price, 'trade_type': 'hold'}
+
+
+def test_close_logger_flushes_and_a_later_write_reopens(tmp_path):
+    path = str(tmp_path / 'bench.csv')
+    first = get_logger(path)
+    first.log(row(1.0))
+    first.log(row(2.0))
+
+    close_logger(path)
+    assert pd.read_csv(path)['price'].tolist() == [1.0, 2.0]
+
+    second = get_logger(path)
+    assert second is not first
+    second.log(row(3.0))
+    close_logger(path)
+    close_logger(path)  # already closed: nothing to do
+
+    log = pd.read_csv(path)
+    assert tuple(log.columns) == LOG_COLUMNS
+    assert log['price'].tolist() == [1.0, 2.0, 3.0]
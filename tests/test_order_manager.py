@@ -0,0 +1,132 @@
+# OrderManager driven by FakeIB: partial fills, cancellations and the fills CSV
+
+import asyncio
+import pandas as pd
+import pytest
+from ib_insync import Contract, MarketOrder
+from fake_ib import FakeIB
+from order_manager import OrderManager, FILL_COLUMNS
+
+
+def make_ib(**kwargs) -> FakeIB:
+    bars = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=5, freq='4h', tz='UTC'),
+                         'close': [2000.0, 2001.0, 2002.0, 2003.0, 2004.0]})
+    return FakeIB(bars, history=5, **kwargs).connect()
+
+
+@pytest.fixture
+def contract():
+    return Contract(symbol='XAUUSD', secType='CMDTY', exchange='SMART', currency='USD')
+
+
+def test_partial_fills_accumulate_into_one_record(contract):
+    ib = make_ib(fill_slices=3)
+    manager = OrderManager(ib)
+    updates = []
+    manager.add_listener(lambda record: updates.append((record.status, record.filled, record.remaining)))
+
+    record = manager.submit(contract, MarketOrder('BUY', 9), reference_price=2004.0, tag='RSI')
+    assert record.status == 'PendingSubmit'
+    assert manager.in_flight() == [record]
+    assert not record.done.is_set()
+
+    ib.sleep(0)
+
+    assert len(record.fills) == 3
+    assert [fill.execution.shares for fill in record.fills] == [3, 3, 3]
+    # Every slice is reported as it arrives (fill and status events), with the remainder shrinking
+    partials = list(dict.fromkeys((filled, remaining) for status, filled, remaining in updates if status == 'Submitted' and filled))
+    assert partials == [(3, 6), (6, 3), (9, 0)]
+    assert updates[-1] == ('Filled', 9, 0)
+    assert record.done.is_set()
+    assert manager.in_flight() == []
+    assert record.avg_fill_price == pytest.approx(2004.0)
+    assert record.ack_ns is not None and record.fill_ns >= record.ack_ns
+
+
+def test_slippage_is_signed_against_the_trader(contract):
+    ib = make_ib(slippage=0.001)
+    manager = OrderManager(ib)
+    buy = manager.submit(contract, MarketOrder('BUY', 1), reference_price=2004.0)
+    sell = manager.submit(contract, MarketOrder('SELL', 1), reference_price=2004.0)
+    ib.sleep(0)
+
+    assert buy.slippage == pytest.approx(2004.0 * 0.001)
+    assert sell.slippage == pytest.approx(2004.0 * 0.001)
+
+
+def test_cancelled_order_finishes_without_fills(contract):
+    ib = make_ib()
+    manager = OrderManager(ib)
+    record = manager.submit(contract, MarketOrder('SELL', 4), reference_price=2004.0)
+
+    ib.cancelOrder(record.trade.order)
+    ib.sleep(0)  # a cancelled order must not fill afterwards
+
+    assert record.status == 'Cancelled'
+    assert record.done.is_set()
+    assert record.filled == 0 and record.remaining == 4
+    assert record.fills == []
+    assert record.slippage == 0.0
+    assert manager.in_flight() == []
+    assert ib.positions() == []
+
+
+def test_wait_returns_once_the_broker_fills(contract):
+    ib = make_ib(fill_delay=0.01, fill_slices=2)
+    manager = OrderManager(ib)
+
+    async def place_and_wait():
+        record = manager.submit(contract, MarketOrder('BUY', 2), reference_price=2004.0)
+        assert not record.done.is_set()
+        return await manager.wait(record, timeout=5)
+
+    record = asyncio.run(place_and_wait())
+    assert record.status == 'Filled'
+    assert record.filled == 2
+
+
+def test_completed_orders_are_written_to_the_fills_csv(contract, tmp_path):
+    ib = make_ib(slippage=0.001, fill_slices=2)
+    manager = OrderManager(ib, str(tmp_path / 'live_log.csv'))
+    filled = manager.submit(contract, MarketOrder('BUY', 6), reference_price=2004.0, tag='FOMC')
+    cancelled = manager.submit(contract, MarketOrder('SELL', 2), reference_price=2004.0, tag='RSI')
+    ib.cancelOrder(cancelled.trade.order)
+    ib.sleep(0)
+    manager.logger.flush()
+
+    fills = pd.read_csv(tmp_path / 'live_log_fills.csv')
+    assert tuple(fills.columns) == FILL_COLUMNS
+    # One row per completed order, in completion order
+    assert fills['order_id'].tolist() == [cancelled.order_id, filled.order_id]
+
+    row = fills.set_index('order_id').loc[filled.order_id]
+    assert row['status'] == 'Filled'
+    assert row['action'] == 'BUY' and row['tag'] == 'FOMC'
+    assert row['filled'] == 6 and row['remaining'] == 0
+    assert row['avg_fill_price'] == pytest.approx(2004.0 * 1.001)
+    assert row['slippage_bps'] == pytest.approx(10.0)
+    assert row['fill_ms'] >= row['ack_ms'] >= 0
+
+    row = fills.set_index('order_id').loc[cancelled.order_id]
+    assert row['status'] == 'Cancelled'
+    assert row['filled'] == 0 and row['remaining'] == 2
+    assert pd.isna(row['filled_at'])
+    manager.logger.close()
+
+
+def test_finished_orders_are_no_longer_tracked(contract, tmp_path):
+    ib = make_ib(fill_slices=2)
+    manager = OrderManager(ib, str(tmp_path / 'live_log.csv'))
+    records = [manager.submit(contract, MarketOrder('BUY' if n % 2 else 'SELL', 1), reference_price=2004.0) for n in range(50)]
+    pending = manager.submit(contract, MarketOrder('BUY', 1), reference_price=2004.0)
+    assert len(manager.orders) == 51
+
+    ib.cancelOrder(pending.trade.order)
+    ib.sleep(0)
+    manager.logger.flush()
+
+    assert manager.orders == {}
+    assert all(record.status == 'Filled' for record in records)
+    assert len(pd.read_csv(tmp_path / 'live_log_fills.csv')) == 51
+    manager.logger.close()
@@ -0,0 +1,49 @@
+# RiskEngine: the backtest's batch state matches the live streaming update bar for bar
+
+import numpy as np
+import pandas as pd
+import pytest
+from risk_engine import RiskEngine
+
+KEYS = ('short_vol', 'long_vol', 'current_atr', 'median_atr')
+
+
+def random_walk(bars: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 2000.0 * np.exp(np.cumsum(rng.normal(0, 0.004, bars)))
+    return pd.DataFrame({'date': pd.date_range('2024-01-01', periods=bars, freq='4h', tz='UTC'), 'close': close})
+
+
+@pytest.mark.parametrize('median_bars', [None, 60])
+def test_batch_state_matches_streaming_updates(median_bars):
+    df = random_walk(600)
+    live = RiskEngine(100_000, median_bars=median_bars)
+    window = live._median_atr.window + live._atr.window
+
+    # Live: each cycle sees the latest fetched window, its last bar still forming
+    streamed = {key: [] for key in KEYS}
+    for i in range(len(df)):
+        state = live.update(df.iloc[max(0, i + 1 - window):i + 1])
+        for key in KEYS:
+            streamed[key].append(state[key])
+
+    batch = RiskEngine(100_000, median_bars=median_bars).batch_state(df['close'].to_numpy())
+    for key in KEYS:
+        np.testing.assert_allclose(batch[key], streamed[key], rtol=1e-9, err_msg=key)
+    # Far enough in, the median is over a bounded window, not the whole history
+    assert not np.isnan(batch['median_atr'][-1])
+
+
+def test_update_leaves_the_forming_bar_out_of_the_cache():
+    df = random_walk(200)
+    engine = RiskEngine(100_000)
+    engine.update(df.iloc[:150])
+    atr_ranges = list(engine._atr._ranges)
+
+    # The same window again, its last bar revised: the cached kernels do not move
+    revised = df.iloc[:150].copy()
+    revised.loc[149, 'close'] *= 1.01
+    first, second = engine.update(df.iloc[:150]), engine.update(revised)
+    assert list(engine._atr._ranges) == atr_ranges
+    assert second['current_atr'] != first['current_atr']
+    assert second['median_atr'] == first['median_atr']
@@ -0,0 +1,118 @@
+# RiskMonitor replaying a tick file in the recorded format load_ticks reads
+# (tests/data/xauusd_ticks.csv: time, price) through a LiveSession on FakeIB.
+# The quotes follow a long from 2000 that rallies to ~2010, then slides
+# through its 3% stop at 1940.
+
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from ib_insync import Contract, MarketOrder
+from fake_ib import FakeIB
+from fake_telegram import FakeTelegram
+from alert_utils import AlertDispatcher, use_dispatcher, get_dispatcher
+from live_ibkr import LiveSession
+from log_utils import flush_logs
+from risk_monitor import RiskMonitor, load_ticks, replay_ticks
+
+TICKS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'xauusd_ticks.csv')
+ENTRY = 2000.0
+
+
+@pytest.fixture
+def ticks():
+    return load_ticks(TICKS_PATH)
+
+
+@pytest.fixture
+def telegram():
+    server = FakeTelegram().start()
+    previous = use_dispatcher(AlertDispatcher(token='test', chat_id='1', base_url=server.url, coalesce_seconds=0))
+    yield server
+    use_dispatcher(previous).close(timeout=5)
+    server.stop()
+
+
+def open_position(tmp_path, side: str, quantity: int) -> LiveSession:
+    # Session holding `quantity` at ENTRY, filled through FakeIB like a cycle's entry
+    bars = pd.DataFrame({'date': pd.date_range('2025-03-11', periods=3, freq='4h', tz='UTC'), 'close': [ENTRY] * 3})
+    ib = FakeIB(bars, history=3).connect()
+    contract = Contract(symbol='XAUUSD', secType='CMDTY', exchange='SMART', currency='USD')
+    session = LiveSession(ib, contract, initial_equity=100_000, log_path=str(tmp_path / 'live_log.csv'))
+    ib.placeOrder(contract, MarketOrder('BUY' if side == 'long' else 'SELL', quantity))
+    ib.sleep(0)
+    session.state.update(position=side, entry_price=ENTRY, entry_date=pd.Timestamp('2025-03-11 08:00', tz='UTC'),
+                         source='RSI', partial_exit_done=False, quantity=quantity)
+    session.mark_price = ENTRY
+    return session
+
+
+def test_recorded_ticks_alert_on_drawdown_then_stop_out(tmp_path, ticks, telegram):
+    session = open_position(tmp_path, 'long', 100)
+    monitor = session.risk_monitor
+    monitor.sync()
+    assert monitor.stop_price == pytest.approx(1940.0)
+
+    actions = replay_ticks(monitor, ticks)
+
+    # 5% of initial equity below the peak (~2010.5 * 100), then the first quote at or below the stop
+    assert [action for _, action, _ in actions] == ['DRAWDOWN', 'STOP']
+    assert actions[0][0] == ticks['time'][108]
+    when, _, stop_price = actions[1]
+    assert when == ticks['time'][139] and stop_price == ticks['price'][139] <= 1940.0
+    # Disarmed by the exit: the remaining ticks are ignored
+    assert monitor.ticks == 140
+
+    # Flat at the broker and in the session
+    session.ib.sleep(0)
+    assert session.ib.positions() == []
+    assert session.state['position'] is None and session.state['quantity'] == 0
+    assert session.ib.orders[-1].order.action == 'SELL'
+    assert session.ib.orders[-1].order.totalQuantity == 100
+
+    # The exit is in the trade log with its source and realized PnL
+    flush_logs()
+    log = pd.read_csv(tmp_path / 'live_log.csv')
+    exit_row = log[log['trade_type'] == 'exit'].iloc[-1]
+    assert exit_row['signal'] == 'STOP' and exit_row['source'] == 'RSI'
+    assert exit_row['direction'] == 'long'
+    assert exit_row['pnl'] == pytest.approx((stop_price - ENTRY) * 100)
+    assert exit_row['exit_price'] == pytest.approx(stop_price)
+
+    assert get_dispatcher().flush(timeout=5)
+    texts = [message['text'] for message in telegram.messages]
+    assert len(texts) == 2
+    assert texts[0].startswith('⚠️ Drawdown Alert (intrabar)!')
+    assert texts[1].startswith('🛑 XAUUSD STOP hit intrabar')
+
+
+def test_short_takes_profit_on_the_slide(tmp_path, ticks, telegram):
+    session = open_position(tmp_path, 'short', 50)
+    monitor = RiskMonitor(session, params={'take_profit': 0.015})
+    monitor.sync()
+
+    actions = replay_ticks(monitor, ticks)
+
+    prices = ticks['price'].to_numpy()
+    first = int(np.argmax(prices <= ENTRY * (1 - 0.015)))
+    assert [(when, action) for when, action, _ in actions] == [(ticks['time'][first], 'TAKE_PROFIT')]
+    assert session.state['position'] is None
+    assert monitor.events[-1][1] == 'TAKE_PROFIT'
+
+
+def test_each_deeper_drawdown_band_alerts_again(tmp_path, ticks, telegram):
+    # Twice the size and a wide stop: the slide crosses 5% and then 10% of equity
+    session = open_position(tmp_path, 'long', 200)
+    monitor = RiskMonitor(session, params={'stop_loss': 0.2})
+    monitor.sync()
+
+    actions = replay_ticks(monitor, ticks)
+
+    prices = ticks['price'].to_numpy()
+    drop = (np.maximum.accumulate(prices) - prices) * 200
+    expected = [ticks['time'][int(np.argmax(drop > band * 5_000))] for band in (1, 2)]
+    assert [(when, action) for when, action, _ in actions] == [(when, 'DRAWDOWN') for when in expected]
+    assert session.state['position'] == 'long'
+
+    assert get_dispatcher().flush(timeout=5)
+    assert len(telegram.messages) == 2
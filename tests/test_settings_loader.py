@@ -0,0 +1,73 @@
+# SettingsStore: live sections are validated and follow edits to settings.yaml
+
+import os
+import shutil
+import pytest
+import yaml
+from settings_loader import SettingsStore, settings_path
+
+
+@pytest.fixture
+def path(tmp_path):
+    copy = tmp_path / 'settings.yaml'
+    shutil.copy(settings_path, copy)
+    return str(copy)
+
+
+def edit(path: str, section: str, **values):
+    with open(path) as f:
+        settings = yaml.safe_load(f)
+    settings[section].update(values)
+    stat = os.stat(path)
+    with open(path, 'w') as f:
+        yaml.safe_dump(settings, f)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))  # a new stamp even within the clock's resolution
+
+
+def test_live_sections_follow_edits(path):
+    store = SettingsStore(path)
+    assert store.execution().partial_fraction == 0.4
+
+    edit(path, 'execution', partial_fraction=0.25)
+    edit(path, 'risk_management', drawdown_alert_threshold=0.08, risk_per_trade=0.02)
+    edit(path, 'alerts', cooldown_seconds=60)
+
+    assert store.execution().partial_fraction == 0.25
+    assert store.risk().drawdown_alert_threshold == 0.08
+    assert store.risk().risk_per_trade == 0.02
+    assert store.alerts().cooldown_seconds == 60
+
+
+@pytest.mark.parametrize('section, values', [
+    ('execution', {'partial_fraction': 1.5}),
+    ('risk_management', {'risk_per_trade': 0}),
+    ('risk_management', {'drawdown_alert_threshold': 'five percent'}),
+    ('alerts', {'timeout_seconds': 0}),
+    ('fedwatch_settings', {'sentiment': 'RAISE'}),
+])
+def test_an_invalid_edit_keeps_the_last_good_settings(path, section, values):
+    store = SettingsStore(path)
+    before = (store.fedwatch(), store.risk(), store.execution(), store.alerts())
+
+    edit(path, section, **values)
+
+    assert (store.fedwatch(), store.risk(), store.execution(), store.alerts()) == before
+
+
+def test_an_invalid_file_fails_at_startup(path):
+    edit(path, 'execution', partial_fraction=-0.1)
+    with pytest.raises(ValueError, match='execution.partial_fraction'):
+        SettingsStore(path)
+
+
+def test_the_dispatcher_follows_alert_pacing_unless_given_its_own(monkeypatch, path):
+    import alert_utils
+    store = SettingsStore(path)
+    monkeypatch.setattr(alert_utils, 'SETTINGS', store)
+    following = alert_utils.AlertDispatcher(token='test', chat_id='1')
+    pinned = alert_utils.AlertDispatcher(token='test', chat_id='1', cooldown_seconds=5)
+
+    edit(path, 'alerts', cooldown_seconds=60, max_retries=1)
+
+    assert following.cooldown_seconds == 60 and following.max_retries == 1
+    assert pinned.cooldown_seconds == 5 and pinned.max_retries == 1
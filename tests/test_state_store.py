@@ -0,0 +1,38 @@
+# StateStore journal recovery after a crash mid-write
+
+import json
+from state_store import StateStore
+
+
+def test_entries_saved_after_a_torn_line_survive_reloads(tmp_path):
+    log_path = str(tmp_path / 'live_log.csv')
+    store = StateStore(log_path, fsync=False)
+    store.load()
+    store.save({'position': 'long', 'quantity': 10})
+    store.save({'position': 'long', 'quantity': 15})
+
+    # A crash halfway through the next entry leaves a line without its newline
+    with open(store.journal_path, 'ab') as f:
+        f.write(b'{"seq":3,"ts":"2025-03-11T08:00:00","chan')
+
+    store = StateStore(log_path, fsync=False)
+    assert store.load() == {'position': 'long', 'quantity': 15}
+    store.save({'position': None, 'quantity': 0})
+
+    store = StateStore(log_path, fsync=False)
+    assert store.load() == {'position': None, 'quantity': 0}
+    assert store.seq == 3
+    with open(store.journal_path) as f:
+        assert [json.loads(line)['seq'] for line in f] == [1, 2, 3]
+
+
+def test_snapshot_and_journal_replay(tmp_path):
+    log_path = str(tmp_path / 'live_log.csv')
+    store = StateStore(log_path, snapshot_every=2, fsync=False)
+    store.load()
+    for quantity in (1, 2, 3):
+        store.save({'quantity': quantity})
+
+    store = StateStore(log_path, snapshot_every=2, fsync=False)
+    assert store.load() == {'quantity': 3}
+    assert store.seq == 3 and store.entries == 1
@@ -1,19 +1,212 @@
+# Long-running supervisor for the live strategy
+# Keeps one IB connection and one LiveSession (indicators, risk state, bar
+# cache, journal) warm for the life of the process and runs a cycle shortly
+# after each bar closes. A dropped connection or a failing cycle is retried
+# with exponential backoff without touching the other components, and a
+# heartbeat file reports the health of each one:
+#
+#   python trading_scheduler.py            run the supervisor
+#   python trading_scheduler.py --status   print the last heartbeat
+
+import os
+import sys
+import json
 import time
-import subprocess  # To call another Python file for trading logic
+import math
+import datetime
+from bar_cache import bar_size_seconds
+from bar_ring import BarRing
+from live_ibkr import LiveSession, connect
+from alert_utils import send_telegram_alert
+from settings_loader import (
+    HOST, PORT, CLIENT_ID, BAR_SIZE, LOG_FILE_PATH, SCHEDULER_SETTLE_SECONDS, SCHEDULER_MAX_BACKOFF_SECONDS
+)
+
+
+def heartbeat_path(log_path: str = LOG_FILE_PATH) -> str:
+    root, _ = os.path.splitext(log_path)
+    return root + '_heartbeat.json'
+
+
+class Backoff:
+    def __init__(self, base: float = 5, cap: float = SCHEDULER_MAX_BACKOFF_SECONDS):
+        self.base = base
+        self.cap = cap
+        self.failures = 0
+
+    def next_delay(self) -> float:
+        self.failures += 1
+        return min(self.cap, self.base * 2 ** min(self.failures - 1, 16))
+
+    def reset(self):
+        self.failures = 0
+
+
+class Component:
+    # Health record for one restartable part of the supervisor
+    def __init__(self, name: str):
+        self.name = name
+        self.status = 'starting'
+        self.last_ok = None
+        self.last_error = None
+        self.restarts = 0
+        self.backoff = Backoff()
+
+    def ok(self):
+        self.status = 'ok'
+        self.last_ok = datetime.datetime.now().isoformat()
+        self.backoff.reset()
+
+    def failed(self, error) -> float:
+        self.status = 'failing'
+        self.last_error = f"{type(error).__name__}: {error}"
+        self.restarts += 1
+        return self.backoff.next_delay()
+
+    def to_dict(self) -> dict:
+        return {
+            'status': self.status,
+            'last_ok': self.last_ok,
+            'last_error': self.last_error,
+            'restarts': self.restarts,
+            'consecutive_failures': self.backoff.failures,
+        }
+
+
+class Supervisor:
+    def __init__(self, ib=None, contract=None, log_path: str = LOG_FILE_PATH, settle_seconds: float = SCHEDULER_SETTLE_SECONDS):
+        self.ib = ib
+        self.contract = contract
+        self.log_path = log_path
+        self.settle_seconds = settle_seconds
+        self.bar_seconds = bar_size_seconds(BAR_SIZE)
+        self.session = None
+        self.next_cycle_at = None
+        self.cycles = 0
+        self.started_at = datetime.datetime.now().isoformat()
+        self.components = {name: Component(name) for name in ('connection', 'session', 'cycle')}
+
+    # === Components ===
+    def ensure_connection(self):
+        component = self.components['connection']
+        while self.ib is None or not self.ib.isConnected():
+            try:
+                if self.contract is None:
+                    self.ib, self.contract = connect(self.ib)
+                else:
+                    # Reconnect the same IB object so the session and its order listeners carry on
+                    self.ib.connect(HOST, PORT, clientId=CLIENT_ID)
+                component.ok()
+                print("🔌 Connected to IBKR")
+            except Exception as e:
+                delay = component.failed(e)
+                print(f"❌ IBKR connect failed ({e}); retrying in {delay:.0f}s")
+                self.write_heartbeat()
+                time.sleep(delay)
+
+    def ensure_session(self):
+        component = self.components['session']
+        while self.session is None:
+            try:
+                self.session = LiveSession(self.ib, self.contract, log_path=self.log_path)
+                component.ok()
+            except Exception as e:
+                delay = component.failed(e)
+                print(f"❌ Session start failed ({e}); retrying in {delay:.0f}s")
+                self.write_heartbeat()
+                time.sleep(delay)
+                self.ensure_connection()
+
+    def run_cycle(self) -> BarRing:
+        # Bars, account values, positions and FedWatch are fetched concurrently
+        self.ib.run(self.session.run_cycle_async())
+        self.cycles += 1
+        return self.session.bars
+
+    # === Scheduling ===
+    def next_boundary(self, bars: BarRing = None) -> float:
+        # The last bar is still forming; the cycle runs once it has closed
+        now = time.time()
+        if bars is not None and len(bars):
+            close_at = bars.last_date.timestamp() + self.bar_seconds
+            if close_at <= now:
+                close_at += math.ceil((now - close_at) / self.bar_seconds) * self.bar_seconds
+        else:
+            close_at = (now // self.bar_seconds + 1) * self.bar_seconds
+        return close_at + self.settle_seconds
+
+    def wait_until(self, when: float):
+        # ib.sleep keeps order and connection events flowing while idle
+        while True:
+            remaining = when - time.time()
+            if remaining <= 0:
+                return
+            self.ib.sleep(min(remaining, 60))
+            self.write_heartbeat()
+            if not self.ib.isConnected():
+                self.ensure_connection()
+
+    # === Health ===
+    def health(self) -> dict:
+        return {
+            'pid': os.getpid(),
+            'heartbeat': datetime.datetime.now().isoformat(),
+            'started_at': self.started_at,
+            'cycles': self.cycles,
+            'connected': bool(self.ib is not None and self.ib.isConnected()),
+            'next_cycle_at': datetime.datetime.fromtimestamp(self.next_cycle_at).isoformat() if self.next_cycle_at else None,
+            'position': self.session.state['position'] if self.session is not None else None,
+            'components': {name: c.to_dict() for name, c in self.components.items()},
+        }
+
+    def write_heartbeat(self):
+        path = heartbeat_path(self.log_path)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.health(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    # === Main Loop ===
+    def run(self, max_cycles: int = None):
+        self.ensure_connection()
+        self.ensure_session()
+        cycle = self.components['cycle']
+        bars = None
+        while max_cycles is None or self.cycles < max_cycles:
+            try:
+                self.ensure_connection()
+                bars = self.run_cycle()
+                cycle.ok()
+                self.next_cycle_at = self.next_boundary(bars)
+            except Exception as e:
+                delay = cycle.failed(e)
+                print(f"❌ Cycle failed ({e}); retrying in {delay:.0f}s")
+                # Retry within the bar, but never past the next scheduled cycle
+                self.next_cycle_at = min(time.time() + delay, self.next_boundary(bars))
+                if cycle.backoff.failures == 3:
+                    send_telegram_alert(f"⚠️ Trading cycle failing: {cycle.last_error}", key='supervisor:cycle')
+            self.write_heartbeat()
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+            print(f"⏳ Next cycle at {datetime.datetime.fromtimestamp(self.next_cycle_at)}")
+            self.wait_until(self.next_cycle_at)
 
-# Set the polling interval (4 hours)
-POLL_INTERVAL = 14400  # 4 hours in seconds
 
-while True:
-    try:
-        # Run the live trading logic
-        print("Running trading strategy...")
-        subprocess.run(['python', 'live_trading/live_ibkr.py'])
+def print_status(log_path: str = LOG_FILE_PATH):
+    path = heartbeat_path(log_path)
+    if not os.path.isfile(path):
+        print("❌ No heartbeat yet. Is the supervisor running?")
+        return 1
+    with open(path) as f:
+        health = json.load(f)
+    age = (datetime.datetime.now() - datetime.datetime.fromisoformat(health['heartbeat'])).total_seconds()
+    print(json.dumps(health, indent=2))
+    # A live supervisor writes a heartbeat at least every minute
+    print(f"{'✅' if age < 180 else '⚠️'} Last heartbeat {age:.0f}s ago")
+    return 0 if age < 180 else 1
 
-        # Sleep for the polling interval (4 hours)
-        print(f"Sleeping for {POLL_INTERVAL} seconds...")
-        time.sleep(POLL_INTERVAL)
 
-    except Exception as e:
-        print(f"Error while running trading logic: {e}")
-        break
\ No newline at end of file
+if __name__ == '__main__':
+    if '--status' in sys.argv:
+        sys.exit(print_status())
+    Supervisor().run()